@@ -19,7 +19,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
-from src.data.data_loader import DataLoader
+from src.data.schema_validator import validate_data_directory
 from src.models.hybrid_recommender import HybridRecommender
 from src.models.model_manager import ModelManager
 from src.models.ab_tester import ABTester
@@ -54,19 +54,21 @@ def validate_data(**context):
     """Validate input data quality before training."""
     try:
         config = Config()
-        data_loader = DataLoader()
         
-        # Load datasets
-        books_df, ratings_df, tags_df = data_loader.load_datasets()
+        # Stream the files in chunks: validation must not outgrow training in memory
+        results = validate_data_directory(str(config.DATA_DIR), chunk_size=config.VALIDATION_CHUNK_SIZE)
+        books = results.get('books')
+        ratings = results.get('ratings')
+        rating_stats = ratings.summary.get('numeric_stats', {}).get('rating', {}) if ratings else {}
         
         # Data quality checks
         checks = {
-            'books_not_empty': len(books_df) > 0,
-            'ratings_not_empty': len(ratings_df) > 0,
-            'no_missing_book_ids': books_df['book_id'].notna().all(),
-            'no_missing_ratings': ratings_df['rating'].notna().all(),
-            'valid_rating_range': ratings_df['rating'].between(1, 5).all(),
-            'sufficient_ratings': len(ratings_df) >= 10000,  # Minimum threshold
+            'books_not_empty': books is not None and books.row_count > 0,
+            'ratings_not_empty': ratings is not None and ratings.row_count > 0,
+            'no_missing_book_ids': books is not None and books.summary.get('null_counts', {}).get('book_id', 1) == 0,
+            'no_missing_ratings': ratings is not None and ratings.summary.get('null_counts', {}).get('rating', 1) == 0,
+            'valid_rating_range': bool(rating_stats) and rating_stats['min'] >= 1 and rating_stats['max'] <= 5,
+            'sufficient_ratings': ratings is not None and ratings.row_count >= 10000,  # Minimum threshold
         }
         
         failed_checks = [check for check, passed in checks.items() if not passed]
@@ -74,15 +76,19 @@ def validate_data(**context):
         if failed_checks:
             raise ValueError(f"Data validation failed: {failed_checks}")
         
+        schema_errors = {name: result.errors for name, result in results.items() if result.errors}
+        if schema_errors:
+            logger.warning(f"Schema validation reported errors: {schema_errors}")
+        
         logger.info("Data validation passed successfully")
         
         # Store validation metrics
         context['task_instance'].xcom_push(
             key='data_quality_metrics',
             value={
-                'num_books': len(books_df),
-                'num_ratings': len(ratings_df),
-                'avg_rating': float(ratings_df['rating'].mean()),
+                'num_books': books.row_count,
+                'num_ratings': ratings.row_count,
+                'avg_rating': float(rating_stats['mean']),
                 'validation_timestamp': datetime.now().isoformat()
             }
         )
@@ -139,9 +145,9 @@ def train_new_model(**context):
             run_name=f"scheduled_training_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
         )
         
-        # Train model
+        # Train model, warm-starting from the latest saved version when enabled
         trainer = ModelTrainer()
-        trainer.train()
+        trainer.train(warm_start=Config.WARM_START_ENABLED)
         
         # Log model to MLflow
         model_uri = mlflow_registry.log_model(
@@ -158,6 +164,7 @@ def train_new_model(**context):
                 'model_uri': model_uri,
                 'run_id': run_id,
                 'metrics': trainer.metrics,
+                'version_id': trainer.version_id,
                 'training_timestamp': datetime.now().isoformat()
             }
         )
@@ -37,6 +37,11 @@ def parse_arguments():
         action='store_true',
         help='Force download of datasets even if they exist'
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Recompute every cached pipeline stage even when its inputs are unchanged'
+    )
     return parser.parse_args()
 
 def run_pipeline(args):
@@ -64,7 +69,7 @@ def run_pipeline(args):
         # Step 2: Model Training
         if 'train' in args.steps:
             logger.info("\n=== Starting Model Training ===")
-            trainer = ModelTrainer()
+            trainer = ModelTrainer(force=args.force)
             trainer.train()
             logger.info("Model training completed successfully")
         
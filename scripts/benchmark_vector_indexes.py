@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Compare vector store index types: memory, build time, QPS and recall@10 vs flat.
+
+Examples:
+    python scripts/benchmark_vector_indexes.py --vectors 1000000
+    python scripts/benchmark_vector_indexes.py --embeddings book_embeddings.npy --types flat ivf_sq8 opq
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "scripts"))
+
+from performance_benchmark import PerformanceBenchmark
+from src.core.faiss_index import INDEX_TYPES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector store index types")
+    parser.add_argument('--vectors', type=int, default=1_000_000, help='Synthetic catalogue size')
+    parser.add_argument('--dimension', type=int, default=384, help='Synthetic embedding dimension')
+    parser.add_argument('--embeddings', help='.npy file of real embeddings to use instead')
+    parser.add_argument('--queries', type=int, default=1000, help='Number of queries')
+    parser.add_argument('--k', type=int, default=10, help='Neighbours per query for recall@k')
+    parser.add_argument('--types', nargs='+', default=list(INDEX_TYPES), choices=list(INDEX_TYPES),
+                        help='Index types to compare; flat is always run first as the baseline')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[8, 32, 128], help='IVF nprobe values')
+    parser.add_argument('--ef-search', type=int, nargs='+', default=[64, 128, 256], help='HNSW efSearch values')
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+
+    embeddings = np.load(args.embeddings, mmap_mode='r') if args.embeddings else None
+    index_types = ['flat'] + [index_type for index_type in args.types if index_type != 'flat']
+    results = PerformanceBenchmark().benchmark_vector_indexes(
+        n_vectors=args.vectors,
+        dimension=args.dimension,
+        n_queries=args.queries,
+        k=args.k,
+        index_types=tuple(index_types),
+        nprobe_values=tuple(args.nprobe),
+        ef_search_values=tuple(args.ef_search),
+        embeddings=embeddings,
+    )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump([asdict(result) for result in results], f, indent=2)
+        print(f"✅ Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,22 @@
 import os
 import json
+import asyncio
+import argparse
 import logging
+import time
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
 from sklearn.model_selection import train_test_split
 
+from src.core.stage_cache import StageCache, load_json, save_json
 from src.data.data_loader import DataLoader
 from src.models.hybrid_recommender import HybridRecommender
+from src.models.model_artifacts import (
+    ARTIFACT_FORMAT_VERSION, load_model_artifact, save_model_artifact
+)
+from src.models.model_manager import ModelManager
 from src.config import Config
 
 # Set up logging
@@ -19,32 +27,57 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class ModelTrainer:
-    def __init__(self):
+    def __init__(self, force: bool = False):
+        """
+        Args:
+            force: Recompute every pipeline stage even when its cached inputs
+                are unchanged; defaults to Config.PIPELINE_CACHE_FORCE
+        """
         self.config = Config()
-        self.data_loader = DataLoader()
+        self.data_loader = DataLoader(str(self.config.DATA_DIR))
         self.model = None
         self.metrics = {}
+        self.model_manager = ModelManager()
+        self.version_id = None
+        self.model_key = None
+        self.stage_cache = StageCache(self.config.PIPELINE_CACHE_DIR,
+                                      force=force or self.config.PIPELINE_CACHE_FORCE)
+        self._splits = None
         
         # Create model directory if it doesn't exist
         self.model_dir = Path(self.config.MODEL_DIR)
         self.model_dir.mkdir(parents=True, exist_ok=True)
     
     def load_data(self):
-        """Load and prepare data for training."""
+        """Load the processed books (a cached stage) for training."""
         try:
-            logger.info("Loading datasets...")
-            books_df, ratings_df, tags_df = self.data_loader.load_datasets()
-            
-            # Merge book metadata with tags
-            books_with_tags = self.data_loader.merge_book_metadata(books_df, tags_df)
-            
-            logger.info(f"Loaded {len(books_with_tags)} books and {len(ratings_df)} ratings")
-            return books_with_tags, ratings_df
+            logger.info("Loading books...")
+            books_with_tags = asyncio.run(
+                self.data_loader.load_processed_books_async(self.stage_cache)
+            )
+            logger.info(f"Loaded {len(books_with_tags)} books")
+            return books_with_tags
             
         except Exception as e:
             logger.error(f"Error loading data: {str(e)}")
             raise
     
+    def load_splits(self):
+        """Train, validation and test ratings, read only when a stage needs them."""
+        if self._splits is None:
+            _, ratings_df, _, _ = asyncio.run(self.data_loader.load_datasets_async())
+            logger.info(f"Loaded {len(ratings_df)} ratings")
+            train_data, test_data = self.split_data(ratings_df)
+            
+            # Hold out part of the training ratings for early stopping
+            train_data, validation_data = train_test_split(
+                train_data,
+                test_size=self.config.VALIDATION_SIZE,
+                random_state=self.config.RANDOM_SEED
+            )
+            self._splits = (train_data, validation_data, test_data)
+        return self._splits
+    
     def split_data(self, ratings_df):
         """Split ratings data into train and test sets."""
         try:
@@ -68,7 +101,9 @@ class ModelTrainer:
             actuals = []
             
             for _, row in test_data.iterrows():
-                pred = self.model.predict(user_id=row['user_id'], book_id=row['book_id'])
+                pred = self.model.collab_recommender.predict(
+                    user_id=row['user_id'], book_id=row['book_id']
+                )
                 predictions.append(pred)
                 actuals.append(row['rating'])
             
@@ -94,63 +129,139 @@ class ModelTrainer:
             raise
     
     def save_model(self):
-        """Save trained model and metrics."""
+        """Save trained model and metrics as a new ModelManager version."""
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            model_path = self.model_dir / f'model_{timestamp}.pkl'
-            metrics_path = self.model_dir / f'metrics_{timestamp}.json'
-            
-            # Save model
-            self.model.save(model_path)
-            
-            # Save metrics
-            with open(metrics_path, 'w') as f:
-                json.dump({
-                    'timestamp': timestamp,
-                    'metrics': self.metrics,
-                    'config': self.config.get_training_params()
-                }, f, indent=2)
-            
-            logger.info(f"Model saved to {model_path}")
-            logger.info(f"Metrics saved to {metrics_path}")
+            # The stage key lets a later cache hit find this version again
+            params = {**self.config.get_training_params(), 'model_key': self.model_key}
+            self.version_id = self.model_manager.save_model(self.model, self.metrics, params)
+            logger.info(f"Model saved as version {self.version_id}")
             
         except Exception as e:
             logger.error(f"Error saving model: {str(e)}")
             raise
     
-    def train(self):
-        """Train the recommender model."""
+    def find_saved_version(self, model_key):
+        """Newest saved version holding the model of ``model_key``, or None."""
         try:
-            # Load and prepare data
-            books_df, ratings_df = self.load_data()
-            train_data, test_data = self.split_data(ratings_df)
+            versions = self.model_manager.list_model_versions()
+        except Exception as e:
+            logger.warning(f"Could not list model versions: {str(e)}")
+            return None
+        for metadata in versions:
+            if metadata.get('parameters', {}).get('model_key') == model_key:
+                return metadata['version_id']
+        return None
+    
+    def load_previous_model(self):
+        """Latest saved model to warm start from, or None for a cold start."""
+        try:
+            return self.model_manager.load_model()
+        except FileNotFoundError:
+            logger.info("No previous model version found, training from scratch")
+        except Exception as e:
+            logger.warning(f"Could not load previous model, training from scratch: {str(e)}")
+        return None
+    
+    def train(self, warm_start=None):
+        """Train the recommender model.
+        
+        Processed books, the fitted model and its evaluation are cached
+        stages: with unchanged data files and parameters they are loaded
+        from the stage cache, and the version the cached model was saved as
+        is reused (it is saved again if that version has been deleted).
+        
+        Args:
+            warm_start: Seed collaborative factors from the latest saved
+                version; defaults to Config.WARM_START_ENABLED
+        """
+        try:
+            books_df = self.load_data()
             
-            # Initialize model
-            logger.info("Initializing hybrid recommender model...")
-            self.model = HybridRecommender(
-                content_weight=self.config.CONTENT_WEIGHT,
-                n_factors=self.config.N_FACTORS,
-                n_epochs=self.config.N_EPOCHS,
-                learning_rate=self.config.LEARNING_RATE
+            if warm_start is None:
+                warm_start = self.config.WARM_START_ENABLED
+            
+            # Warm starting only speeds up training, so it is not part of the
+            # fingerprint: unchanged inputs reuse the cached model
+            model_key = self.stage_cache.key(
+                'model',
+                files=[self.data_loader.ratings_path],
+                params={
+                    'content_weight': self.config.get_model_params('hybrid')['content_weight'],
+                    'collaborative': self.config.get_model_params('collaborative'),
+                    'test_size': self.config.TEST_SIZE,
+                    'validation_size': self.config.VALIDATION_SIZE,
+                    'random_seed': self.config.RANDOM_SEED,
+                    'artifact_format': ARTIFACT_FORMAT_VERSION,
+                },
+                upstream=[self.data_loader.processed_books_key(self.stage_cache)]
             )
+            self.model_key = model_key
+            
+            warm_started = False
             
-            # Train model
-            logger.info("Training model...")
-            self.model.fit(books_df, train_data)
+            def fit():
+                nonlocal warm_started
+                train_data, validation_data, _ = self.load_splits()
+                previous_model = self.load_previous_model() if warm_start else None
+                
+                logger.info("Initializing hybrid recommender model...")
+                model = HybridRecommender(
+                    content_weight=self.config.get_model_params('hybrid')['content_weight']
+                )
+                logger.info("Training model (%s start)...", "warm" if previous_model else "cold")
+                model.fit(books_df, train_data, validation=validation_data,
+                          warm_start_from=previous_model)
+                warm_started = previous_model is not None
+                return model
+            
+            start_time = time.perf_counter()
+            self.model = self.stage_cache.run(
+                'model', model_key, fit, save_model_artifact,
+                lambda directory: load_model_artifact(directory, mmap=True)
+            )
+            model_cached = self.stage_cache.hit('model')
+            training_metrics = {
+                'epochs': len(self.model.collab_recommender.training_history),
+                'training_seconds': time.perf_counter() - start_time,
+                'warm_start': warm_started,
+                'cache_hit': model_cached
+            }
+            logger.info(f"Collaborative filter {'loaded' if model_cached else 'trained'} "
+                        f"({training_metrics['epochs']} epochs) "
+                        f"in {training_metrics['training_seconds']:.1f}s")
             
             # Evaluate model
             logger.info("Evaluating model...")
-            self.evaluate_model(test_data)
+            self.metrics = self.stage_cache.run(
+                'evaluation', self.stage_cache.key('evaluation', upstream=[model_key]),
+                lambda: self.evaluate_model(self.load_splits()[2]), save_json, load_json
+            )
+            self.metrics.update(training_metrics)
             
-            # Save model and metrics
-            self.save_model()
+            # A cached model keeps the version it was saved as, unless that was deleted
+            self.version_id = self.find_saved_version(model_key) if model_cached else None
+            if self.version_id is not None:
+                logger.info(f"Inputs unchanged; keeping saved model version {self.version_id}")
+            else:
+                self.save_model()
             
             logger.info("Model training completed successfully!")
+            logger.info("Pipeline stage cache:\n%s", self.stage_cache.format_report())
             
         except Exception as e:
             logger.error(f"Error during model training: {str(e)}")
             raise
 
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Train the GoodBooks hybrid recommender')
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Recompute every pipeline stage even when its inputs are unchanged'
+    )
+    return parser.parse_args()
+
 if __name__ == "__main__":
-    trainer = ModelTrainer()
+    args = parse_arguments()
+    trainer = ModelTrainer(force=args.force)
     trainer.train()
\ No newline at end of file
@@ -5,10 +5,12 @@ Follows Bookworm AI Coding Standards for high-performance, secure, and maintaina
 
 import asyncio
 import os
+import shutil
 import time
 import uuid
 from contextlib import asynccontextmanager
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 import pandas as pd
@@ -18,6 +20,7 @@ from fastapi import (
     Depends,
     FastAPI,
     HTTPException,
+    Query,
     Request,
     Response,
     status,
@@ -74,8 +77,9 @@ from src.core.session_store import RedisSessionStore, SessionStoreError, UserInt
 
 # Core modules
 from src.core.settings import settings
+from src.core.stage_cache import StageCache
 from src.core.tracing import TracingManager, get_tracer, trace_operation
-from src.core.vector_store import BookVectorStore, VectorStoreError
+from src.core.vector_store import METADATA_DIR, BookVectorStore, VectorStoreError
 
 # Business logic modules
 from src.data.data_loader import DataLoader
@@ -88,6 +92,11 @@ from src.middleware.security_middleware import (
 )
 from src.models.ab_tester import ABTester
 from src.models.hybrid_recommender import HybridRecommender
+from src.models.model_artifacts import (
+    ARTIFACT_FORMAT_VERSION,
+    load_model_artifact,
+    save_model_artifact,
+)
 from src.models.model_manager import ModelManager
 from src.privacy.data_privacy import (
     AnonymizationLevel,
@@ -411,53 +420,98 @@ async def initialize_data_and_models():
         # Register model reload callback for A/B testing
         model_manager.register_reload_callback(_on_model_reload)
 
+        # Stage outputs are reused across restarts while their inputs are unchanged
+        stage_cache = StageCache(config.PIPELINE_CACHE_DIR, force=config.PIPELINE_CACHE_FORCE)
+
         # Initialize data loader
         data_loader = DataLoader(str(settings.data_dir))
 
-        # Load datasets using async methods
-        logger.info("Loading datasets")
-        books, ratings, tags, book_tags = await data_loader.load_datasets_async()
+        # Build the book metadata index that every component's lookups share
+        await data_loader.get_book_index_async()
 
-        # Merge and preprocess data using async methods
+        # Merge and preprocess data (cached stage)
         logger.info("Processing book metadata")
-        merged_books = await data_loader.merge_book_metadata_async(
-            books, book_tags, tags
-        )
-        processed_books = await data_loader.preprocess_tags_async(merged_books)
+        processed_books = await data_loader.load_processed_books_async(stage_cache)
+        books_key = data_loader.processed_books_key(stage_cache)
 
         # Initialize and train recommender (or load existing)
         logger.info("Loading recommendation models")
         try:
             # Try to load existing model first
             recommender = model_manager.load_model()
-            if recommender is None:
-                # Train new model if none exists
-                recommender = HybridRecommender()
-                await asyncio.to_thread(recommender.fit, processed_books, ratings)
-                # Save the newly trained model
-                model_manager.save_model(recommender, {}, {})
         except Exception as e:
             logger.warning(f"Failed to load existing model, training new one: {str(e)}")
-            recommender = HybridRecommender()
-            await asyncio.to_thread(recommender.fit, processed_books, ratings)
+            recommender = None
+        if recommender is None:
+
+            async def train_recommender():
+                rating_matrix = await data_loader.load_rating_matrix_async()
+                model = HybridRecommender()
+                await asyncio.to_thread(model.fit, processed_books, rating_matrix)
+                return model
+
+            model_key = stage_cache.key(
+                "serving_model",
+                files=[data_loader.ratings_path],
+                params={
+                    "collaborative": config.get_model_params("collaborative"),
+                    "artifact_format": ARTIFACT_FORMAT_VERSION,
+                },
+                upstream=[books_key],
+            )
+            recommender = await stage_cache.run_async(
+                "serving_model",
+                model_key,
+                train_recommender,
+                save_model_artifact,
+                load_model_artifact,
+            )
+            if not stage_cache.hit("serving_model"):
+                # Save the newly trained model
+                model_manager.save_model(recommender, {}, {})
 
-        # Initialize vector store
+        # Initialize vector store (cached stage)
         logger.info("Initializing vector store")
-        vector_store = BookVectorStore(
-            model_name="all-MiniLM-L6-v2",
-            store_path=str(settings.models_dir / "vector_store"),
-        )
+        vector_store_params = {"model_name": "all-MiniLM-L6-v2", "dimension": 384, "index_type": "flat"}
 
-        # Try to load existing vector store, otherwise build new one
-        if not await vector_store.load_async():
+        vector_store_path = settings.models_dir / "vector_store"
+
+        async def build_vector_store():
             logger.info("Building new vector store")
-            await vector_store.build_from_books_async(processed_books)
-        else:
-            logger.info("Loaded existing vector store")
+            store = BookVectorStore(**vector_store_params, store_path=str(vector_store_path))
+            await store.build_from_books_async(processed_books)
+            return store
+
+        def copy_vector_store(source: Path, target: Path):
+            target.mkdir(parents=True, exist_ok=True)
+            for name in ("faiss.index", "metadata.pkl"):
+                shutil.copy2(source / name, target / name)
+            shutil.rmtree(target / METADATA_DIR, ignore_errors=True)
+            shutil.copytree(source / METADATA_DIR, target / METADATA_DIR)
+
+        async def save_vector_store(store, directory):
+            await asyncio.to_thread(copy_vector_store, store.store_path, directory)
+
+        async def load_vector_store(directory):
+            # Cache entries are immutable: serve (and let admin edits save to) a copy
+            await asyncio.to_thread(copy_vector_store, directory, vector_store_path)
+            store = BookVectorStore(**vector_store_params, store_path=str(vector_store_path))
+            if not await store.load_async():
+                raise VectorStoreError(f"No vector store in {directory}")
+            return store
+
+        vector_store = await stage_cache.run_async(
+            "vector_store",
+            stage_cache.key("vector_store", params=vector_store_params, upstream=[books_key]),
+            build_vector_store,
+            save_vector_store,
+            load_vector_store,
+        )
+        logger.info(f"Pipeline stage cache:\n{stage_cache.format_report()}")
 
         # Initialize RAG service
         logger.info("Initializing RAG explanation service")
-        rag_service = RAGExplanationService(vector_store)
+        rag_service = RAGExplanationService(vector_store, data_loader=data_loader)
 
         # Initialize session store
         logger.info("Initializing session store")
@@ -882,6 +936,17 @@ class SearchRequest(BaseModel):
         }
 
 
+class VectorStoreBooksRequest(BaseModel):
+    """Request model for incremental vector store updates."""
+
+    book_ids: List[int] = Field(
+        ..., min_length=1, max_length=10000, description="Books to update or remove"
+    )
+
+    class Config:
+        schema_extra = {"example": {"book_ids": [1, 2, 3]}}
+
+
 class SearchResponse(BaseModel):
     """Response model for semantic search endpoint."""
 
@@ -1908,15 +1973,19 @@ async def get_vector_store_stats(current_user: User = Depends(get_current_active
 @require_roles([UserRole.ADMIN])
 async def rebuild_vector_store(
     background_tasks: BackgroundTasks,
+    full: bool = Query(False, description="Re-embed every book instead of only changed ones"),
     current_user: User = Depends(get_current_active_user),
 ):
     """
     Trigger vector store rebuild (runs in background).
 
+    By default the store is synced with the current books: only books whose
+    text changed are re-embedded and removed books are dropped.
+
     Requires ADMIN role for access.
     """
     try:
-        logger.info("Vector store rebuild requested", admin_user=current_user.username)
+        logger.info("Vector store rebuild requested", admin_user=current_user.username, full=full)
 
         async def rebuild_task():
             try:
@@ -1929,9 +1998,14 @@ async def rebuild_vector_store(
                 )
                 processed_books = await data_loader.preprocess_tags_async(merged_books)
 
-                # Rebuild vector store
-                await vector_store.build_from_books_async(processed_books)
-                logger.info("Vector store rebuild completed successfully")
+                if full or vector_store.index is None:
+                    # Rebuild vector store
+                    await vector_store.build_from_books_async(processed_books)
+                    logger.info("Vector store rebuild completed successfully")
+                else:
+                    stats = await vector_store.sync_books_async(processed_books)
+                    await vector_store.save_async()
+                    logger.info("Vector store sync completed successfully", **stats)
 
             except Exception as e:
                 logger.error(f"Vector store rebuild failed: {str(e)}")
@@ -1951,6 +2025,73 @@ async def rebuild_vector_store(
         )
 
 
+@app.post("/admin/vector-store/books")
+@require_roles([UserRole.ADMIN])
+async def upsert_vector_store_books(
+    request: VectorStoreBooksRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Re-embed the given books from the current book data, without a rebuild.
+
+    Requires ADMIN role for access.
+    """
+    try:
+        logger.info("Vector store upsert requested", admin_user=current_user.username,
+                    num_books=len(request.book_ids))
+
+        # Processed books come from the stage cache while the data files are unchanged
+        processed_books = await data_loader.load_processed_books_async(
+            StageCache(Config.PIPELINE_CACHE_DIR)
+        )
+        books = processed_books[processed_books["book_id"].isin(request.book_ids)]
+        stats = await vector_store.upsert_books_async(books)
+        background_tasks.add_task(vector_store.save_async)
+
+        return {
+            "status": "updated",
+            "not_found": sorted(set(request.book_ids) - set(books["book_id"].tolist())),
+            **stats,
+        }
+
+    except Exception as e:
+        logger.error(f"Failed to upsert vector store books: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upsert books: {str(e)}",
+        )
+
+
+@app.delete("/admin/vector-store/books")
+@require_roles([UserRole.ADMIN])
+async def remove_vector_store_books(
+    request: VectorStoreBooksRequest,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Remove the given books from the vector store.
+
+    Requires ADMIN role for access.
+    """
+    try:
+        logger.info("Vector store removal requested", admin_user=current_user.username,
+                    num_books=len(request.book_ids))
+
+        removed = await vector_store.remove_books_async(request.book_ids)
+        background_tasks.add_task(vector_store.save_async)
+
+        return {"status": "removed", "removed": removed}
+
+    except Exception as e:
+        logger.error(f"Failed to remove vector store books: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to remove books: {str(e)}",
+        )
+
+
 # =====================================
 # METRICS & ANALYTICS ENDPOINTS
 # =====================================
@@ -20,7 +20,11 @@ class Config:
             'n_factors': 50,
             'learning_rate': 0.01,
             'regularization': 0.02,
-            'n_epochs': 20
+            'n_epochs': 20,
+            'solver': 'sgd',  # 'sgd' or 'als'
+            'retrieval': os.getenv('CF_RETRIEVAL', 'exact'),  # 'exact' or 'ann'
+            'ann_index_type': os.getenv('CF_ANN_INDEX_TYPE', 'hnsw'),  # 'hnsw' or 'ivf'
+            'early_stopping_rounds': 3  # Epochs without validation RMSE gain
         },
         'hybrid': {
             'content_weight': 0.5
@@ -57,6 +61,7 @@ class Config:
     # Model Management Configuration
     MODEL_DIR = os.getenv('MODEL_DIR', 'models')
     MODEL_CACHE_SIZE = int(os.getenv('MODEL_CACHE_SIZE', '3'))
+    MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'mmap')  # 'mmap' artifact directory or 'pickle'
     MODEL_HEALTH_CHECK_INTERVAL = int(os.getenv('MODEL_HEALTH_CHECK_INTERVAL', '300'))  # 5 minutes
     
     # A/B Testing Configuration  
@@ -95,6 +100,19 @@ class Config:
     RETRAINING_PERFORMANCE_THRESHOLD = float(os.getenv('RETRAINING_PERFORMANCE_THRESHOLD', '1.2'))
     RETRAINING_AGE_THRESHOLD_DAYS = int(os.getenv('RETRAINING_AGE_THRESHOLD_DAYS', '30'))
     
+    # Training Configuration
+    TEST_SIZE = float(os.getenv('TEST_SIZE', '0.2'))
+    VALIDATION_SIZE = float(os.getenv('VALIDATION_SIZE', '0.1'))  # Share of train used for early stopping
+    RANDOM_SEED = int(os.getenv('RANDOM_SEED', '42'))
+    WARM_START_ENABLED = os.getenv('WARM_START_ENABLED', 'true').lower() == 'true'
+    
+    # Rows per chunk when the retraining pipeline validates the data files
+    VALIDATION_CHUNK_SIZE = int(os.getenv('VALIDATION_CHUNK_SIZE', '500000'))
+    
+    # Pipeline stage cache (processed books, fitted model, vector store)
+    PIPELINE_CACHE_DIR = os.getenv('PIPELINE_CACHE_DIR', str(MODELS_DIR / 'pipeline_cache'))
+    PIPELINE_CACHE_FORCE = os.getenv('PIPELINE_CACHE_FORCE', 'false').lower() == 'true'
+    
     # S3 Configuration (for model artifacts)
     S3_BUCKET = os.getenv('S3_BUCKET', None)
     S3_REGION = os.getenv('S3_REGION', 'us-east-1')
@@ -126,6 +144,17 @@ class Config:
         """Get model parameters by type."""
         return cls.MODEL_PARAMS.get(model_type, {})
     
+    @classmethod
+    def get_training_params(cls) -> Dict[str, Any]:
+        """Get training run parameters."""
+        return {
+            'test_size': cls.TEST_SIZE,
+            'validation_size': cls.VALIDATION_SIZE,
+            'random_seed': cls.RANDOM_SEED,
+            'warm_start': cls.WARM_START_ENABLED,
+            'model_params': cls.MODEL_PARAMS
+        }
+    
     @classmethod
     def create_directories(cls) -> None:
         """Create necessary directories if they don't exist."""
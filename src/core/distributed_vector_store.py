@@ -35,6 +35,7 @@ except ImportError:
 
 from src.core.logging import StructuredLogger
 from src.core.exceptions import GoodBooksException
+from src.core.faiss_index import IndexSpec, create_index, train_index
 from src.config import Config
 
 logger = StructuredLogger(__name__)
@@ -49,6 +50,7 @@ class VectorStoreConfig:
     use_gpu: bool = False
     index_type: str = "ivf_hnsw"  # flat, ivf, hnsw, ivf_hnsw
     nlist: int = 1024  # Number of clusters for IVF
+    nprobe: int = 32  # Clusters scanned per IVF query
     m: int = 32  # Number of connections for HNSW
     efConstruction: int = 200
     efSearch: int = 128
@@ -184,39 +186,39 @@ class DistributedVectorStore:
     def _create_optimized_faiss_index(self, num_vectors: int) -> faiss.Index:
         """Create optimized FAISS index based on configuration and data size."""
         try:
-            if self.config.index_type == "flat":
-                index = faiss.IndexFlatIP(self.dimension)
-                
-            elif self.config.index_type == "ivf":
-                quantizer = faiss.IndexFlatIP(self.dimension)
+            structure = self.config.index_type
+            if structure == "ivf":
                 nlist = min(self.config.nlist, max(1, num_vectors // 100))
-                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
-                
-            elif self.config.index_type == "hnsw":
-                index = faiss.IndexHNSWFlat(self.dimension, self.config.m)
-                index.hnsw.efConstruction = self.config.efConstruction
-                index.hnsw.efSearch = self.config.efSearch
-                
-            elif self.config.index_type == "ivf_hnsw":
+            elif structure == "ivf_hnsw":
                 # Hierarchical index for large datasets
-                quantizer = faiss.IndexHNSWFlat(self.dimension, self.config.m)
-                quantizer.hnsw.efConstruction = self.config.efConstruction
                 nlist = min(self.config.nlist, max(1, num_vectors // 50))
-                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
-                
+            elif structure in ("flat", "hnsw"):
+                nlist = None
             else:
-                logger.warning(f"Unknown index type {self.config.index_type}, using IVF")
-                quantizer = faiss.IndexFlatIP(self.dimension)
+                logger.warning(f"Unknown index type {structure}, using IVF")
+                structure = "ivf"
                 nlist = min(self.config.nlist, max(1, num_vectors // 100))
-                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
             
-            # Add compression if enabled
+            # Compression: product quantization inside IVF lists, scalar
+            # quantization for flat and HNSW scans
+            encoding = "flat"
             if self.config.enable_compression:
-                compressed_index = faiss.IndexIVFPQ(
-                    index.quantizer, self.dimension, index.nlist,
-                    self.dimension // 8, self.config.compression_bits
-                )
-                index = compressed_index
+                encoding = "pq" if structure in ("ivf", "ivf_hnsw") else "sq"
+            
+            index = create_index(
+                IndexSpec(
+                    structure=structure,
+                    encoding=encoding,
+                    bits=self.config.compression_bits,
+                    nlist=nlist,
+                    nprobe=self.config.nprobe,
+                    hnsw_m=self.config.m,
+                    ef_construction=self.config.efConstruction,
+                    ef_search=self.config.efSearch
+                ),
+                self.dimension,
+                num_vectors
+            )
             
             # GPU support if available
             if self.config.use_gpu and faiss.get_num_gpus() > 0:
@@ -228,6 +230,7 @@ class DistributedVectorStore:
                        index_type=self.config.index_type,
                        num_vectors=num_vectors,
                        compression=self.config.enable_compression,
+                       encoding=encoding,
                        gpu=self.config.use_gpu and faiss.get_num_gpus() > 0)
             
             return index
@@ -292,14 +295,9 @@ class DistributedVectorStore:
         # Build shards in parallel
         await asyncio.gather(*tasks)
         
-        # Update shard mapping
-        for shard_id in range(num_shards):
-            start_idx = shard_id * self.config.shard_size
-            end_idx = min((shard_id + 1) * self.config.shard_size, len(books_df))
-            
-            for idx in range(start_idx, end_idx):
-                book_id = books_df.iloc[idx]['book_id']
-                self.shard_mapping[book_id] = shard_id
+        # Update shard mapping: row i went to shard i // shard_size
+        shard_ids = np.arange(len(books_df)) // self.config.shard_size
+        self.shard_mapping.update(zip(books_df['book_id'].astype(np.int64).tolist(), shard_ids.tolist()))
     
     async def _build_shard(self, shard_id: int, books_df: pd.DataFrame, texts: List[str]) -> None:
         """Build a single shard of the vector index."""
@@ -314,11 +312,10 @@ class DistributedVectorStore:
                 # Normalize for cosine similarity
                 faiss.normalize_L2(embeddings)
                 
-                # Train if needed
-                if hasattr(index, 'train') and not index.is_trained:
-                    await asyncio.get_event_loop().run_in_executor(
-                        self.executor, index.train, embeddings
-                    )
+                # Train on a sample if needed
+                await asyncio.get_event_loop().run_in_executor(
+                    self.executor, train_index, index, embeddings
+                )
                 
                 # Add vectors
                 await asyncio.get_event_loop().run_in_executor(
@@ -368,17 +365,7 @@ class DistributedVectorStore:
                     self.index.upsert(vectors=batch)
             
             # Store metadata for this shard
-            shard_metadata = {}
-            for i, (_, row) in enumerate(books_df.iterrows()):
-                internal_id = i
-                shard_metadata[internal_id] = {
-                    'book_id': int(row['book_id']),
-                    'title': row['title'],
-                    'authors': row['authors'],
-                    'original_text': texts[i]
-                }
-            
-            self.metadata_store[shard_id] = shard_metadata
+            self.metadata_store[shard_id] = self._shard_metadata(books_df, texts)
             
             logger.info(f"Built shard {shard_id} with {len(books_df)} vectors")
             
@@ -395,10 +382,9 @@ class DistributedVectorStore:
             
             faiss.normalize_L2(embeddings)
             
-            if hasattr(index, 'train') and not index.is_trained:
-                await asyncio.get_event_loop().run_in_executor(
-                    self.executor, index.train, embeddings
-                )
+            await asyncio.get_event_loop().run_in_executor(
+                self.executor, train_index, index, embeddings
+            )
             
             await asyncio.get_event_loop().run_in_executor(
                 self.executor, index.add, embeddings
@@ -413,17 +399,8 @@ class DistributedVectorStore:
             )
         
         # Store metadata
-        metadata = {}
-        for i, (_, row) in enumerate(books_df.iterrows()):
-            metadata[i] = {
-                'book_id': int(row['book_id']),
-                'title': row['title'],
-                'authors': row['authors'],
-                'original_text': texts[i]
-            }
-            self.shard_mapping[row['book_id']] = 0
-        
-        self.metadata_store[0] = metadata
+        self.metadata_store[0] = self._shard_metadata(books_df, texts)
+        self.shard_mapping.update(dict.fromkeys(books_df['book_id'].astype(np.int64).tolist(), 0))
     
     async def search_async(self, 
                           query: str, 
@@ -591,31 +568,46 @@ class DistributedVectorStore:
             logger.error("Pinecone search failed", error=str(e))
             return []
     
-    async def _prepare_book_texts_async(self, books_df: pd.DataFrame) -> List[str]:
-        """Prepare text content for embedding generation."""
-        def prepare_text(row):
-            parts = [str(row['title'])]
-            
-            if 'authors' in row and pd.notna(row['authors']):
-                parts.append(f"by {row['authors']}")
-            
-            if 'description' in row and pd.notna(row['description']):
-                parts.append(str(row['description'])[:500])  # Limit description length
-            
-            if 'tags' in row and pd.notna(row['tags']):
-                parts.append(f"Tags: {row['tags']}")
-            
-            return " ".join(parts)
+    @staticmethod
+    def _prepare_book_texts(books_df: pd.DataFrame) -> List[str]:
+        """Build embedding texts column-wise: title, then optional fields where present."""
+        texts = books_df['title'].astype(object).map(str)
         
-        # Parallel text preparation
-        loop = asyncio.get_event_loop()
-        tasks = [
-            loop.run_in_executor(self.executor, prepare_text, row)
-            for _, row in books_df.iterrows()
-        ]
+        for column, prefix, max_length in (('authors', "by ", None),
+                                           ('description', "", 500),  # Limit description length
+                                           ('tags', "Tags: ", None)):
+            if column not in books_df.columns:
+                continue
+            values = books_df[column].astype(object).map(str)
+            if max_length is not None:
+                values = values.str[:max_length]
+            texts = texts + (" " + prefix + values).where(books_df[column].notna(), "")
         
-        texts = await asyncio.gather(*tasks)
-        return texts
+        return texts.tolist()
+    
+    async def _prepare_book_texts_async(self, books_df: pd.DataFrame) -> List[str]:
+        """Prepare text content for embedding generation."""
+        return await asyncio.get_event_loop().run_in_executor(
+            self.executor, self._prepare_book_texts, books_df
+        )
+    
+    @staticmethod
+    def _shard_metadata(books_df: pd.DataFrame, texts: List[str]) -> Dict[int, Dict[str, Any]]:
+        """Metadata of a shard's books, keyed by their position in the shard index."""
+        return {
+            internal_id: {
+                'book_id': book_id,
+                'title': title,
+                'authors': authors,
+                'original_text': text
+            }
+            for internal_id, (book_id, title, authors, text) in enumerate(zip(
+                books_df['book_id'].astype(np.int64).tolist(),
+                books_df['title'].tolist(),
+                books_df['authors'].tolist(),
+                texts
+            ))
+        }
     
     async def _generate_embeddings_async(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for texts in batches."""
@@ -0,0 +1,186 @@
+"""
+FAISS index construction shared by the vector stores.
+
+An index is a search structure ('flat', 'ivf', 'hnsw', 'ivf_hnsw') over a
+vector encoding: full float32 vectors ('flat'), 4-8 bit scalar quantization
+('sq'), product quantization ('pq') or PQ after a learned rotation ('opq').
+All indexes rank by inner product over normalized vectors. Trainable
+indexes learn their clusters and codebooks from a random sample of the
+vectors rather than the whole catalogue.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import faiss
+
+STRUCTURES = ('flat', 'ivf', 'hnsw', 'ivf_hnsw')
+ENCODINGS = ('flat', 'sq', 'pq', 'opq')
+
+# BookVectorStore index types -> (structure, encoding, bits per code)
+INDEX_TYPES = {
+    'flat': ('flat', 'flat', 32),
+    'ivf': ('ivf', 'flat', 32),
+    'hnsw': ('hnsw', 'flat', 32),
+    'sq8': ('flat', 'sq', 8),
+    'ivf_sq8': ('ivf', 'sq', 8),
+    'ivf_pq': ('ivf', 'pq', 8),
+    'opq': ('ivf', 'opq', 8),
+}
+
+_SQ_TYPES = {
+    4: faiss.ScalarQuantizer.QT_4bit,
+    6: faiss.ScalarQuantizer.QT_6bit,
+    8: faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+@dataclass
+class IndexSpec:
+    """How to build an index; unset sizes are derived from the catalogue."""
+    structure: str = 'flat'
+    encoding: str = 'flat'
+    bits: int = 8  # Bits per scalar (sq) or per sub-quantizer code (pq, opq)
+    nlist: Optional[int] = None  # IVF lists
+    nprobe: int = 32  # IVF lists scanned per query
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    ef_search: int = 128
+    pq_m: Optional[int] = None  # PQ sub-quantizers, must divide the dimension
+    opq_iterations: int = 25
+    train_size: int = 65536  # Training sample; IVF indexes use at least 40 vectors per list
+
+    @classmethod
+    def for_index_type(cls, index_type: str, **overrides) -> 'IndexSpec':
+        """Spec of a BookVectorStore index type."""
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unsupported index type: {index_type}")
+        structure, encoding, bits = INDEX_TYPES[index_type]
+        return cls(structure=structure, encoding=encoding, bits=bits, **overrides)
+
+
+def ivf_nlist(num_vectors: int) -> int:
+    """About 4 * sqrt(n) lists, keeping at least 39 training vectors per list."""
+    return max(1, min(int(4 * np.sqrt(num_vectors)), num_vectors // 39))
+
+
+def pq_subquantizers(dimension: int) -> int:
+    """Largest divisor of the dimension up to dimension / 8 (8+ dimensions per code)."""
+    return max(m for m in range(1, max(1, dimension // 8) + 1) if dimension % m == 0)
+
+
+def _pq_bits(spec: IndexSpec, num_vectors: int) -> int:
+    """Code bits small catalogues can train: each codebook needs ~39 vectors per centroid."""
+    bits = min(spec.bits, int(np.log2(max(num_vectors // 39, 1))))
+    if bits < 1:
+        if num_vectors < 2:
+            raise ValueError("Product quantization needs at least 2 training vectors")
+        bits = 1
+    return bits
+
+
+def _encoded_base(spec: IndexSpec, dimension: int, num_vectors: int) -> faiss.Index:
+    """Non-IVF index over the spec's encoding."""
+    metric = faiss.METRIC_INNER_PRODUCT
+    if spec.structure == 'flat':
+        if spec.encoding == 'flat':
+            return faiss.IndexFlatIP(dimension)
+        if spec.encoding == 'sq':
+            return faiss.IndexScalarQuantizer(dimension, _SQ_TYPES[spec.bits], metric)
+        return faiss.IndexPQ(dimension, spec.pq_m or pq_subquantizers(dimension),
+                             _pq_bits(spec, num_vectors), metric)
+
+    if spec.encoding == 'flat':
+        index = faiss.IndexHNSWFlat(dimension, spec.hnsw_m, metric)
+    elif spec.encoding == 'sq':
+        index = faiss.IndexHNSWSQ(dimension, _SQ_TYPES[spec.bits], spec.hnsw_m, metric)
+    else:
+        index = faiss.IndexHNSWPQ(dimension, spec.pq_m or pq_subquantizers(dimension), spec.hnsw_m,
+                                  _pq_bits(spec, num_vectors), metric)
+    index.hnsw.efConstruction = spec.ef_construction
+    index.hnsw.efSearch = spec.ef_search
+    return index
+
+
+def _encoded_ivf(spec: IndexSpec, dimension: int, num_vectors: int) -> faiss.Index:
+    """IVF index over the spec's encoding."""
+    metric = faiss.METRIC_INNER_PRODUCT
+    if spec.structure == 'ivf_hnsw':
+        # HNSW coarse quantizer: assigning to many lists stays fast
+        quantizer = faiss.IndexHNSWFlat(dimension, spec.hnsw_m, metric)
+        quantizer.hnsw.efConstruction = spec.ef_construction
+        quantizer.hnsw.efSearch = spec.ef_search
+    else:
+        quantizer = faiss.IndexFlatIP(dimension)
+    nlist = spec.nlist or ivf_nlist(num_vectors)
+
+    if spec.encoding == 'flat':
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+    elif spec.encoding == 'sq':
+        index = faiss.IndexIVFScalarQuantizer(quantizer, dimension, nlist, _SQ_TYPES[spec.bits], metric)
+    else:
+        index = faiss.IndexIVFPQ(quantizer, dimension, nlist, spec.pq_m or pq_subquantizers(dimension),
+                                 _pq_bits(spec, num_vectors), metric)
+    index.nprobe = min(spec.nprobe, nlist)
+    return index
+
+
+def create_index(spec: IndexSpec, dimension: int, num_vectors: int) -> faiss.Index:
+    """
+    Create an untrained index for ``num_vectors`` vectors of ``dimension``.
+
+    Raises:
+        ValueError: If the structure or encoding is unknown, or the
+            encoding cannot be trained on so few vectors
+    """
+    if spec.structure not in STRUCTURES:
+        raise ValueError(f"Unsupported index structure: {spec.structure}")
+    if spec.encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported index encoding: {spec.encoding}")
+    if spec.encoding == 'sq' and spec.bits not in _SQ_TYPES:
+        raise ValueError(f"Scalar quantization supports {sorted(_SQ_TYPES)} bits, not {spec.bits}")
+
+    if spec.structure in ('ivf', 'ivf_hnsw'):
+        index = _encoded_ivf(spec, dimension, num_vectors)
+    else:
+        index = _encoded_base(spec, dimension, num_vectors)
+
+    if spec.encoding == 'opq':
+        # Rotate vectors so PQ sub-spaces carry balanced variance
+        opq = faiss.OPQMatrix(dimension, spec.pq_m or pq_subquantizers(dimension))
+        opq.niter = spec.opq_iterations
+        index = faiss.IndexPreTransform(opq, index)
+    return index
+
+
+def ivf_of(index: faiss.Index) -> Optional[faiss.IndexIVF]:
+    """The IVF index inside ``index`` (through pre-transforms), or None."""
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def set_nprobe(index: faiss.Index, nprobe: int) -> None:
+    """Set the IVF lists scanned per query, if ``index`` is an IVF index."""
+    ivf = ivf_of(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+
+
+def train_index(index: faiss.Index, vectors: np.ndarray, train_size: int = 65536, seed: int = 0) -> None:
+    """Train ``index`` on a random sample of ``vectors`` if it needs training."""
+    if index.is_trained:
+        return
+    ivf = ivf_of(index)
+    size = max(train_size, 40 * ivf.nlist) if ivf is not None else train_size
+    if len(vectors) > size:
+        rows = np.sort(np.random.default_rng(seed).choice(len(vectors), size, replace=False))
+        vectors = vectors[rows]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+
+
+def index_memory_bytes(index: faiss.Index) -> int:
+    """Size of the serialized index, close to its in-memory footprint."""
+    return int(faiss.serialize_index(index).nbytes)
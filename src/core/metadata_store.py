@@ -0,0 +1,315 @@
+"""
+Columnar, memory-mapped book metadata for vector search results.
+
+Numeric fields are fixed-width arrays; text fields are one UTF-8 blob per
+field plus an offsets array, so row ``i`` is ``blob[offsets[i]:offsets[i + 1]]``.
+Saved as ``.npy`` files and opened with ``mmap_mode='r'``, the columns are
+shared through the page cache by every worker instead of being unpickled
+into a dict per book in each, and a lookup decodes only the fields asked for.
+
+Upserts and removals of a few books go to a small in-memory overlay; larger
+ones, and ``save``, fold everything into new column arrays.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+class ColumnarMetadataStore:
+    """book_id -> metadata lookup over numeric arrays and offset-indexed text blobs."""
+
+    def __init__(self, numeric: Dict[str, np.ndarray], text: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                 key: str = 'book_id', sorted_rows: Optional[np.ndarray] = None):
+        """
+        Args:
+            numeric: Fixed-width column arrays, including the ``key`` column
+            text: Text columns as (offsets with one more entry than rows, UTF-8 bytes)
+            key: Column identifying a book; ids must be unique
+            sorted_rows: Rows in key order, computed when not given
+        """
+        self.key = key
+        self.numeric = numeric
+        self.text = text
+        self.fields = list(numeric) + list(text)
+        ids = numeric[key]
+        self._sorted_rows = np.argsort(ids, kind='stable') if sorted_rows is None else sorted_rows
+        self._sorted_ids = ids[self._sorted_rows]
+        # Base rows superseded or removed since the columns were built
+        self._hidden: set = set()
+        self._overlay: Dict[int, Dict[str, Any]] = {}
+
+    @property
+    def record_fields(self) -> List[str]:
+        """Fields of a full record; names starting with '_' are internal."""
+        return [name for name in self.fields if not name.startswith('_')]
+
+    @staticmethod
+    def encode_text(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Offsets and UTF-8 blob of a sequence of strings."""
+        joined = ''.join(values)
+        if joined.isascii():
+            # One byte per character: lengths need no per-string encoding
+            blob = joined.encode('ascii')
+            lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        else:
+            encoded = [value.encode('utf-8') for value in values]
+            blob = b''.join(encoded)
+            lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return offsets, np.frombuffer(blob, dtype=np.uint8)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, numeric: Dict[str, Tuple[Any, Any]],
+                   text: Sequence[str], key: str = 'book_id') -> 'ColumnarMetadataStore':
+        """
+        Build a store from a DataFrame.
+
+        Args:
+            frame: One row per book
+            numeric: Numeric field -> (dtype, value for missing columns and NaNs)
+            text: Text fields; missing columns and values become ''
+            key: Column identifying a book
+        """
+        numeric_columns = {}
+        for name, (dtype, fill) in numeric.items():
+            if name in frame.columns:
+                values = pd.to_numeric(frame[name], errors='coerce')
+                if fill is not None:
+                    values = values.fillna(fill)
+                numeric_columns[name] = values.to_numpy(dtype=dtype)
+            else:
+                numeric_columns[name] = np.full(len(frame), fill, dtype=dtype)
+
+        text_columns = {}
+        for name in text:
+            if name in frame.columns:
+                values = frame[name].astype(object).where(frame[name].notna(), '').astype(str).tolist()
+            else:
+                values = [''] * len(frame)
+            text_columns[name] = cls.encode_text(values)
+        return cls(numeric_columns, text_columns, key)
+
+    def __len__(self) -> int:
+        return len(self._sorted_ids) - len(self._hidden) + len(self._overlay)
+
+    def __contains__(self, book_id) -> bool:
+        return bool(self.contains([book_id])[0])
+
+    def __getitem__(self, book_id) -> Dict[str, Any]:
+        record = self.get(book_id)
+        if record is None:
+            raise KeyError(book_id)
+        return record
+
+    def _base_rows(self, book_ids: np.ndarray) -> np.ndarray:
+        """Base row of each id, -1 for ids not in the base columns."""
+        if not len(self._sorted_ids):
+            return np.full(len(book_ids), -1, dtype=np.int64)
+        at = np.minimum(np.searchsorted(self._sorted_ids, book_ids), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[at] == book_ids, self._sorted_rows[at], -1)
+
+    def _hidden_mask(self, book_ids: np.ndarray) -> np.ndarray:
+        if not self._hidden:
+            return np.zeros(len(book_ids), dtype=bool)
+        return np.isin(book_ids, np.fromiter(self._hidden, dtype=np.int64, count=len(self._hidden)))
+
+    def rows(self, book_ids: Iterable[int]) -> np.ndarray:
+        """Base row of each live id; -1 for unknown, removed or overlaid ids."""
+        book_ids = np.asarray(list(book_ids), dtype=np.int64)
+        rows = self._base_rows(book_ids)
+        rows[self._hidden_mask(book_ids)] = -1
+        return rows
+
+    def contains(self, book_ids: Iterable[int]) -> np.ndarray:
+        """Whether each id has metadata."""
+        book_ids = np.asarray(list(book_ids), dtype=np.int64)
+        found = self.rows(book_ids) >= 0
+        if self._overlay:
+            found |= np.fromiter((book_id in self._overlay for book_id in book_ids.tolist()),
+                                 dtype=bool, count=len(book_ids))
+        return found
+
+    def ids(self) -> np.ndarray:
+        """Every live book id."""
+        base = self.numeric[self.key]
+        base = base[~self._hidden_mask(base)] if self._hidden else np.asarray(base)
+        overlay = np.fromiter(self._overlay, dtype=np.int64, count=len(self._overlay))
+        return np.concatenate([base.astype(np.int64), overlay])
+
+    def _value(self, name: str, row: int) -> Any:
+        if name in self.text:
+            offsets, blob = self.text[name]
+            return blob[offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+        value = self.numeric[name][row]
+        if isinstance(value, np.floating):
+            if np.isnan(value):
+                return None
+            # Shortest decimal that round-trips the stored float (4.49, not 4.4899997...)
+            return float(str(value))
+        return value.item() if isinstance(value, np.generic) else value
+
+    def get(self, book_id, default: Any = None, fields: Optional[Sequence[str]] = None) -> Any:
+        """Metadata of one book, restricted to ``fields``; ``default`` if unknown."""
+        record = self.get_many([book_id], fields)[0]
+        return default if record is None else record
+
+    def get_many(self, book_ids: Iterable[int],
+                 fields: Optional[Sequence[str]] = None) -> List[Optional[Dict[str, Any]]]:
+        """Metadata of each book in order, restricted to ``fields``; None for unknown ids."""
+        fields = list(fields) if fields is not None else self.record_fields
+        book_ids = np.asarray(list(book_ids), dtype=np.int64)
+        records = []
+        for book_id, row in zip(book_ids.tolist(), self.rows(book_ids).tolist()):
+            if row >= 0:
+                records.append({name: self._value(name, row) for name in fields})
+            elif book_id in self._overlay:
+                overlay = self._overlay[book_id]
+                records.append({name: overlay.get(name) for name in fields})
+            else:
+                records.append(None)
+        return records
+
+    def column(self, name: str, book_ids: Iterable[int], fill: Any = 0) -> np.ndarray:
+        """Numeric field of each book as an array, ``fill`` for unknown ids."""
+        book_ids = np.asarray(list(book_ids), dtype=np.int64)
+        values = np.full(len(book_ids), fill, dtype=self.numeric[name].dtype)
+        rows = self.rows(book_ids)
+        values[rows >= 0] = self.numeric[name][rows[rows >= 0]]
+        for position, book_id in enumerate(book_ids.tolist()):
+            if book_id in self._overlay:
+                values[position] = self._overlay[book_id][name]
+        return values
+
+    def upsert(self, other: 'ColumnarMetadataStore') -> None:
+        """Add or replace the books of ``other``, a store with the same fields."""
+        other_ids = other.ids()
+        hide = other_ids[self._base_rows(other_ids) >= 0]
+        if len(other_ids) > 1024 + len(self) // 100:
+            # Large updates fold straight into new columns
+            self._hidden.update(hide.tolist())
+            for book_id in other_ids.tolist():
+                self._overlay.pop(book_id, None)
+            self._fold(other)
+            return
+        self._hidden.update(hide.tolist())
+        for book_id, record in zip(other_ids.tolist(), other.get_many(other_ids, other.fields)):
+            self._overlay[book_id] = record
+
+    def remove(self, book_ids: Iterable[int]) -> int:
+        """Drop books; returns how many were present."""
+        book_ids = np.asarray(list(book_ids), dtype=np.int64)
+        present = self.contains(book_ids)
+        base = book_ids[self._base_rows(book_ids) >= 0]
+        self._hidden.update(base.tolist())
+        for book_id in book_ids.tolist():
+            self._overlay.pop(book_id, None)
+        return int(present.sum())
+
+    def _take(self, rows: np.ndarray) -> Tuple[Dict[str, np.ndarray], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+        """Columns of the given base rows, as new in-memory arrays."""
+        numeric = {name: np.asarray(values[rows]) for name, values in self.numeric.items()}
+        # Kept rows come in long runs: copy each run's bytes as one slice
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        run_starts = rows[np.concatenate([[0], breaks])] if len(rows) else rows
+        run_stops = rows[np.concatenate([breaks - 1, [len(rows) - 1]])] + 1 if len(rows) else rows
+        text = {}
+        for name, (offsets, blob) in self.text.items():
+            lengths = offsets[rows + 1] - offsets[rows]
+            new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=new_offsets[1:])
+            chunks = [blob[offsets[start]:offsets[stop]] for start, stop in zip(run_starts, run_stops)]
+            text[name] = (new_offsets, np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint8))
+        return numeric, text
+
+    def _fold(self, extra: Optional['ColumnarMetadataStore'] = None) -> None:
+        """Rebuild the base columns from live base rows, the overlay and ``extra``."""
+        base_ids = self.numeric[self.key]
+        parts = [self._take(np.flatnonzero(~self._hidden_mask(base_ids)))]
+        if self._overlay:
+            overlay = pd.DataFrame.from_records(list(self._overlay.values()), columns=self.fields)
+            spec = {name: (values.dtype, None) for name, values in self.numeric.items()}
+            parts.append(self._take_all(ColumnarMetadataStore.from_frame(overlay, spec, list(self.text), self.key)))
+        if extra is not None:
+            parts.append(self._take_all(extra))
+
+        numeric = {name: np.concatenate([part[0][name] for part in parts]) for name in self.numeric}
+        text = {}
+        for name in self.text:
+            offsets = [np.zeros(1, dtype=np.int64)]
+            total = 0
+            for part_offsets, _ in (part[1][name] for part in parts):
+                offsets.append(part_offsets[1:] + total)
+                total += part_offsets[-1]
+            text[name] = (np.concatenate(offsets), np.concatenate([part[1][name][1] for part in parts]))
+
+        self.__init__(numeric, text, self.key)
+
+    @staticmethod
+    def _take_all(store: 'ColumnarMetadataStore'):
+        if store._hidden or store._overlay:
+            store._fold()
+        return store.numeric, store.text
+
+    def save(self, directory: Union[str, Path]) -> None:
+        """Write the folded columns to ``directory``, replacing it atomically."""
+        if self._hidden or self._overlay:
+            self._fold()
+        directory = Path(directory)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f'.{directory.name}-', dir=directory.parent))
+        try:
+            for name, values in self.numeric.items():
+                np.save(staging / f'{name}.npy', np.ascontiguousarray(values))
+            for name, (offsets, blob) in self.text.items():
+                np.save(staging / f'{name}.offsets.npy', np.ascontiguousarray(offsets))
+                np.save(staging / f'{name}.blob.npy', np.ascontiguousarray(blob))
+            np.save(staging / '_sorted_rows.npy', np.ascontiguousarray(self._sorted_rows))
+            with open(staging / MANIFEST_FILE, 'w') as f:
+                json.dump({'format_version': FORMAT_VERSION, 'key': self.key,
+                           'numeric': list(self.numeric), 'text': list(self.text),
+                           'rows': len(self.numeric[self.key])}, f, indent=2)
+
+            # Readers may still have the old files mapped; unlinking keeps their pages valid
+            previous = directory.with_name(f'.{directory.name}.previous')
+            if directory.exists():
+                os.replace(directory, previous)
+            os.replace(staging, directory)
+            shutil.rmtree(previous, ignore_errors=True)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory: Union[str, Path], mmap: bool = True) -> 'ColumnarMetadataStore':
+        """
+        Open a saved store.
+
+        Args:
+            directory: Directory written by ``save``
+            mmap: Map the column files read-only instead of reading them into memory
+        """
+        directory = Path(directory)
+        with open(directory / MANIFEST_FILE, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported metadata store format: {manifest.get('format_version')}")
+        mode = 'r' if mmap else None
+        numeric = {name: np.load(directory / f'{name}.npy', mmap_mode=mode) for name in manifest['numeric']}
+        text = {
+            name: (np.load(directory / f'{name}.offsets.npy', mmap_mode=mode),
+                   np.load(directory / f'{name}.blob.npy', mmap_mode=mode))
+            for name in manifest['text']
+        }
+        return cls(numeric, text, manifest['key'],
+                   sorted_rows=np.load(directory / '_sorted_rows.npy', mmap_mode=mode))
@@ -0,0 +1,280 @@
+"""
+Content-fingerprinted cache of training pipeline stage outputs.
+
+Every stage (processed books, fitted model, vector store, ...) gets a key
+hashed from its name, its parameters, the contents of its input files and
+the keys of the stages it consumes. Outputs are written to
+``<cache_dir>/<stage>-<key>/`` by a stage-specific ``save`` function and
+read back by ``load``, so a restart with unchanged data and settings loads
+each stage instead of recomputing it, and a changed input only invalidates
+the stages downstream of it. Entries are written to a temporary directory
+and renamed into place, so an interrupted run never leaves a half-written
+entry behind.
+"""
+
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from src.core.logging import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+CACHE_FORMAT_VERSION = 1
+MANIFEST_FILE = 'stage.json'
+FILE_HASHES = 'file_hashes.json'
+
+
+@dataclass
+class StageRecord:
+    """Outcome of one stage in a run."""
+    stage: str
+    key: str
+    hit: bool
+    seconds: float
+    saved_seconds: float = 0.0
+
+
+class StageCache:
+    """Runs pipeline stages, reusing stored outputs when their fingerprint matches."""
+
+    def __init__(self, cache_dir: Union[str, Path], force: bool = False, keep: int = 2):
+        """
+        Args:
+            cache_dir: Directory holding one subdirectory per cached stage output
+            force: Recompute every stage and overwrite its entry
+            keep: Entries kept per stage; older fingerprints are removed
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.force = force
+        self.keep = keep
+        self.records: List[StageRecord] = []
+        self._hash_lock = threading.Lock()
+
+    def file_digest(self, path: Union[str, Path]) -> str:
+        """
+        Content hash of a file.
+
+        Digests are memoised by (size, mtime) so unchanged files are hashed
+        once; a file rewritten with identical content keeps its digest.
+        """
+        path = Path(path).resolve()
+        stat = path.stat()
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        with self._hash_lock:
+            memo = self._read_json(self.cache_dir / FILE_HASHES)
+            entry = memo.get(str(path))
+            if entry and entry['stamp'] == stamp:
+                return entry['digest']
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        digest = digest.hexdigest()
+
+        with self._hash_lock:
+            memo = self._read_json(self.cache_dir / FILE_HASHES)
+            memo[str(path)] = {'stamp': stamp, 'digest': digest}
+            self._write_json(self.cache_dir / FILE_HASHES, memo)
+        return digest
+
+    def key(self, stage: str, files: Iterable[Union[str, Path]] = (),
+            params: Optional[Dict[str, Any]] = None, upstream: Iterable[str] = ()) -> str:
+        """
+        Fingerprint of a stage's inputs.
+
+        Args:
+            stage: Stage name
+            files: Input files, fingerprinted by content
+            params: JSON-serialisable parameters that change the output
+            upstream: Keys of the stages whose outputs this stage consumes
+
+        Returns:
+            Hex key identifying the stage output
+        """
+        fingerprint = {
+            'format_version': CACHE_FORMAT_VERSION,
+            'stage': stage,
+            'files': sorted(self.file_digest(path) for path in files),
+            'params': params or {},
+            'upstream': list(upstream),
+        }
+        encoded = json.dumps(fingerprint, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(encoded, digest_size=12).hexdigest()
+
+    def entry_path(self, stage: str, key: str) -> Path:
+        return self.cache_dir / f'{stage}-{key}'
+
+    def has(self, stage: str, key: str) -> bool:
+        return (self.entry_path(stage, key) / MANIFEST_FILE).exists()
+
+    async def run_async(self, stage: str, key: str, compute: Callable[[], Any],
+                        save: Callable[[Any, Path], Any], load: Callable[[Path], Any]) -> Any:
+        """
+        Load a stage output from the cache, or compute and store it.
+
+        ``compute``, ``save`` and ``load`` may be plain callables, which run
+        on a worker thread, or async ones. A stored entry that fails to load
+        is recomputed.
+
+        Args:
+            stage: Stage name
+            key: Fingerprint from ``key``
+            compute: Produces the stage output
+            save: Writes an output into a directory
+            load: Reads an output back from a directory
+
+        Returns:
+            The stage output
+        """
+        entry = self.entry_path(stage, key)
+        start = time.perf_counter()
+        if not self.force and self.has(stage, key):
+            try:
+                value = await self._call(load, entry)
+                seconds = time.perf_counter() - start
+                compute_seconds = self._read_json(entry / MANIFEST_FILE).get('compute_seconds', 0.0)
+                self._record(StageRecord(stage, key, True, seconds,
+                                         max(0.0, compute_seconds - seconds)))
+                return value
+            except Exception as e:
+                logger.warning("Cached stage output unreadable, recomputing",
+                               stage=stage, key=key, error=str(e))
+                start = time.perf_counter()
+
+        value = await self._call(compute)
+        compute_seconds = time.perf_counter() - start
+        try:
+            await self._store(stage, key, value, save, compute_seconds)
+        except Exception as e:
+            # A failed write only costs the next run a recompute
+            logger.warning("Could not cache stage output", stage=stage, key=key, error=str(e))
+        self._record(StageRecord(stage, key, False, time.perf_counter() - start))
+        return value
+
+    def run(self, stage: str, key: str, compute: Callable[[], Any],
+            save: Callable[[Any, Path], Any], load: Callable[[Path], Any]) -> Any:
+        """Synchronous wrapper for run_async."""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.run_async(stage, key, compute, save, load))
+        finally:
+            loop.close()
+
+    async def _store(self, stage: str, key: str, value: Any, save: Callable,
+                     compute_seconds: float) -> None:
+        entry = self.entry_path(stage, key)
+        staging = Path(tempfile.mkdtemp(prefix=f'.{stage}-', dir=self.cache_dir))
+        try:
+            await self._call(save, value, staging)
+            self._write_json(staging / MANIFEST_FILE, {
+                'stage': stage,
+                'key': key,
+                'compute_seconds': compute_seconds,
+                'created': time.time(),
+            })
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(staging, entry)
+        finally:
+            if staging.exists():
+                shutil.rmtree(staging, ignore_errors=True)
+        self._prune(stage, keep_key=key)
+
+    def _prune(self, stage: str, keep_key: str) -> None:
+        """Remove the oldest entries of a stage beyond ``keep``."""
+        entries = sorted(
+            (path for path in self.cache_dir.glob(f'{stage}-*')
+             if (path / MANIFEST_FILE).exists() and path.name != f'{stage}-{keep_key}'),
+            key=lambda path: path.stat().st_mtime, reverse=True
+        )
+        for path in entries[max(0, self.keep - 1):]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _record(self, record: StageRecord) -> None:
+        self.records.append(record)
+        logger.info("Pipeline stage " + ("cache hit" if record.hit else "computed"),
+                    stage=record.stage, key=record.key, seconds=round(record.seconds, 3),
+                    saved_seconds=round(record.saved_seconds, 3))
+
+    def hit(self, stage: str) -> bool:
+        """Whether the latest run of ``stage`` was served from the cache."""
+        for record in reversed(self.records):
+            if record.stage == stage:
+                return record.hit
+        return False
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-stage hit/miss, time taken and time saved by the cache in this run."""
+        return [asdict(record) for record in self.records]
+
+    def format_report(self) -> str:
+        """Human-readable table of ``report``."""
+        lines = [f"{'stage':<20} {'result':<8} {'seconds':>9} {'saved':>9}"]
+        for record in self.records:
+            lines.append(f"{record.stage:<20} {'hit' if record.hit else 'miss':<8} "
+                         f"{record.seconds:>9.2f} {record.saved_seconds:>9.2f}")
+        total_saved = sum(record.saved_seconds for record in self.records)
+        lines.append(f"{'total saved':<29} {'':>9} {total_saved:>9.2f}")
+        return '\n'.join(lines)
+
+    @staticmethod
+    async def _call(function: Callable, *args) -> Any:
+        if inspect.iscoroutinefunction(function):
+            return await function(*args)
+        # Plain callables run on a worker thread: stages such as model fits
+        # block for minutes and drive their own event loops
+        result = await asyncio.to_thread(function, *args)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    @staticmethod
+    def _read_json(path: Path) -> Dict[str, Any]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]) -> None:
+        staging = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(staging, 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(staging, path)
+
+
+def save_frame(frame: pd.DataFrame, directory: Path) -> None:
+    """Stage ``save`` for DataFrames."""
+    frame.to_pickle(directory / 'frame.pkl')
+
+
+def load_frame(directory: Path) -> pd.DataFrame:
+    """Stage ``load`` for DataFrames."""
+    return pd.read_pickle(directory / 'frame.pkl')
+
+
+def save_json(value: Any, directory: Path) -> None:
+    """Stage ``save`` for JSON-serialisable values such as metrics."""
+    with open(directory / 'value.json', 'w') as f:
+        json.dump(value, f, indent=2, default=str)
+
+
+def load_json(directory: Path) -> Any:
+    """Stage ``load`` for JSON-serialisable values."""
+    with open(directory / 'value.json', 'r') as f:
+        return json.load(f)
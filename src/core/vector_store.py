@@ -4,10 +4,13 @@ Provides semantic search over book content for explanations and recommendations.
 """
 
 import asyncio
+import hashlib
 import pickle
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any, Union
+from typing import Dict, List, Optional, Sequence, Tuple, Any, Union
 from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
@@ -18,9 +21,39 @@ import torch
 
 from src.core.logging import StructuredLogger
 from src.core.exceptions import GoodBooksException
+from src.core.faiss_index import INDEX_TYPES, IndexSpec, create_index, ivf_of, set_nprobe, train_index
+from src.core.metadata_store import ColumnarMetadataStore
 
 logger = StructuredLogger(__name__)
 
+METADATA_FORMAT_VERSION = 3  # Book metadata in a columnar store next to metadata.pkl
+METADATA_DIR = "book_metadata"
+
+# Columnar metadata schema: numeric field -> (dtype, fill for missing values)
+METADATA_NUMERIC_FIELDS = {
+    'book_id': (np.int64, None),
+    'average_rating': (np.float32, 0.0),
+    'publication_year': (np.float32, np.nan),
+    '_text_digest': (np.uint64, 0),  # Digest of the embedded text
+}
+METADATA_TEXT_FIELDS = ('title', 'authors', 'description', 'all_tags', 'genres')
+
+# Metadata fields in search results unless the caller asks for others
+DEFAULT_RESULT_FIELDS = ('average_rating', 'genres', 'publication_year')
+
+# Optional fields of the embedded book text: (column, label, max characters)
+BOOK_TEXT_FIELDS = (
+    ('description', 'Description', 500),
+    ('all_tags', 'Tags', None),
+    ('genres', 'Genres', None),
+    ('average_rating', 'Rating', None),
+)
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    """Values as Python strings, formatted as in an f-string (missing -> 'nan')."""
+    return values.astype(object).map(str)
+
 class VectorStoreError(GoodBooksException):
     """Raised when vector store operations fail"""
     pass
@@ -36,7 +69,10 @@ class BookVectorStore:
         model_name: str = "all-MiniLM-L6-v2",
         dimension: int = 384,
         index_type: str = "flat",
-        store_path: Optional[str] = None
+        store_path: Optional[str] = None,
+        query_cache_size: int = 4096,
+        compaction_threshold: float = 0.2,
+        nprobe: int = 32
     ):
         """
         Initialize the vector store.
@@ -44,23 +80,42 @@ class BookVectorStore:
         Args:
             model_name: SentenceTransformer model name for embeddings
             dimension: Embedding dimension
-            index_type: FAISS index type ('flat', 'ivf', 'hnsw')
+            index_type: FAISS index type: 'flat', 'ivf', 'hnsw', or the quantized
+                'sq8', 'ivf_sq8', 'ivf_pq' and 'opq' (see src.core.faiss_index)
             store_path: Path to save/load the vector store
+            query_cache_size: Normalized query embeddings kept in the LRU cache (0 disables it)
+            compaction_threshold: Share of vectors upserted or removed since the last
+                build after which HNSW/IVF indexes are compacted
+            nprobe: IVF lists scanned per query (IVF index types)
         """
         self.model_name = model_name
         self.dimension = dimension
         self.index_type = index_type
+        self.nprobe = nprobe
         self.store_path = Path(store_path) if store_path else Path("models/vector_store")
         self.store_path.mkdir(parents=True, exist_ok=True)
         
         # Initialize components
         self.encoder = None
-        self.index = None
-        self.book_metadata: Dict[int, Dict[str, Any]] = {}
-        self.id_to_book_id: Dict[int, int] = {}
-        self.book_id_to_id: Dict[int, int] = {}
+        self.index = None  # Vectors keyed by book_id
+        self.book_metadata = self._metadata_store(pd.DataFrame({'book_id': []}), [])  # book_id -> metadata
         self._executor = ThreadPoolExecutor(max_workers=4)
         
+        # HNSW cannot remove vectors: replaced or removed ones stay in the graph
+        # as stale positions that searches skip until the next compaction
+        self.compaction_threshold = compaction_threshold
+        self._mutations = 0
+        self._stale_positions = np.empty(0, dtype=np.int64)
+        self._stale_search: Optional[Tuple[Any, ...]] = None
+        self._index_lock = threading.RLock()
+        
+        # LRU cache of normalized query embeddings, keyed by normalized query text
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._query_cache_hits = 0
+        self._query_cache_misses = 0
+        
         # Initialize encoder
         self._init_encoder()
         
@@ -79,21 +134,25 @@ class BookVectorStore:
             logger.error("Failed to initialize sentence transformer", error=str(e))
             raise VectorStoreError(f"Failed to initialize encoder: {str(e)}") from e
     
-    def _create_index(self, num_vectors: int) -> faiss.Index:
-        """Create FAISS index based on configuration."""
+    def _index_spec(self) -> IndexSpec:
+        """Build parameters of the configured index type."""
+        return IndexSpec.for_index_type(self.index_type, nprobe=self.nprobe)
+    
+    def _create_index(self, num_vectors: int, spec: Optional[IndexSpec] = None) -> faiss.Index:
+        """
+        Create FAISS index based on configuration.
+        
+        Vectors are keyed by book_id: flat, SQ8 and HNSW indexes through an
+        IndexIDMap2, IVF indexes natively with a hashtable direct map so
+        single vectors can be reconstructed and removed.
+        """
         try:
-            if self.index_type == "flat":
-                index = faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
-            elif self.index_type == "ivf":
-                quantizer = faiss.IndexFlatIP(self.dimension)
-                nlist = min(100, max(1, num_vectors // 100))  # Adaptive nlist
-                index = faiss.IndexIVFFlat(quantizer, self.dimension, nlist)
-            elif self.index_type == "hnsw":
-                index = faiss.IndexHNSWFlat(self.dimension, 32)
-                index.hnsw.efConstruction = 200
-                index.hnsw.efSearch = 128
+            index = create_index(spec or self._index_spec(), self.dimension, num_vectors)
+            ivf = ivf_of(index)
+            if ivf is not None:
+                ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
             else:
-                raise VectorStoreError(f"Unsupported index type: {self.index_type}")
+                index = faiss.IndexIDMap2(index)
             
             logger.info(
                 "FAISS index created",
@@ -107,6 +166,49 @@ class BookVectorStore:
             logger.error("Failed to create FAISS index", error=str(e))
             raise VectorStoreError(f"Failed to create index: {str(e)}") from e
     
+    def _index_vectors(self, embeddings: np.ndarray, book_ids: np.ndarray) -> faiss.Index:
+        """Build a new index over normalized embeddings keyed by book_id."""
+        spec = self._index_spec()
+        index = self._create_index(len(embeddings), spec)
+        train_index(index, embeddings, train_size=spec.train_size)
+        index.add_with_ids(embeddings, book_ids.astype(np.int64))
+        return index
+    
+    def _set_stale_positions(self, positions: np.ndarray) -> None:
+        """Record stale HNSW positions and the search parameters that skip them."""
+        self._stale_positions = np.unique(positions).astype(np.int64)
+        self._stale_search = None
+        if len(self._stale_positions):
+            hnsw = faiss.downcast_index(self.index.index)
+            stale = faiss.IDSelectorBatch(self._stale_positions)
+            params = faiss.SearchParametersHNSW()
+            params.efSearch = hnsw.hnsw.efSearch
+            params.sel = faiss.IDSelectorNot(stale)
+            # The selectors must outlive the parameters that point at them
+            self._stale_search = (hnsw, faiss.vector_to_array(self.index.id_map), params, stale)
+    
+    def _search_index(self, embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Search normalized embeddings; returns scores and book_ids (-1 for empty slots)."""
+        with self._index_lock:
+            if self._stale_search is None:
+                return self.index.search(embeddings, k)
+            hnsw, id_map, params, _ = self._stale_search
+            scores, positions = hnsw.search(embeddings, k, params=params)
+            return scores, np.where(positions >= 0, id_map[np.maximum(positions, 0)], -1)
+    
+    @staticmethod
+    def _validate_books(books_df: pd.DataFrame) -> pd.DataFrame:
+        """Check required columns; the first row of a repeated book_id wins."""
+        required_columns = ['book_id', 'title', 'authors']
+        missing_columns = set(required_columns) - set(books_df.columns)
+        if missing_columns:
+            raise VectorStoreError(f"Missing required columns: {missing_columns}")
+        return books_df.drop_duplicates(subset='book_id')
+    
+    @staticmethod
+    def _text_digest(text: str) -> int:
+        return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+    
     async def build_from_books_async(self, books_df: pd.DataFrame) -> None:
         """
         Build vector store from books DataFrame asynchronously.
@@ -121,10 +223,7 @@ class BookVectorStore:
             logger.info("Starting vector store build", num_books=len(books_df))
             
             # Validate input
-            required_columns = ['book_id', 'title', 'authors']
-            missing_columns = set(required_columns) - set(books_df.columns)
-            if missing_columns:
-                raise VectorStoreError(f"Missing required columns: {missing_columns}")
+            books_df = self._validate_books(books_df)
             
             if books_df.empty:
                 raise VectorStoreError("Books DataFrame cannot be empty")
@@ -135,25 +234,20 @@ class BookVectorStore:
             # Generate embeddings
             embeddings = await self._generate_embeddings_async(texts)
             
-            # Create and populate index
-            self.index = self._create_index(len(embeddings))
-            
             # Normalize embeddings for cosine similarity
             faiss.normalize_L2(embeddings)
             
-            # Add to index
-            if self.index_type == "ivf":
-                # Train IVF index
-                await asyncio.get_event_loop().run_in_executor(
-                    self._executor, self.index.train, embeddings
-                )
-            
-            await asyncio.get_event_loop().run_in_executor(
-                self._executor, self.index.add, embeddings
+            # Create, train and populate the index keyed by book_id
+            book_ids = books_df['book_id'].to_numpy(dtype=np.int64)
+            index = await asyncio.get_event_loop().run_in_executor(
+                self._executor, self._index_vectors, embeddings, book_ids
             )
             
-            # Store metadata mappings
-            self._build_metadata_mappings(books_df)
+            with self._index_lock:
+                self.index = index
+                self._mutations = 0
+                self._set_stale_positions(np.empty(0, dtype=np.int64))
+                self._build_metadata_mappings(books_df, texts)
             
             # Save to disk
             await self.save_async()
@@ -168,36 +262,181 @@ class BookVectorStore:
             logger.error("Vector store build failed", error=str(e), exc_info=True)
             raise VectorStoreError(f"Failed to build vector store: {str(e)}") from e
     
-    async def _prepare_book_texts_async(self, books_df: pd.DataFrame) -> List[str]:
-        """Prepare text content from books for embedding generation."""
-        texts = []
+    def _remove_vectors(self, book_ids: np.ndarray) -> int:
+        """Drop the vectors of indexed books; caller holds the index lock."""
+        book_ids = book_ids[self.book_metadata.contains(book_ids)]
+        if not len(book_ids):
+            return 0
+        if self.index_type == "hnsw":
+            positions = np.flatnonzero(np.isin(faiss.vector_to_array(self.index.id_map), book_ids))
+            self._set_stale_positions(np.concatenate([self._stale_positions, positions]))
+        elif ivf_of(self.index) is not None:
+            # The IVF hashtable direct map only removes through an IDSelectorArray
+            self.index.remove_ids(faiss.IDSelectorArray(len(book_ids), faiss.swig_ptr(book_ids)))
+        else:
+            self.index.remove_ids(faiss.IDSelectorBatch(book_ids))
+        self._mutations += len(book_ids)
+        return len(book_ids)
+    
+    def _replace_vectors(self, book_ids: np.ndarray, embeddings: np.ndarray) -> None:
+        """Swap in new vectors for books, adding the ones not indexed yet."""
+        with self._index_lock:
+            replaced = self._remove_vectors(book_ids)
+            self.index.add_with_ids(embeddings, book_ids)
+            self._mutations += len(book_ids) - replaced
+            if len(self._stale_positions):
+                # Refresh the position -> book_id map used by stale-aware searches
+                self._set_stale_positions(self._stale_positions)
+    
+    async def upsert_books_async(self, books_df: pd.DataFrame, force: bool = False) -> Dict[str, int]:
+        """
+        Add or update books without rebuilding the index.
+        
+        Only books whose embedding text changed (or that are new) are
+        re-encoded; metadata is refreshed for every given book. Call
+        ``save_async`` to persist the result.
         
-        for _, book in books_df.iterrows():
-            # Combine multiple text fields
-            text_parts = []
+        Args:
+            books_df: Books to add or update, same columns as for building
+            force: Re-encode every given book even if its text is unchanged
             
-            # Title and authors are required
-            text_parts.append(f"Title: {book['title']}")
-            text_parts.append(f"Authors: {book['authors']}")
+        Returns:
+            Counts of re-embedded and unchanged books, and whether the index was compacted
             
-            # Add optional fields if available
-            if 'description' in book and pd.notna(book['description']):
-                text_parts.append(f"Description: {book['description'][:500]}")  # Truncate
+        Raises:
+            VectorStoreError: If the store is not built or the update fails
+        """
+        try:
+            if self.index is None:
+                raise VectorStoreError("Vector store not initialized. Call build_from_books_async first.")
             
-            if 'all_tags' in book and pd.notna(book['all_tags']):
-                text_parts.append(f"Tags: {book['all_tags']}")
+            books_df = self._validate_books(books_df)
+            texts = await self._prepare_book_texts_async(books_df)
+            updates = self._metadata_store(books_df, texts)
+            book_ids = books_df['book_id'].to_numpy(dtype=np.int64)
+            digests = updates.numeric['_text_digest']
+            with self._index_lock:
+                indexed = self.book_metadata.contains(book_ids)
+                stored = self.book_metadata.column('_text_digest', book_ids)
+            changed = force | ~indexed | (stored != digests)
+            
+            if changed.any():
+                embeddings = await self._generate_embeddings_async(
+                    [texts[row] for row in np.flatnonzero(changed)]
+                )
+                faiss.normalize_L2(embeddings)
+                await asyncio.get_event_loop().run_in_executor(
+                    self._executor, self._replace_vectors, book_ids[changed], embeddings
+                )
             
-            if 'genres' in book and pd.notna(book['genres']):
-                text_parts.append(f"Genres: {book['genres']}")
+            with self._index_lock:
+                self.book_metadata.upsert(updates)
             
-            if 'average_rating' in book and pd.notna(book['average_rating']):
-                text_parts.append(f"Rating: {book['average_rating']}")
+            stats = {
+                'embedded': int(changed.sum()),
+                'unchanged': int((~changed).sum()),
+                'compacted': await self._maybe_compact_async()
+            }
+            logger.info("Books upserted into vector store", **stats)
+            return stats
+            
+        except Exception as e:
+            logger.error("Vector store upsert failed", error=str(e))
+            raise VectorStoreError(f"Failed to upsert books: {str(e)}") from e
+    
+    async def remove_books_async(self, book_ids: List[int]) -> int:
+        """
+        Remove books from the index and metadata.
+        
+        Args:
+            book_ids: Books to remove; unknown ids are ignored
             
-            # Combine all text parts
-            combined_text = " | ".join(text_parts)
-            texts.append(combined_text)
+        Returns:
+            Number of books removed
+        """
+        if self.index is None:
+            return 0
+        book_ids = np.unique(np.asarray(book_ids, dtype=np.int64))
+        
+        def remove() -> int:
+            with self._index_lock:
+                removed = self._remove_vectors(book_ids)
+                self.book_metadata.remove(book_ids)
+                return removed
         
-        return texts
+        removed = await asyncio.get_event_loop().run_in_executor(self._executor, remove)
+        await self._maybe_compact_async()
+        logger.info("Books removed from vector store", num_removed=removed)
+        return removed
+    
+    async def sync_books_async(self, books_df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Make the store match a books DataFrame: upsert its rows, remove books not in it.
+        
+        Returns:
+            Counts of re-embedded, unchanged and removed books
+        """
+        stats = await self.upsert_books_async(books_df)
+        indexed = self.book_metadata.ids()
+        stats['removed'] = await self.remove_books_async(
+            indexed[~np.isin(indexed, books_df['book_id'].to_numpy(dtype=np.int64))]
+        )
+        return stats
+    
+    def _compact(self) -> None:
+        """Rebuild the index from its live vectors, dropping stale HNSW entries and retraining IVF."""
+        if INDEX_TYPES[self.index_type][1] != 'flat':
+            # Reconstructed vectors are already quantized; retraining on them compounds the error
+            logger.warning("Quantized indexes are not compacted, rebuild from books to retrain",
+                           index_type=self.index_type)
+            return
+        with self._index_lock:
+            book_ids = self.book_metadata.ids()
+            if not len(book_ids):
+                return
+            embeddings = self.index.reconstruct_batch(book_ids)
+            mutations = self._mutations
+        
+        index = self._index_vectors(embeddings, book_ids)
+        
+        with self._index_lock:
+            if self._mutations != mutations:
+                # Updated while rebuilding; the next mutation retries
+                return
+            self.index = index
+            self._mutations = 0
+            self._set_stale_positions(np.empty(0, dtype=np.int64))
+        logger.info("Vector store compacted", num_vectors=len(book_ids), index_type=self.index_type)
+    
+    async def compact_async(self) -> None:
+        """Compact the index now (see ``compaction_threshold`` for the automatic trigger)."""
+        if self.index is not None:
+            await asyncio.get_event_loop().run_in_executor(self._executor, self._compact)
+    
+    async def _maybe_compact_async(self) -> bool:
+        """Compact HNSW/IVF indexes once enough vectors changed since the last build."""
+        if self.index_type not in ("hnsw", "ivf"):
+            return False
+        if self._mutations <= self.compaction_threshold * max(len(self.book_metadata), 1):
+            return False
+        await self.compact_async()
+        return True
+    
+    async def _prepare_book_texts_async(self, books_df: pd.DataFrame) -> List[str]:
+        """Prepare text content from books for embedding generation."""
+        # Built column-wise; title and authors are required
+        texts = "Title: " + _as_text(books_df['title']) + " | Authors: " + _as_text(books_df['authors'])
+        
+        # Add optional fields to the books that have them
+        for column, label, max_length in BOOK_TEXT_FIELDS:
+            if column not in books_df.columns:
+                continue
+            values = _as_text(books_df[column])
+            if max_length is not None:
+                values = values.str[:max_length]
+            texts = texts + (f" | {label}: " + values).where(books_df[column].notna(), "")
+        
+        return texts.tolist()
     
     async def _generate_embeddings_async(self, texts: List[str]) -> np.ndarray:
         """Generate embeddings for texts asynchronously."""
@@ -241,47 +480,110 @@ class BookVectorStore:
         
         return np.vstack(all_embeddings).astype(np.float32)
     
-    def _build_metadata_mappings(self, books_df: pd.DataFrame) -> None:
+    def _build_metadata_mappings(self, books_df: pd.DataFrame, texts: List[str]) -> None:
         """Build metadata mappings for book lookups."""
-        self.book_metadata = {}
-        self.id_to_book_id = {}
-        self.book_id_to_id = {}
+        self.book_metadata = self._metadata_store(books_df, texts)
+    
+    def _metadata_store(self, books_df: pd.DataFrame, texts: List[str]) -> ColumnarMetadataStore:
+        """Columnar metadata of each book, with the digest of its embedded text."""
+        books_df = books_df.assign(
+            _text_digest=np.fromiter(map(self._text_digest, texts), dtype=np.uint64, count=len(texts))
+        )
+        return ColumnarMetadataStore.from_frame(books_df, METADATA_NUMERIC_FIELDS, METADATA_TEXT_FIELDS)
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Cache key of a query: whitespace collapsed, case kept for cased encoders."""
+        return " ".join(query.split())
+    
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        L2-normalized embeddings of queries, one row per query.
         
-        for idx, (_, book) in enumerate(books_df.iterrows()):
-            book_id = int(book['book_id'])
-            
-            # Store metadata
-            self.book_metadata[idx] = {
-                'book_id': book_id,
-                'title': book['title'],
-                'authors': book['authors'],
-                'average_rating': book.get('average_rating', 0),
-                'description': book.get('description', ''),
-                'all_tags': book.get('all_tags', ''),
-                'genres': book.get('genres', ''),
-                'publication_year': book.get('publication_year', None)
-            }
-            
-            # Store ID mappings
-            self.id_to_book_id[idx] = book_id
-            self.book_id_to_id[book_id] = idx
+        Cached queries skip the encoder; the rest are encoded together in one
+        forward pass and added to the cache. The encoder sees the query text
+        as given; the normalized form is only the cache key.
+        """
+        keys = [self._normalize_query(query) for query in queries]
+        texts = dict(zip(reversed(keys), reversed(queries)))  # First spelling of each key
+        cached: Dict[str, np.ndarray] = {}
+        with self._query_cache_lock:
+            for key in keys:
+                embedding = self._query_cache.get(key)
+                if embedding is not None:
+                    self._query_cache.move_to_end(key)
+                    cached[key] = embedding
+        
+        misses = list(dict.fromkeys(key for key in keys if key not in cached))
+        if misses:
+            encoded = np.asarray(
+                self.encoder.encode([texts[key] for key in misses], batch_size=64,
+                                    normalize_embeddings=False, show_progress_bar=False),
+                dtype=np.float32
+            )
+            faiss.normalize_L2(encoded)
+            cached.update(zip(misses, encoded))
+        
+        with self._query_cache_lock:
+            self._query_cache_hits += len(keys) - len(misses)
+            self._query_cache_misses += len(misses)
+            if self.query_cache_size > 0:
+                for key in misses:
+                    self._query_cache[key] = cached[key]
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        
+        return np.vstack([cached[key] for key in keys])
     
-    async def semantic_search_async(
-        self, 
-        query: str, 
+    def _search_queries(self, queries: List[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode queries and search them as one (n, d) matrix."""
+        return self._search_index(self._encode_queries(queries), k)
+    
+    def _result_rows(self, scores: np.ndarray, indices: np.ndarray, score_threshold: float = -np.inf,
+                     exclude: Optional[int] = None,
+                     fields: Sequence[str] = DEFAULT_RESULT_FIELDS) -> List[Dict[str, Any]]:
+        """Search hits of one query, with only the requested metadata fields decoded."""
+        # FAISS returns -1 for empty slots
+        keep = (indices != -1) & (scores >= score_threshold)
+        if exclude is not None:
+            keep &= indices != exclude
+        
+        fields = list(fields)
+        records = self.book_metadata.get_many(indices[keep], ['book_id', 'title', 'authors'] + fields)
+        results = []
+        for score, record in zip(scores[keep], records):
+            if record is None:  # Removed while the search ran
+                continue
+            results.append({
+                'book_id': record['book_id'],
+                'title': record['title'],
+                'authors': record['authors'],
+                'similarity_score': float(score),
+                'metadata': {name: record[name] for name in fields}
+            })
+        return results
+    
+    async def semantic_search_batch_async(
+        self,
+        queries: List[str],
         k: int = 5,
-        score_threshold: float = 0.0
-    ) -> List[Dict[str, Any]]:
+        score_threshold: float = 0.0,
+        fields: Sequence[str] = DEFAULT_RESULT_FIELDS
+    ) -> List[List[Dict[str, Any]]]:
         """
-        Perform semantic search over book vectors.
+        Perform semantic search for many queries at once.
+        
+        Uncached queries are encoded in one forward pass and all queries are
+        searched with a single FAISS call, in one trip through the thread pool.
         
         Args:
-            query: Search query string
-            k: Number of results to return
+            queries: Search query strings
+            k: Number of results to return per query
             score_threshold: Minimum similarity score threshold
+            fields: Metadata fields to include in each result's 'metadata'
             
         Returns:
-            List of search results with metadata and scores
+            Search results for each query, in query order
             
         Raises:
             VectorStoreError: If search fails
@@ -289,56 +591,78 @@ class BookVectorStore:
         try:
             if self.index is None:
                 raise VectorStoreError("Vector store not initialized. Call build_from_books_async first.")
+            if not queries:
+                return []
             
-            logger.info("Performing semantic search", query=query[:100], k=k)
-            
-            # Generate query embedding
-            loop = asyncio.get_event_loop()
-            query_embedding = await loop.run_in_executor(
-                self._executor,
-                lambda: self.encoder.encode([query], normalize_embeddings=False)
-            )
-            
-            # Normalize for cosine similarity
-            faiss.normalize_L2(query_embedding)
+            logger.info("Performing semantic search", num_queries=len(queries),
+                        query=queries[0][:100], k=k)
             
-            # Search
-            scores, indices = await loop.run_in_executor(
+            scores, indices = await asyncio.get_event_loop().run_in_executor(
                 self._executor,
-                self.index.search,
-                query_embedding,
+                self._search_queries,
+                list(queries),
                 k
             )
             
-            # Process results
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1:  # FAISS returns -1 for empty slots
-                    continue
-                
-                if score < score_threshold:
-                    continue
-                
-                metadata = self.book_metadata.get(idx, {})
-                results.append({
-                    'book_id': metadata.get('book_id'),
-                    'title': metadata.get('title'),
-                    'authors': metadata.get('authors'),
-                    'similarity_score': float(score),
-                    'metadata': metadata
-                })
-            
-            logger.info("Semantic search completed", num_results=len(results))
+            results = [
+                self._result_rows(query_scores, query_indices, score_threshold, fields=fields)
+                for query_scores, query_indices in zip(scores, indices)
+            ]
+            
+            logger.info("Semantic search completed", num_queries=len(queries),
+                        num_results=sum(len(rows) for rows in results))
             return results
             
         except Exception as e:
-            logger.error("Semantic search failed", query=query[:100], error=str(e))
+            logger.error("Semantic search failed", num_queries=len(queries), error=str(e))
             raise VectorStoreError(f"Search failed: {str(e)}") from e
     
+    def semantic_search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        score_threshold: float = 0.0,
+        fields: Sequence[str] = DEFAULT_RESULT_FIELDS
+    ) -> List[List[Dict[str, Any]]]:
+        """Synchronous wrapper for semantic_search_batch_async."""
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(
+                self.semantic_search_batch_async(queries, k, score_threshold, fields)
+            )
+        finally:
+            loop.close()
+    
+    async def semantic_search_async(
+        self, 
+        query: str, 
+        k: int = 5,
+        score_threshold: float = 0.0,
+        fields: Sequence[str] = DEFAULT_RESULT_FIELDS
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform semantic search over book vectors.
+        
+        Args:
+            query: Search query string
+            k: Number of results to return
+            score_threshold: Minimum similarity score threshold
+            fields: Metadata fields to include in each result's 'metadata'
+            
+        Returns:
+            List of search results with metadata and scores
+            
+        Raises:
+            VectorStoreError: If search fails
+        """
+        results = await self.semantic_search_batch_async([query], k, score_threshold, fields)
+        return results[0]
+    
     async def get_similar_books_async(
         self, 
         book_id: int, 
-        k: int = 5
+        k: int = 5,
+        fields: Sequence[str] = DEFAULT_RESULT_FIELDS
     ) -> List[Dict[str, Any]]:
         """
         Get books similar to a given book ID.
@@ -346,46 +670,28 @@ class BookVectorStore:
         Args:
             book_id: ID of the book to find similarities for
             k: Number of similar books to return
+            fields: Metadata fields to include in each result's 'metadata'
             
         Returns:
             List of similar books with metadata and scores
         """
         try:
-            if book_id not in self.book_id_to_id:
+            if book_id not in self.book_metadata:
                 logger.warning("Book not found in vector store", book_id=book_id)
                 return []
             
-            vector_id = self.book_id_to_id[book_id]
+            def search_similar() -> Tuple[np.ndarray, np.ndarray]:
+                with self._index_lock:
+                    book_vector = self.index.reconstruct(int(book_id)).reshape(1, -1)
+                # Search for similar vectors (k+1 to exclude the book itself)
+                return self._search_index(book_vector, k + 1)
             
-            # Get the book's vector
-            book_vector = await asyncio.get_event_loop().run_in_executor(
-                self._executor,
-                lambda: self.index.reconstruct(vector_id).reshape(1, -1)
-            )
-            
-            # Search for similar vectors (k+1 to exclude the book itself)
             scores, indices = await asyncio.get_event_loop().run_in_executor(
-                self._executor,
-                self.index.search,
-                book_vector,
-                k + 1
+                self._executor, search_similar
             )
             
             # Process results, excluding the input book
-            results = []
-            for score, idx in zip(scores[0], indices[0]):
-                if idx == -1 or idx == vector_id:  # Skip invalid indices and self
-                    continue
-                
-                metadata = self.book_metadata.get(idx, {})
-                results.append({
-                    'book_id': metadata.get('book_id'),
-                    'title': metadata.get('title'),
-                    'authors': metadata.get('authors'),
-                    'similarity_score': float(score),
-                    'metadata': metadata
-                })
-            
+            results = self._result_rows(scores[0], indices[0], exclude=book_id, fields=fields)
             return results[:k]  # Return exactly k results
             
         except Exception as e:
@@ -399,19 +705,23 @@ class BookVectorStore:
             
             # Save FAISS index
             index_path = self.store_path / "faiss.index"
-            await asyncio.get_event_loop().run_in_executor(
-                self._executor,
-                faiss.write_index,
-                self.index,
-                str(index_path)
-            )
+            metadata_dir = self.store_path / METADATA_DIR
+            
+            def write_index() -> None:
+                with self._index_lock:
+                    faiss.write_index(self.index, str(index_path))
+                    # Fold pending metadata updates into new columns, then serve them memory-mapped
+                    self.book_metadata.save(metadata_dir)
+                    self.book_metadata = ColumnarMetadataStore.load(metadata_dir)
             
-            # Save metadata
+            await asyncio.get_event_loop().run_in_executor(self._executor, write_index)
+            
+            # Save the remaining state
             metadata_path = self.store_path / "metadata.pkl"
             metadata = {
-                'book_metadata': self.book_metadata,
-                'id_to_book_id': self.id_to_book_id,
-                'book_id_to_id': self.book_id_to_id,
+                'format_version': METADATA_FORMAT_VERSION,
+                'stale_positions': self._stale_positions,
+                'mutations': self._mutations,
                 'model_name': self.model_name,
                 'dimension': self.dimension,
                 'index_type': self.index_type
@@ -436,6 +746,7 @@ class BookVectorStore:
         try:
             index_path = self.store_path / "faiss.index"
             metadata_path = self.store_path / "metadata.pkl"
+            metadata_dir = self.store_path / METADATA_DIR
             
             if not (index_path.exists() and metadata_path.exists()):
                 logger.info("Vector store files not found", path=str(self.store_path))
@@ -443,20 +754,35 @@ class BookVectorStore:
             
             logger.info("Loading vector store", path=str(self.store_path))
             
+            # Load metadata
+            with open(metadata_path, 'rb') as f:
+                metadata = pickle.load(f)
+            
+            if metadata.get('format_version', 1) != METADATA_FORMAT_VERSION:
+                # Older stores pickle per-book metadata dicts (and, before v2, index
+                # vectors by DataFrame position instead of book_id)
+                logger.warning("Vector store format outdated, rebuild required",
+                               path=str(self.store_path))
+                return False
+            
             # Load FAISS index
-            self.index = await asyncio.get_event_loop().run_in_executor(
+            index = await asyncio.get_event_loop().run_in_executor(
                 self._executor,
                 faiss.read_index,
                 str(index_path)
             )
             
-            # Load metadata
-            with open(metadata_path, 'rb') as f:
-                metadata = pickle.load(f)
+            # Columns are memory-mapped: pages load on first access and are shared across workers
+            book_metadata = ColumnarMetadataStore.load(metadata_dir)
             
-            self.book_metadata = metadata['book_metadata']
-            self.id_to_book_id = metadata['id_to_book_id']
-            self.book_id_to_id = metadata['book_id_to_id']
+            set_nprobe(index, self.nprobe)
+            
+            with self._index_lock:
+                self.index = index
+                self.index_type = metadata['index_type']
+                self.book_metadata = book_metadata
+                self._mutations = metadata['mutations']
+                self._set_stale_positions(metadata['stale_positions'])
             
             # Verify consistency
             if (metadata['model_name'] != self.model_name or 
@@ -486,7 +812,15 @@ class BookVectorStore:
             'dimension': self.dimension,
             'index_type': self.index_type,
             'model_name': self.model_name,
-            'is_trained': self.index.is_trained if self.index else False
+            'is_trained': self.index.is_trained if self.index else False,
+            'stale_vectors': len(self._stale_positions),
+            'mutations_since_compaction': self._mutations,
+            'query_cache': {
+                'size': len(self._query_cache),
+                'max_size': self.query_cache_size,
+                'hits': self._query_cache_hits,
+                'misses': self._query_cache_misses
+            }
         }
     
     def __del__(self):
@@ -0,0 +1,131 @@
+"""
+In-memory book metadata index.
+
+Holds the books table as one typed array per column plus a book_id -> row
+lookup (a dense array when ids are compact, a hash index otherwise), so
+single and batch lookups are array indexing instead of DataFrame scans.
+Each book's top tags by count are kept as its ``genres``. An index is
+immutable; refreshing builds a new one and swaps the reference, so
+readers never see a half-built index.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data.tag_matrix import TagMatrix
+
+
+class BookMetadataIndex:
+    """Read-only book_id -> metadata lookup over typed column arrays."""
+
+    def __init__(self, books: pd.DataFrame, tag_matrix: Optional[TagMatrix] = None,
+                 n_genres: int = 5, version: Any = None):
+        """
+        Args:
+            books: Books table with a book_id column; the first row of a
+                repeated book_id wins
+            tag_matrix: Book x tag counts aligned with ``books``; each
+                book's ``n_genres`` most counted tags become its genres
+            n_genres: Tags kept per book
+            version: Source version the index was built from
+        """
+        first = ~books['book_id'].duplicated().to_numpy()
+        books = books[first]
+        self.version = version
+        self.book_ids = books['book_id'].to_numpy(dtype=np.int64)
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, column in books.items():
+            if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_bool_dtype(column):
+                self.columns[name] = column.to_numpy()
+            else:
+                values = np.array(column.astype(object), dtype=object)
+                values[pd.isna(values)] = None
+                self.columns[name] = values
+
+        if tag_matrix is not None and 'genres' not in self.columns:
+            self.columns['genres'] = self._top_tags(tag_matrix, first, n_genres)
+
+        # Dense lookup array when ids are small non-negative integers
+        self._dense_rows: Optional[np.ndarray] = None
+        self._id_index: Optional[pd.Index] = None
+        n_books = len(self.book_ids)
+        if n_books and self.book_ids.min() >= 0 and self.book_ids.max() < 4 * n_books + 1024:
+            self._dense_rows = np.full(int(self.book_ids.max()) + 1, -1, dtype=np.int32)
+            self._dense_rows[self.book_ids] = np.arange(n_books, dtype=np.int32)
+        else:
+            self._id_index = pd.Index(self.book_ids)
+
+    @staticmethod
+    def _top_tags(tag_matrix: TagMatrix, keep_rows: np.ndarray, n_genres: int) -> np.ndarray:
+        """Space-joined names of each row's most counted tags, best first."""
+        counts = tag_matrix.counts[np.flatnonzero(keep_rows)].tocsr()
+        rows = np.repeat(np.arange(counts.shape[0]), np.diff(counts.indptr))
+        order = np.lexsort((-counts.data, rows))
+        rank = np.arange(len(order)) - counts.indptr[rows[order]]
+        top = order[rank < n_genres]
+
+        genres = np.full(counts.shape[0], '', dtype=object)
+        names = tag_matrix.tag_names[counts.indices[top]]
+        for row, group in pd.Series(names).groupby(rows[top], sort=False):
+            genres[row] = ' '.join(group)
+        return genres
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    def __contains__(self, book_id) -> bool:
+        return bool(self.rows([book_id])[0] >= 0)
+
+    def rows(self, book_ids: Iterable[int]) -> np.ndarray:
+        """Row of each book id, -1 for unknown ids."""
+        ids = np.asarray(book_ids if not np.isscalar(book_ids) else [book_ids])
+        if ids.dtype.kind not in 'iu':
+            ids = pd.to_numeric(pd.Series(ids), errors='coerce').fillna(-1).to_numpy(dtype=np.int64)
+        if self._dense_rows is None:
+            return self._id_index.get_indexer(ids).astype(np.int32)
+        rows = np.full(len(ids), -1, dtype=np.int32)
+        in_range = (ids >= 0) & (ids < len(self._dense_rows))
+        rows[in_range] = self._dense_rows[ids[in_range]]
+        return rows
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        record = {}
+        for name, values in self.columns.items():
+            value = values[row]
+            if isinstance(value, np.float32):
+                # Shortest decimal that round-trips the float32 (4.49, not 4.4899997...)
+                value = float(str(value))
+            elif isinstance(value, np.generic):
+                value = value.item()
+            if isinstance(value, float) and np.isnan(value):
+                value = None
+            record[name] = value
+        return record
+
+    def get(self, book_id: int) -> Optional[Dict[str, Any]]:
+        """Metadata of one book, or None if unknown."""
+        row = int(self.rows([book_id])[0])
+        return self._record(row) if row >= 0 else None
+
+    def get_many(self, book_ids: Iterable[int]) -> List[Optional[Dict[str, Any]]]:
+        """Metadata of each book in order, None for unknown ids."""
+        return [self._record(int(row)) if row >= 0 else None for row in self.rows(list(book_ids))]
+
+    def frame(self, book_ids: Iterable[int], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Known books as a DataFrame in request order; unknown ids are dropped."""
+        rows = self.rows(list(book_ids))
+        rows = rows[rows >= 0]
+        return pd.DataFrame({name: self.columns[name][rows]
+                             for name in (columns or list(self.columns))})
+
+    def top(self, column: str, n: int) -> List[Dict[str, Any]]:
+        """Metadata of the ``n`` books with the largest ``column`` values, largest first."""
+        values = np.nan_to_num(np.asarray(self.columns[column], dtype=np.float64), nan=-np.inf)
+        n = min(n, len(values))
+        if n <= 0:
+            return []
+        rows = np.argpartition(-values, n - 1)[:n]
+        rows = rows[np.argsort(-values[rows], kind='stable')]
+        return [self._record(int(row)) for row in rows]
@@ -1,15 +1,25 @@
 import pandas as pd
-from typing import Tuple, Dict, Optional, Any, Union
+import numpy as np
+from typing import Tuple, Dict, List, Optional, Any, Union
 from pathlib import Path
-import sqlite3
 import json
 import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
 import aiofiles
-import aiosqlite
 from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from src.core.logging import StructuredLogger
 from src.core.exceptions import GoodBooksException
+from src.core.stage_cache import StageCache, load_frame, save_frame
+from src.data.book_index import BookMetadataIndex
+from src.data.sql_source import SQLBackend, SQLiteBackend, SQLSource
+from src.data.rating_matrix import RatingMatrix, RatingMatrixBuilder, read_rating_matrix
+from src.data.tag_matrix import TagMatrix, build_tag_matrix
 
 logger = StructuredLogger(__name__)
 
@@ -17,17 +27,162 @@ class DataLoadError(GoodBooksException):
     """Raised when data loading fails"""
     pass
 
+class ColumnarCache:
+    """
+    Columnar binary cache of CSV sources.
+    
+    Each CSV is converted once into a directory of ``.npy`` columns with
+    compact dtypes: integers downcast to the smallest signed type that
+    holds them, floats to float32 when that is lossless to 1e-6.
+    Repetitive string columns are stored as category codes but read back
+    as plain strings, so cached and uncached loads return the same dtypes.
+    Entries are keyed by a fingerprint
+    of the source file (name, size, mtime), so an edited CSV is reconverted
+    on next load, and columns are opened memory-mapped (copy-on-write)
+    afterwards.
+    """
+    
+    FORMAT_VERSION = 1
+    CATEGORY_MAX_RATIO = 0.5  # Unique/total ratio below which strings are stored as codes
+    
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+    
+    @staticmethod
+    def fingerprint(path: Path) -> str:
+        """Fingerprint of a source file; changes whenever the file is rewritten."""
+        stat = path.stat()
+        key = f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+        return hashlib.blake2b(key, digest_size=12).hexdigest()
+    
+    def load(self, path: Path) -> pd.DataFrame:
+        """Return the cached frame for ``path``, converting the CSV on a miss."""
+        entry = self.cache_dir / f"{path.stem}-{self.fingerprint(path)}"
+        if (entry / 'manifest.json').exists():
+            try:
+                return self._read(entry)
+            except Exception as e:
+                logger.warning("Discarding unreadable cache entry", entry=str(entry), error=str(e))
+        
+        frame = self._compact(pd.read_csv(path))
+        try:
+            self._write(frame, entry, path.stem)
+        except OSError as e:
+            # A read-only data directory only costs the cache, not the load
+            logger.warning("Could not write columnar cache", path=str(path), error=str(e))
+        return frame
+    
+    @classmethod
+    def _compact(cls, frame: pd.DataFrame) -> pd.DataFrame:
+        """Downcast numeric columns; string columns keep their dtype."""
+        columns = {}
+        for name, column in frame.items():
+            if pd.api.types.is_bool_dtype(column):
+                pass
+            elif pd.api.types.is_integer_dtype(column):
+                column = pd.to_numeric(column, downcast='integer')
+            elif pd.api.types.is_float_dtype(column):
+                values = column.to_numpy(dtype=np.float64)
+                narrowed = values.astype(np.float32)
+                error = np.abs(narrowed.astype(np.float64) - values)
+                if np.nanmax(error, initial=0.0) <= 1e-6:
+                    column = column.astype(np.float32)
+            columns[name] = column
+        return pd.DataFrame(columns)
+    
+    def _write(self, frame: pd.DataFrame, entry: Path, stem: str) -> None:
+        """Write ``frame`` as one ``.npy`` file per column, published atomically."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{stem}-", dir=self.cache_dir))
+        try:
+            columns = []
+            for position, (name, column) in enumerate(frame.items()):
+                file_name = f"{position}.npy"
+                spec = {'name': name, 'file': file_name}
+                if column.dtype.kind in 'biuf':
+                    np.save(staging / file_name, column.to_numpy())
+                elif column.nunique(dropna=True) <= self.CATEGORY_MAX_RATIO * max(len(column), 1):
+                    # Repetitive strings: small integer codes plus each distinct value once
+                    categorical = pd.Categorical(column)
+                    np.save(staging / file_name, categorical.codes)
+                    spec['categories'] = f"{position}.categories.npy"
+                    np.save(staging / spec['categories'],
+                            categorical.categories.to_numpy().astype(str))
+                else:
+                    nulls = column.isna().to_numpy()
+                    np.save(staging / file_name, column.where(~nulls, '').astype(str).to_numpy(dtype=str))
+                    spec['kind'] = 'text'
+                    if nulls.any():
+                        spec['nulls'] = f"{position}.nulls.npy"
+                        np.save(staging / spec['nulls'], nulls)
+                columns.append(spec)
+            with open(staging / 'manifest.json', 'w') as f:
+                json.dump({'format_version': self.FORMAT_VERSION, 'rows': len(frame),
+                           'columns': columns}, f)
+            
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another worker published the same entry first
+                shutil.rmtree(staging, ignore_errors=True)
+                return
+            
+            # Older entries for this file can never be hit again
+            for stale in self.cache_dir.glob(f"{stem}-*"):
+                if stale != entry and stale.is_dir():
+                    shutil.rmtree(stale, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    
+    def _read(self, entry: Path) -> pd.DataFrame:
+        """Open a cache entry with every column memory-mapped."""
+        with open(entry / 'manifest.json', 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != self.FORMAT_VERSION:
+            raise ValueError(f"Unsupported cache format {manifest.get('format_version')}")
+        
+        columns = {}
+        for spec in manifest['columns']:
+            # Copy-on-write mapping: pages stay shared until a caller writes
+            values = np.load(entry / spec['file'], mmap_mode='c')
+            if 'categories' in spec:
+                # Decode to strings sharing one object per category; code -1 (NaN) picks None
+                categories = np.load(entry / spec['categories']).astype(object)
+                values = np.append(categories, None)[values]
+            elif spec.get('kind') == 'text':
+                values = np.asarray(values, dtype=object)
+                if 'nulls' in spec:
+                    values[np.load(entry / spec['nulls'])] = None
+            columns[spec['name']] = values
+        return pd.DataFrame(columns, copy=False)
+
+
 class DataLoader:
-    def __init__(self, data_source: str, source_type: str = "file"):
+    # Book metadata indexes shared by every loader of the same source
+    _book_indexes: Dict[str, BookMetadataIndex] = {}
+    _book_index_lock = threading.Lock()
+    
+    def __init__(self, data_source: Union[str, SQLBackend], source_type: str = "file",
+                 cache_dir: Optional[str] = None, use_cache: bool = True,
+                 book_index_ttl: float = 300.0):
         """
         Initialize DataLoader with flexible data source support.
         
         Args:
-            data_source: Path to file directory or database connection string
+            data_source: Path to file directory, SQLite database file, or an
+                SQLBackend (e.g. AsyncpgBackend over an existing asyncpg pool)
             source_type: "file" or "db" or "api"
+            cache_dir: Directory for the columnar CSV cache (file sources);
+                defaults to ``<data_source>/.cache``
+            use_cache: Load CSVs through the columnar cache
+            book_index_ttl: Seconds before a database-backed book index is
+                reloaded (file-backed indexes reload when the CSVs change)
         """
         self.source_type = source_type
+        self.book_index_ttl = book_index_ttl
         self._executor = ThreadPoolExecutor(max_workers=4)
+        self._cache: Optional[ColumnarCache] = None
         
         if source_type == "file":
             self.data_dir = Path(data_source)
@@ -36,8 +191,12 @@ class DataLoader:
             self.tags_path = self.data_dir / 'tags.csv'
             self.book_tags_path = self.data_dir / 'book_tags.csv'
             self._validate_file_paths()
+            if use_cache:
+                self._cache = ColumnarCache(Path(cache_dir) if cache_dir else self.data_dir / '.cache')
         elif source_type == "db":
-            self.db_connection = data_source
+            backend = data_source if isinstance(data_source, SQLBackend) else SQLiteBackend(data_source)
+            self.db_connection = getattr(backend, 'path', f"{type(backend).__name__}@{id(backend)}")
+            self._sql = SQLSource(backend)
     
     def _validate_file_paths(self) -> None:
         """Validate that all required CSV files exist."""
@@ -51,11 +210,8 @@ class DataLoader:
     async def get_async_connection(self):
         """Async context manager for database connections."""
         if self.source_type == "db":
-            conn = await aiosqlite.connect(self.db_connection)
-            try:
+            async with self._sql.backend.connection() as conn:
                 yield conn
-            finally:
-                await conn.close()
         else:
             yield None
 
@@ -75,23 +231,18 @@ class DataLoader:
             if self.source_type == "file":
                 # Load CSV files asynchronously using thread pool
                 loop = asyncio.get_event_loop()
-                books, ratings, tags, book_tags = await asyncio.gather(
-                    loop.run_in_executor(self._executor, pd.read_csv, str(self.books_path)),
-                    loop.run_in_executor(self._executor, pd.read_csv, str(self.ratings_path)),
-                    loop.run_in_executor(self._executor, pd.read_csv, str(self.tags_path)),
-                    loop.run_in_executor(self._executor, pd.read_csv, str(self.book_tags_path))
-                )
+                books, ratings, tags, book_tags = await asyncio.gather(*[
+                    loop.run_in_executor(self._executor, self._read_csv, path)
+                    for path in (self.books_path, self.ratings_path,
+                                 self.tags_path, self.book_tags_path)
+                ])
             
             elif self.source_type == "db":
-                async with self.get_async_connection() as conn:
-                    books_task = self._read_sql_async(conn, "SELECT * FROM books")
-                    ratings_task = self._read_sql_async(conn, "SELECT * FROM ratings")
-                    tags_task = self._read_sql_async(conn, "SELECT * FROM tags")
-                    book_tags_task = self._read_sql_async(conn, "SELECT * FROM book_tags")
-                    
-                    books, ratings, tags, book_tags = await asyncio.gather(
-                        books_task, ratings_task, tags_task, book_tags_task
-                    )
+                # Each table streams on its own pooled connection
+                books, ratings, tags, book_tags = await asyncio.gather(*[
+                    self._sql.read_table(table)
+                    for table in ('books', 'ratings', 'tags', 'book_tags')
+                ])
             else:
                 raise DataLoadError(f"Unsupported source type: {self.source_type}")
             
@@ -112,12 +263,53 @@ class DataLoader:
             logger.error("Dataset loading failed", error=str(e), exc_info=True)
             raise DataLoadError(f"Error loading datasets: {str(e)}") from e
     
-    async def _read_sql_async(self, conn: aiosqlite.Connection, query: str) -> pd.DataFrame:
-        """Read SQL query result into pandas DataFrame asynchronously."""
-        cursor = await conn.execute(query)
-        rows = await cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
-        return pd.DataFrame(rows, columns=columns)
+    async def load_rating_matrix_async(self, chunksize: int = 250_000) -> RatingMatrix:
+        """
+        Stream ratings into a user x item CSR matrix without materialising a DataFrame.
+        
+        Args:
+            chunksize: Ratings read per chunk (CSV rows or database rows)
+            
+        Returns:
+            RatingMatrix with dense user/book indices and their ids
+            
+        Raises:
+            DataLoadError: If loading fails or there are no ratings
+        """
+        try:
+            logger.info("Starting streaming ratings load", source_type=self.source_type,
+                        chunksize=chunksize)
+            
+            if self.source_type == "file":
+                loop = asyncio.get_event_loop()
+                rating_matrix = await loop.run_in_executor(
+                    self._executor, read_rating_matrix, self.ratings_path, chunksize
+                )
+            elif self.source_type == "db":
+                builder = RatingMatrixBuilder()
+                async for _, rows in self._sql.stream(
+                    "SELECT user_id, book_id, rating FROM ratings", batch_size=chunksize
+                ):
+                    if rows:
+                        user_ids, book_ids, ratings = zip(*rows)
+                        builder.add_chunk(np.array(user_ids), np.array(book_ids), ratings)
+                rating_matrix = builder.build()
+            else:
+                raise DataLoadError(f"Unsupported source type: {self.source_type}")
+            
+            if rating_matrix.nnz == 0:
+                raise DataLoadError("ratings source is empty")
+            return rating_matrix
+            
+        except Exception as e:
+            logger.error("Streaming ratings load failed", error=str(e))
+            raise DataLoadError(f"Error streaming ratings: {str(e)}") from e
+    
+    def _read_csv(self, path: Path) -> pd.DataFrame:
+        """Read one CSV, through the columnar cache when enabled."""
+        if self._cache is None:
+            return pd.read_csv(str(path))
+        return self._cache.load(path)
     
     def _validate_dataframes(self, *dataframes: pd.DataFrame) -> None:
         """Validate that DataFrames are not empty and have expected structure."""
@@ -164,14 +356,13 @@ class DataLoader:
             logger.info("Starting async book metadata merge")
             
             if self.source_type == "db":
-                async with self.get_async_connection() as conn:
-                    merged_books = await self._read_sql_async(conn, """
-                        SELECT b.*, bt.*, t.tag_name 
-                        FROM books b
-                        LEFT JOIN book_tags bt ON b.goodreads_book_id = bt.goodreads_book_id
-                        LEFT JOIN tags t ON bt.tag_id = t.tag_id
-                    """)
-                    return merged_books
+                merged_books = await self._sql.read_frame("""
+                    SELECT b.*, bt.*, t.tag_name 
+                    FROM books b
+                    LEFT JOIN book_tags bt ON b.goodreads_book_id = bt.goodreads_book_id
+                    LEFT JOIN tags t ON bt.tag_id = t.tag_id
+                """)
+                return merged_books
             
             # For file-based sources, use async merge operations
             loop = asyncio.get_event_loop()
@@ -200,6 +391,39 @@ class DataLoader:
             logger.error("Book metadata merge failed", error=str(e))
             raise DataLoadError(f"Error merging book metadata: {str(e)}") from e
     
+    async def build_tag_matrix_async(
+        self,
+        books: pd.DataFrame,
+        book_tags: pd.DataFrame,
+        tags: Optional[pd.DataFrame] = None
+    ) -> TagMatrix:
+        """
+        Build the sparse book x tag count matrix asynchronously.
+        
+        Replaces the merge + preprocess_tags_async string path for feature
+        extraction: no books x book_tags merge is materialised and the
+        ``count`` column is kept as the term frequency.
+        
+        Args:
+            books: Books DataFrame; fixes the row order
+            book_tags: Book-tag relationships DataFrame
+            tags: Tags DataFrame for the tag names
+            
+        Returns:
+            TagMatrix for FeatureExtractor.fit_tag_matrix
+            
+        Raises:
+            DataLoadError: If building the matrix fails
+        """
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self._executor, build_tag_matrix, books, book_tags, tags
+            )
+        except Exception as e:
+            logger.error("Tag matrix build failed", error=str(e))
+            raise DataLoadError(f"Error building tag matrix: {str(e)}") from e
+    
     async def preprocess_tags_async(self, books: pd.DataFrame) -> pd.DataFrame:
         """
         Preprocess book tags for feature extraction asynchronously.
@@ -217,15 +441,14 @@ class DataLoader:
             logger.info("Starting async tag preprocessing")
             
             if self.source_type == "db":
-                async with self.get_async_connection() as conn:
-                    all_tags_df = await self._read_sql_async(conn, """
-                        SELECT b.book_id, GROUP_CONCAT(t.tag_name, ' ') as all_tags
-                        FROM books b
-                        LEFT JOIN book_tags bt ON b.book_id = bt.book_id
-                        LEFT JOIN tags t ON bt.tag_id = t.tag_id
-                        GROUP BY b.book_id
-                    """)
-                    books = books.merge(all_tags_df, on='book_id', how='left')
+                all_tags_df = await self._sql.read_frame("""
+                    SELECT b.book_id, GROUP_CONCAT(t.tag_name, ' ') as all_tags
+                    FROM books b
+                    LEFT JOIN book_tags bt ON b.book_id = bt.book_id
+                    LEFT JOIN tags t ON bt.tag_id = t.tag_id
+                    GROUP BY b.book_id
+                """)
+                books = books.merge(all_tags_df, on='book_id', how='left')
             else:
                 # For file-based sources
                 loop = asyncio.get_event_loop()
@@ -246,6 +469,37 @@ class DataLoader:
             logger.error("Tag preprocessing failed", error=str(e))
             raise DataLoadError(f"Error preprocessing tags: {str(e)}") from e
     
+    def processed_books_key(self, stage_cache: StageCache) -> Optional[str]:
+        """Stage cache key of the processed books; None for non-file sources."""
+        if self.source_type != "file":
+            return None
+        return stage_cache.key('processed_books',
+                               files=[self.books_path, self.book_tags_path, self.tags_path])
+    
+    async def load_processed_books_async(self, stage_cache: Optional[StageCache] = None) -> pd.DataFrame:
+        """
+        Load books merged with their tags and preprocessed for feature extraction.
+        
+        Args:
+            stage_cache: Pipeline stage cache; the result is reused while
+                books.csv, book_tags.csv and tags.csv are unchanged
+            
+        Returns:
+            Books DataFrame with an 'all_tags' column
+            
+        Raises:
+            DataLoadError: If loading or processing fails
+        """
+        async def process():
+            books, _, tags, book_tags = await self.load_datasets_async()
+            merged_books = await self.merge_book_metadata_async(books, book_tags, tags)
+            return await self.preprocess_tags_async(merged_books)
+        
+        key = self.processed_books_key(stage_cache) if stage_cache is not None else None
+        if key is None:
+            return await process()
+        return await stage_cache.run_async('processed_books', key, process, save_frame, load_frame)
+    
     def _process_tags_groupby(self, books: pd.DataFrame) -> pd.DataFrame:
         """Helper method to process tags groupby operation."""
         books = books.copy()
@@ -279,12 +533,10 @@ class DataLoader:
             logger.info("Getting user ratings", user_id=user_id)
             
             if self.source_type == "db":
-                async with self.get_async_connection() as conn:
-                    user_ratings = await self._read_sql_async(
-                        conn,
-                        f"SELECT * FROM ratings WHERE user_id = {user_id}"
-                    )
-                    return user_ratings
+                # Bound parameter: one cached statement for every user
+                return await self._sql.read_frame(
+                    "SELECT * FROM ratings WHERE user_id = ?", (int(user_id),)
+                )
             
             if ratings is None:
                 _, ratings, _, _ = await self.load_datasets_async()
@@ -303,6 +555,78 @@ class DataLoader:
             logger.error("Failed to get user ratings", user_id=user_id, error=str(e))
             raise DataLoadError(f"Error getting user ratings: {str(e)}") from e
     
+    async def get_book_index_async(self) -> BookMetadataIndex:
+        """
+        Return the shared book metadata index, rebuilding it if the source changed.
+        
+        One index is kept per data source and shared by every DataLoader
+        reading it. File sources are rebuilt when books.csv, book_tags.csv
+        or tags.csv change; database sources after ``book_index_ttl``.
+        
+        Returns:
+            BookMetadataIndex over the current books table
+            
+        Raises:
+            DataLoadError: If the index cannot be built
+        """
+        index = DataLoader._book_indexes.get(self._book_source_key())
+        if index is not None and index.version == self._book_source_version():
+            return index
+        try:
+            tables = None
+            if self.source_type == "db":
+                tables = await asyncio.gather(*[
+                    self._sql.read_table(table) for table in ('books', 'book_tags', 'tags')
+                ])
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._executor, self._refresh_book_index, tables)
+        except Exception as e:
+            logger.error("Book index build failed", error=str(e))
+            raise DataLoadError(f"Error building book index: {str(e)}") from e
+    
+    def _book_source_key(self) -> str:
+        if self.source_type == "file":
+            return str(self.books_path.resolve())
+        return f"{self.source_type}:{getattr(self, 'db_connection', '')}"
+    
+    def _book_source_version(self) -> Any:
+        if self.source_type == "file":
+            return tuple(ColumnarCache.fingerprint(path) if path.exists() else None
+                         for path in (self.books_path, self.book_tags_path, self.tags_path))
+        return int(time.time() // self.book_index_ttl)
+    
+    def _refresh_book_index(self, tables: Optional[List[pd.DataFrame]] = None) -> BookMetadataIndex:
+        """Build and publish a new index unless another thread already has.
+        
+        Args:
+            tables: Pre-read (books, book_tags, tags) for database sources
+        """
+        key = self._book_source_key()
+        with DataLoader._book_index_lock:
+            version = self._book_source_version()
+            index = DataLoader._book_indexes.get(key)
+            if index is not None and index.version == version:
+                return index
+            
+            if self.source_type == "file":
+                books = self._read_csv(self.books_path)
+                book_tags = self._read_csv(self.book_tags_path)
+                tags = self._read_csv(self.tags_path)
+            elif self.source_type == "db" and tables is not None:
+                books, book_tags, tags = tables
+            else:
+                raise DataLoadError(f"Unsupported source type: {self.source_type}")
+            
+            tag_matrix = None
+            if 'goodreads_book_id' in books.columns and \
+                    {'goodreads_book_id', 'tag_id'} <= set(book_tags.columns):
+                tag_matrix = build_tag_matrix(books, book_tags, tags)
+            index = BookMetadataIndex(books, tag_matrix, version=version)
+            DataLoader._book_indexes[key] = index
+        
+        logger.info("Book index built", num_books=len(index), source=key)
+        return index
+    
     async def get_book_metadata_async(self, book_id: int) -> Optional[Dict[str, Any]]:
         """
         Get metadata for a specific book asynchronously.
@@ -314,22 +638,48 @@ class DataLoader:
             Dictionary with book metadata or None if not found
         """
         try:
-            if self.source_type == "db":
-                async with self.get_async_connection() as conn:
-                    result = await self._read_sql_async(
-                        conn,
-                        f"SELECT * FROM books WHERE book_id = {book_id}"
-                    )
-                    return result.iloc[0].to_dict() if not result.empty else None
-            
-            books, _, _, _ = await self.load_datasets_async()
-            book_data = books[books['book_id'] == book_id]
-            return book_data.iloc[0].to_dict() if not book_data.empty else None
+            index = await self.get_book_index_async()
+            return index.get(book_id)
             
         except Exception as e:
             logger.error("Failed to get book metadata", book_id=book_id, error=str(e))
             return None
     
+    async def get_books_metadata_async(self, book_ids: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Get metadata for several books in one index lookup.
+        
+        Args:
+            book_ids: Book IDs to get metadata for
+            
+        Returns:
+            Metadata dictionaries in input order, None for unknown books
+            
+        Raises:
+            DataLoadError: If the index cannot be built
+        """
+        index = await self.get_book_index_async()
+        return index.get_many(book_ids)
+    
+    async def ensure_indexes_async(self, create: bool = False) -> List[str]:
+        """
+        Check the database indexes behind user rating and tag lookups.
+        
+        Args:
+            create: Create missing indexes instead of only logging them
+            
+        Returns:
+            ``CREATE INDEX`` statements for the indexes that were missing
+        """
+        if self.source_type != "db":
+            return []
+        return await self._sql.ensure_indexes(create=create)
+    
+    async def close_async(self) -> None:
+        """Close pooled database connections."""
+        if self.source_type == "db":
+            await self._sql.close()
+    
     def __del__(self):
         """Cleanup thread pool executor."""
         if hasattr(self, '_executor'):
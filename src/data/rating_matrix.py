@@ -0,0 +1,205 @@
+"""
+Streaming construction of the user x item rating matrix.
+
+Ratings are consumed in chunks (CSV ``chunksize`` reads or database
+``fetchmany`` batches). Each chunk's user and book ids get dense indices
+in order of first appearance, the same order ``CollaborativeFilter.fit``
+assigns, and the compact int32/float32 coordinates are spilled to an
+unlinked temporary file. ``build`` allocates the final CSR arrays from the
+per-user counts and scatters the chunks into them one at a time, so peak
+memory is the final matrix plus one chunk rather than int64 DataFrames and
+their re-mapped copies.
+"""
+
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from src.core.logging import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+RATING_COLUMNS = ['user_id', 'book_id', 'rating']
+
+
+@dataclass
+class RatingMatrix:
+    """User x item ratings in CSR form, with the ids behind rows and columns.
+
+    Repeated ratings of the same book by a user are kept as separate
+    entries, in source order within each row.
+    """
+    matrix: csr_matrix
+    user_ids: np.ndarray
+    item_ids: np.ndarray
+
+    @property
+    def nnz(self) -> int:
+        return int(self.matrix.nnz)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the CSR arrays and the id arrays."""
+        return int(self.matrix.data.nbytes + self.matrix.indices.nbytes +
+                   self.matrix.indptr.nbytes + self.user_ids.nbytes + self.item_ids.nbytes)
+
+    def coordinates(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return (user index, item index, rating) arrays in row order."""
+        rows = np.repeat(np.arange(self.matrix.shape[0], dtype=np.int32),
+                         np.diff(self.matrix.indptr))
+        return rows, self.matrix.indices, self.matrix.data
+
+    def latest(self) -> csr_matrix:
+        """Canonical CSR keeping only the last rating of each (user, book) pair."""
+        rows, cols, values = self.coordinates()
+        keys = rows.astype(np.int64) * self.matrix.shape[1] + cols
+        # First occurrence in the reversed stream is the latest rating
+        _, first = np.unique(keys[::-1], return_index=True)
+        keep = len(keys) - 1 - first
+        return csr_matrix((values[keep].astype(np.float32), (rows[keep], cols[keep])),
+                          shape=self.matrix.shape)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Expand back into a user_id/book_id/rating DataFrame."""
+        rows, cols, values = self.coordinates()
+        return pd.DataFrame({'user_id': self.user_ids[rows], 'book_id': self.item_ids[cols],
+                             'rating': values})
+
+
+class _IdIndexer:
+    """Assigns dense indices to ids incrementally, in order of first appearance."""
+
+    def __init__(self):
+        self.index: Optional[pd.Index] = None
+
+    def __len__(self) -> int:
+        return 0 if self.index is None else len(self.index)
+
+    def encode(self, ids: np.ndarray) -> np.ndarray:
+        if self.index is None:
+            self.index = pd.Index(pd.unique(ids))
+        codes = self.index.get_indexer(ids)
+        unseen = codes < 0
+        if unseen.any():
+            new_ids = pd.unique(ids[unseen])
+            self.index = self.index.append(pd.Index(new_ids))
+            codes[unseen] = self.index.get_indexer(ids[unseen])
+        return codes.astype(np.int32)
+
+
+class RatingMatrixBuilder:
+    """Accumulates rating chunks and builds a ``RatingMatrix``."""
+
+    def __init__(self, spill: bool = True, spill_dir: Optional[str] = None):
+        """
+        Args:
+            spill: Keep encoded chunks in a temporary file instead of memory
+            spill_dir: Directory for the spill file (default: system temp)
+        """
+        self.spill = spill
+        self.spill_dir = spill_dir
+        self._spill_file = None
+        self._reset()
+
+    def _reset(self) -> None:
+        if self._spill_file is not None:
+            self._spill_file.close()
+        self._spill_file = tempfile.TemporaryFile(dir=self.spill_dir) if self.spill else None
+        self._users = _IdIndexer()
+        self._items = _IdIndexer()
+        self._chunks: List[Union[int, Tuple[np.ndarray, np.ndarray, np.ndarray]]] = []
+        self._row_counts = np.zeros(0, dtype=np.int64)
+        self.n_ratings = 0
+
+    def add_chunk(self, user_ids, item_ids, ratings) -> None:
+        """Encode one chunk of ratings; the inputs can be released afterwards."""
+        rows = self._users.encode(np.asarray(user_ids))
+        cols = self._items.encode(np.asarray(item_ids))
+        values = np.asarray(ratings, dtype=np.float32)
+        if not len(rows) == len(cols) == len(values):
+            raise ValueError("Rating chunk columns differ in length")
+
+        counts = np.bincount(rows, minlength=len(self._users))
+        counts[:len(self._row_counts)] += self._row_counts
+        self._row_counts = counts
+        if self._spill_file is not None:
+            for array in (rows, cols, values):
+                self._spill_file.write(array.tobytes())
+            self._chunks.append(len(values))
+        else:
+            self._chunks.append((rows, cols, values))
+        self.n_ratings += len(values)
+
+    def _read_chunks(self):
+        """Yield the encoded chunks in source order, releasing each as it goes."""
+        if self._spill_file is not None:
+            self._spill_file.seek(0)
+            for length in self._chunks:
+                yield tuple(np.fromfile(self._spill_file, dtype=dtype, count=length)
+                            for dtype in (np.int32, np.int32, np.float32))
+            return
+        self._chunks.reverse()
+        while self._chunks:
+            yield self._chunks.pop()
+
+    def add_frame(self, chunk: pd.DataFrame) -> None:
+        self.add_chunk(chunk['user_id'].to_numpy(), chunk['book_id'].to_numpy(),
+                       chunk['rating'].to_numpy())
+
+    def build(self) -> RatingMatrix:
+        """Scatter the chunks into CSR arrays; the builder is empty afterwards."""
+        n_users, n_items = len(self._users), len(self._items)
+        indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(self._row_counts, out=indptr[1:])
+        indices = np.empty(self.n_ratings, dtype=np.int32)
+        data = np.empty(self.n_ratings, dtype=np.float32)
+
+        # Next free slot of each row; chunks are visited in source order so
+        # entries within a row keep their source order
+        cursor = indptr[:-1].copy()
+        for rows, cols, values in self._read_chunks():
+            order = np.argsort(rows, kind='stable')
+            rows = rows[order]
+            counts = np.bincount(rows, minlength=n_users)
+            starts = np.zeros(n_users, dtype=np.int64)
+            np.cumsum(counts[:-1], out=starts[1:])
+            positions = cursor[rows] + (np.arange(len(rows)) - starts[rows])
+            indices[positions] = cols[order]
+            data[positions] = values[order]
+            cursor += counts
+
+        matrix = csr_matrix((data, indices, indptr), shape=(n_users, n_items), copy=False)
+        result = RatingMatrix(matrix=matrix, user_ids=self._ids(self._users),
+                              item_ids=self._ids(self._items))
+        self._reset()
+        return result
+
+    @staticmethod
+    def _ids(indexer: _IdIndexer) -> np.ndarray:
+        return np.empty(0, dtype=np.int64) if indexer.index is None else indexer.index.to_numpy()
+
+
+def read_rating_matrix(path: Union[str, Path], chunksize: int = 250_000) -> RatingMatrix:
+    """
+    Stream a ratings CSV into a ``RatingMatrix``.
+
+    Args:
+        path: ratings.csv with user_id, book_id and rating columns
+        chunksize: Rows parsed per chunk
+
+    Returns:
+        RatingMatrix of every rating in the file
+    """
+    builder = RatingMatrixBuilder()
+    for chunk in pd.read_csv(path, usecols=RATING_COLUMNS, chunksize=chunksize,
+                             dtype={'rating': np.float32}):
+        builder.add_frame(chunk)
+    result = builder.build()
+    logger.info("Rating matrix built", ratings=result.nnz, users=len(result.user_ids),
+                books=len(result.item_ids), megabytes=round(result.nbytes / 2**20, 1))
+    return result
@@ -2,6 +2,7 @@
 Production-Grade Data Schema Validation Module
 Following Bookworm AI Coding Standards for comprehensive data validation.
 """
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
@@ -79,6 +80,226 @@ class DataValidator(ABC):
         pass
 
 
+DEFAULT_CHUNK_SIZE = 500_000
+
+
+class ChunkedTableValidator:
+    """
+    Validates one table chunk by chunk, merging per-chunk results.
+
+    Each chunk is checked with vectorized NumPy operations and reduced to
+    counts and extremes, so memory is bounded by the chunk size. Unique
+    columns and primary keys keep one 64-bit hash per row; foreign keys are
+    checked by sorted-array membership against the referenced key columns.
+    """
+
+    def __init__(self, schema: TableSchema,
+                 references: Optional[Dict[Tuple[str, str], np.ndarray]] = None,
+                 collect_keys: Optional[List[str]] = None):
+        """
+        Args:
+            schema: Table schema to validate against
+            references: Sorted key arrays of referenced (table, column) pairs
+            collect_keys: Columns whose distinct values other tables reference
+        """
+        self.schema = schema
+        self.references = references or {}
+        self.collect_keys = set(collect_keys or [])
+        self.columns: List[str] = []
+        self.row_count = 0
+        self.chunk_count = 0
+        self.peak_chunk_mb = 0.0
+        self.null_counts: Dict[str, int] = {}
+        self.type_errors: Dict[str, int] = {}
+        self.type_examples: Dict[str, List[Any]] = {}
+        self.below_min: Dict[str, int] = {}
+        self.above_max: Dict[str, int] = {}
+        self.too_short: Dict[str, int] = {}
+        self.too_long: Dict[str, int] = {}
+        self.numeric_stats: Dict[str, List[float]] = {}  # count, sum, min, max
+        self.invalid_values: Dict[str, set] = {}
+        self.hashes: Dict[str, List[np.ndarray]] = {}
+        self.missing_refs: Dict[str, List[np.ndarray]] = {}
+        self.keys: Dict[str, List[np.ndarray]] = {}
+
+    def set_columns(self, columns: List[str]) -> None:
+        self.columns = list(columns)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Check one chunk and merge its results."""
+        self.row_count += len(chunk)
+        self.chunk_count += 1
+        self.peak_chunk_mb = max(self.peak_chunk_mb,
+                                 chunk.memory_usage(deep=True).sum() / 1024 / 1024)
+
+        keys = {}
+        for column in self.schema.columns:
+            if column.name not in chunk.columns:
+                continue
+            series = chunk[column.name]
+            nulls = series.isna().to_numpy()
+            name = column.name
+            self.null_counts[name] = self.null_counts.get(name, 0) + int(nulls.sum())
+
+            if column.data_type in (DataType.INTEGER, DataType.FLOAT):
+                values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+                present = ~np.isnan(values)
+                bad = ~present & ~nulls
+                if bad.any():
+                    self.type_errors[name] = self.type_errors.get(name, 0) + int(bad.sum())
+                    examples = self.type_examples.setdefault(name, [])
+                    examples.extend(series[bad].head(3 - len(examples)).tolist())
+                self._check_numeric(column, values[present])
+                keys[name] = values
+            else:
+                values = series.to_numpy(dtype=object, na_value=None)
+                if column.data_type == DataType.STRING:
+                    self._check_lengths(column, series[~nulls].astype(str).str.len().to_numpy())
+                keys[name] = values
+
+            if column.allowed_values is not None:
+                observed = pd.unique(series[~nulls])
+                invalid = observed[~pd.Series(observed).isin(column.allowed_values).to_numpy()]
+                self.invalid_values.setdefault(name, set()).update(invalid.tolist())
+
+            if column.unique:
+                self.hashes.setdefault(name, []).append(np.sort(pd.util.hash_array(keys[name])))
+
+        if self.schema.primary_key and all(col in keys for col in self.schema.primary_key):
+            complete = np.ones(len(chunk), dtype=bool)
+            combined = np.zeros(len(chunk), dtype=np.uint64)
+            for col in self.schema.primary_key:
+                complete &= ~pd.isna(keys[col])
+                combined = combined * np.uint64(0x100000001B3) ^ pd.util.hash_array(keys[col])
+            self.hashes.setdefault('__primary_key__', []).append(np.sort(combined[complete]))
+
+    def _check_numeric(self, column: ColumnSchema, values: np.ndarray) -> None:
+        name = column.name
+        if column.min_value is not None:
+            self.below_min[name] = self.below_min.get(name, 0) + int((values < column.min_value).sum())
+        if column.max_value is not None:
+            self.above_max[name] = self.above_max.get(name, 0) + int((values > column.max_value).sum())
+        if len(values):
+            count, total, low, high = self.numeric_stats.get(name, [0, 0.0, np.inf, -np.inf])
+            self.numeric_stats[name] = [count + len(values), total + float(values.sum()),
+                                        min(low, float(values.min())), max(high, float(values.max()))]
+
+        if column.foreign_key in self.references:
+            distinct = np.unique(values)
+            referenced = self.references[column.foreign_key]
+            if len(referenced):
+                at = np.minimum(np.searchsorted(referenced, distinct), len(referenced) - 1)
+                distinct = distinct[referenced[at] != distinct]
+            if len(distinct):
+                self.missing_refs.setdefault(name, []).append(distinct)
+        if name in self.collect_keys:
+            self.keys.setdefault(name, []).append(np.unique(values))
+
+    def _check_lengths(self, column: ColumnSchema, lengths: np.ndarray) -> None:
+        name = column.name
+        if column.min_length is not None:
+            self.too_short[name] = self.too_short.get(name, 0) + int((lengths < column.min_length).sum())
+        if column.max_length is not None:
+            self.too_long[name] = self.too_long.get(name, 0) + int((lengths > column.max_length).sum())
+
+    def collected_keys(self) -> Dict[Tuple[str, str], np.ndarray]:
+        """Sorted distinct values of the ``collect_keys`` columns."""
+        return {
+            (self.schema.name, name): np.unique(np.concatenate(self.keys.get(name) or [np.empty(0)]))
+            for name in self.collect_keys
+        }
+
+    def reference_errors(self) -> List[str]:
+        """Foreign key violations, worded like ``validate_referential_integrity``."""
+        errors = []
+        for column in self.schema.columns:
+            if column.name in self.missing_refs:
+                missing = np.unique(np.concatenate(self.missing_refs[column.name]))
+                examples = [int(value) if float(value).is_integer() else float(value)
+                            for value in missing[:10]]
+                errors.append(f"{self.schema.name.capitalize()} table references "
+                              f"non-existent {column.name}s: {examples}...")
+        return errors
+
+    def result(self) -> ValidationResult:
+        """Merged result in the same form as ``CSVDataValidator.validate_schema``."""
+        errors = []
+        warnings = []
+        schema = self.schema
+
+        if schema.required_columns:
+            errors.extend(f"Missing required column: {col}"
+                          for col in set(schema.required_columns) - set(self.columns))
+        expected_columns = {col.name for col in schema.columns}
+        warnings.extend(f"Unexpected column found: {col}"
+                        for col in set(self.columns) - expected_columns)
+
+        for column in schema.columns:
+            name = column.name
+            if name not in self.columns:
+                if not column.nullable:
+                    errors.append(f"Required column '{name}' is missing")
+                continue
+            null_count = self.null_counts.get(name, 0)
+            if not column.nullable and null_count:
+                errors.append(f"Column '{name}' has {null_count} null values but should not be nullable")
+            if null_count == self.row_count:
+                continue
+            if self.type_errors.get(name):
+                errors.append(f"Column '{name}' data type validation failed: {self.type_errors[name]} "
+                              f"non-numeric values, e.g. {self.type_examples[name]}")
+            if self.below_min.get(name):
+                errors.append(f"Column '{name}' has values below minimum {column.min_value}")
+            if self.above_max.get(name):
+                errors.append(f"Column '{name}' has values above maximum {column.max_value}")
+            if self.too_short.get(name):
+                errors.append(f"Column '{name}' has values shorter than minimum length {column.min_length}")
+            if self.too_long.get(name):
+                errors.append(f"Column '{name}' has values longer than maximum length {column.max_length}")
+            if column.unique:
+                dup_count = self._duplicates(name)
+                if dup_count:
+                    errors.append(f"Column '{name}' should be unique but has {dup_count} duplicates")
+            if self.invalid_values.get(name):
+                errors.append(f"Column '{name}' has invalid values: {sorted(self.invalid_values[name], key=str)}")
+
+        if schema.primary_key:
+            missing_key = [col for col in schema.primary_key if col not in self.columns]
+            if missing_key:
+                errors.append(f"Primary key column missing: {missing_key}")
+            elif self._duplicates('__primary_key__'):
+                errors.append(f"Primary key {schema.primary_key} has duplicate values")
+
+        summary = {
+            "total_rows": self.row_count,
+            "total_columns": len(self.columns),
+            "null_counts": dict(self.null_counts),
+            "chunks": self.chunk_count,
+            "peak_chunk_memory_mb": self.peak_chunk_mb,
+            "numeric_stats": {
+                name: {"min": low, "max": high, "mean": total / count}
+                for name, (count, total, low, high) in self.numeric_stats.items()
+            },
+        }
+        return ValidationResult(
+            is_valid=len(errors) == 0,
+            table_name=schema.name,
+            errors=errors,
+            warnings=warnings,
+            row_count=self.row_count,
+            column_count=len(self.columns),
+            summary=summary
+        )
+
+    def _duplicates(self, name: str) -> int:
+        hashes = self.hashes.get(name)
+        if not hashes:
+            return 0
+        # Chunks are sorted runs, which a stable sort (timsort) merges cheaply
+        hashes = np.sort(np.concatenate(hashes), kind='stable')
+        return int((hashes[1:] == hashes[:-1]).sum())
+
+
 class CSVDataValidator(DataValidator):
     """Production-grade CSV data validator with comprehensive checks."""
     
@@ -114,7 +335,8 @@ class CSVDataValidator(DataValidator):
                 name="ratings",
                 columns=[
                     ColumnSchema("user_id", DataType.INTEGER, nullable=False, min_value=1),
-                    ColumnSchema("book_id", DataType.INTEGER, nullable=False, min_value=1),
+                    ColumnSchema("book_id", DataType.INTEGER, nullable=False, min_value=1,
+                                 foreign_key=("books", "book_id")),
                     ColumnSchema("rating", DataType.INTEGER, nullable=False, min_value=1, max_value=5),
                 ],
                 primary_key=["user_id", "book_id"],
@@ -134,8 +356,10 @@ class CSVDataValidator(DataValidator):
             "book_tags": TableSchema(
                 name="book_tags",
                 columns=[
-                    ColumnSchema("goodreads_book_id", DataType.INTEGER, nullable=False, min_value=1),
-                    ColumnSchema("tag_id", DataType.INTEGER, nullable=False, min_value=1),
+                    ColumnSchema("goodreads_book_id", DataType.INTEGER, nullable=False, min_value=1,
+                                 foreign_key=("books", "goodreads_book_id")),
+                    ColumnSchema("tag_id", DataType.INTEGER, nullable=False, min_value=1,
+                                 foreign_key=("tags", "tag_id")),
                     ColumnSchema("count", DataType.INTEGER, nullable=False, min_value=0),
                 ],
                 primary_key=["goodreads_book_id", "tag_id"],
@@ -300,8 +524,49 @@ class CSVDataValidator(DataValidator):
         
         return errors
     
-    def validate_all_datasets(self, data_dir: Path) -> Dict[str, ValidationResult]:
-        """Validate all datasets in the data directory."""
+    def _stream_csv(self, file_path: Path, schema: TableSchema, chunk_size: int,
+                    references: Optional[Dict[Tuple[str, str], np.ndarray]] = None,
+                    collect_keys: Optional[List[str]] = None) -> ChunkedTableValidator:
+        """Run a ChunkedTableValidator over a CSV file read ``chunk_size`` rows at a time."""
+        table_validator = ChunkedTableValidator(schema, references, collect_keys)
+        header = list(pd.read_csv(file_path, nrows=0).columns)
+        table_validator.set_columns(header)
+        # Unexpected columns only need the header; they are not parsed
+        expected_columns = {col.name for col in schema.columns}
+        usecols = [col for col in header if col in expected_columns]
+        if usecols:
+            for chunk in pd.read_csv(file_path, usecols=usecols, chunksize=chunk_size):
+                table_validator.update(chunk)
+        return table_validator
+
+    def validate_csv_chunked(self, file_path: Path, schema: TableSchema,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> ValidationResult:
+        """
+        Validate a CSV file against a schema without loading it whole.
+
+        Args:
+            file_path: CSV file to validate
+            schema: Table schema
+            chunk_size: Rows parsed and checked at a time
+
+        Returns:
+            Validation result merged over all chunks
+        """
+        return self._stream_csv(Path(file_path), schema, chunk_size).result()
+
+    def validate_all_datasets(self, data_dir: Path,
+                              chunk_size: Optional[int] = None) -> Dict[str, ValidationResult]:
+        """
+        Validate all datasets in the data directory.
+
+        Args:
+            data_dir: Directory containing the CSV files
+            chunk_size: Stream each file in chunks of this many rows instead of
+                loading it whole; peak memory is then bounded by the chunk size
+        """
+        if chunk_size:
+            return self._validate_all_datasets_chunked(Path(data_dir), chunk_size)
+
         results = {}
         datasets = {}
         
@@ -359,6 +624,66 @@ class CSVDataValidator(DataValidator):
         
         return results
     
+    def _validate_all_datasets_chunked(self, data_dir: Path, chunk_size: int) -> Dict[str, ValidationResult]:
+        """Streaming ``validate_all_datasets``: referenced tables first, then the tables using them."""
+        results = {}
+        references: Dict[Tuple[str, str], np.ndarray] = {}
+        integrity_errors = []
+        referenced = {}
+        for schema in self.schemas.values():
+            for column in schema.columns:
+                if column.foreign_key:
+                    referenced.setdefault(column.foreign_key[0], []).append(column.foreign_key[1])
+
+        order = sorted(self.schemas, key=lambda name: any(col.foreign_key for col in self.schemas[name].columns))
+        for schema_name in order:
+            schema = self.schemas[schema_name]
+            file_path = data_dir / f"{schema_name}.csv"
+            if not file_path.exists():
+                results[schema_name] = ValidationResult(
+                    is_valid=False,
+                    table_name=schema_name,
+                    errors=[f"File {file_path} not found"],
+                    warnings=[],
+                    row_count=0,
+                    column_count=0,
+                    summary={}
+                )
+                continue
+
+            try:
+                table_validator = self._stream_csv(file_path, schema, chunk_size,
+                                                   references, referenced.get(schema_name))
+                results[schema_name] = table_validator.result()
+                references.update(table_validator.collected_keys())
+                integrity_errors.extend(table_validator.reference_errors())
+                logger.info(f"Validated {schema_name} in {table_validator.chunk_count} chunks: "
+                            f"{len(results[schema_name].errors)} errors, "
+                            f"{len(results[schema_name].warnings)} warnings")
+            except Exception as e:
+                results[schema_name] = ValidationResult(
+                    is_valid=False,
+                    table_name=schema_name,
+                    errors=[f"Failed to load file: {str(e)}"],
+                    warnings=[],
+                    row_count=0,
+                    column_count=0,
+                    summary={}
+                )
+
+        results = {name: results[name] for name in self.schemas if name in results}
+        if integrity_errors:
+            results["referential_integrity"] = ValidationResult(
+                is_valid=False,
+                table_name="referential_integrity",
+                errors=integrity_errors,
+                warnings=[],
+                row_count=0,
+                column_count=0,
+                summary={}
+            )
+        return results
+
     def generate_validation_report(self, results: Dict[str, ValidationResult]) -> str:
         """Generate a comprehensive validation report."""
         report = ["=" * 80]
@@ -401,18 +726,19 @@ class CSVDataValidator(DataValidator):
         return "\n".join(report)
 
 
-def validate_data_directory(data_dir: str) -> Dict[str, ValidationResult]:
+def validate_data_directory(data_dir: str, chunk_size: Optional[int] = None) -> Dict[str, ValidationResult]:
     """
     Main entry point for data validation.
     
     Args:
         data_dir: Path to directory containing CSV files
+        chunk_size: Validate files in streamed chunks of this many rows
         
     Returns:
         Dictionary of validation results for each table
     """
     validator = CSVDataValidator()
-    return validator.validate_all_datasets(Path(data_dir))
+    return validator.validate_all_datasets(Path(data_dir), chunk_size=chunk_size)
 
 
 if __name__ == "__main__":
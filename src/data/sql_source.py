@@ -0,0 +1,354 @@
+"""
+Pooled, parameterized, streaming SQL access for DataLoader.
+
+Queries are written once with ``?`` placeholders and always executed with
+bound parameters; backends translate the placeholder style and keep
+compiled statements per pooled connection (SQLite's statement cache,
+asyncpg's prepared statements). Results are streamed with bounded
+``fetchmany``-style batches straight into column arrays, so a table is
+never held as a list of Python row tuples.
+
+``SQLBackend`` is the extension point: ``SQLiteBackend`` pools
+``aiosqlite`` connections to a local file, ``AsyncpgBackend`` wraps an
+existing ``asyncpg`` pool such as the one in
+``src/api/optimized_endpoints.py``.
+"""
+
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+import numpy as np
+import pandas as pd
+
+from src.core.logging import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+# Indexes the loader's lookups rely on: (name, table, column)
+RECOMMENDED_INDEXES = [
+    ('idx_ratings_user_id', 'ratings', 'user_id'),
+    ('idx_book_tags_goodreads_book_id', 'book_tags', 'goodreads_book_id'),
+    ('idx_books_book_id', 'books', 'book_id'),
+]
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class SQLBackend(ABC):
+    """A pool of connections that runs parameterized queries in batches."""
+
+    @abstractmethod
+    def connection(self):
+        """Async context manager lending a pooled connection."""
+
+    @abstractmethod
+    async def fetch_batches(self, conn, query: str, params: Sequence[Any],
+                            batch_size: int) -> AsyncIterator[Tuple[List[str], List[tuple]]]:
+        """Yield (column names, rows) batches of at most ``batch_size`` rows.
+        
+        An empty result yields one empty batch so the column names are known.
+        """
+
+    @abstractmethod
+    async def execute(self, conn, query: str, params: Sequence[Any] = ()) -> None:
+        """Run a statement that returns no rows."""
+
+    @abstractmethod
+    async def existing_indexes(self, conn) -> Dict[Tuple[str, str], str]:
+        """Map (table, leading column) to index name for existing indexes."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close every pooled connection."""
+
+
+class SQLiteBackend(SQLBackend):
+    """Fixed-size pool of aiosqlite connections to one database file."""
+
+    def __init__(self, path: str, pool_size: int = 4, cached_statements: int = 256):
+        """
+        Args:
+            path: SQLite database file
+            pool_size: Connections opened at most; callers beyond it wait
+            cached_statements: Compiled statements kept per connection, so
+                repeated parameterized queries skip re-preparation
+        """
+        self.path = path
+        self.pool_size = pool_size
+        self.cached_statements = cached_statements
+        self._idle: List[aiosqlite.Connection] = []
+        self._opened = 0
+        self._available: Optional[asyncio.Condition] = None
+        self._loop = None
+
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # aiosqlite connections and conditions are bound to one event loop;
+            # connections left by a previous loop have their threads stopped
+            for conn in self._idle:
+                conn.stop()
+            self._idle, self._opened, self._loop = [], 0, loop
+            self._available = asyncio.Condition()
+        return self._available
+
+    @asynccontextmanager
+    async def connection(self):
+        available = self._condition()
+        async with available:
+            while not self._idle and self._opened >= self.pool_size:
+                await available.wait()
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self._opened += 1
+        if conn is None:
+            try:
+                conn = await aiosqlite.connect(self.path, cached_statements=self.cached_statements)
+            except Exception:
+                async with available:
+                    self._opened -= 1
+                    available.notify()
+                raise
+        try:
+            yield conn
+        finally:
+            async with available:
+                self._idle.append(conn)
+                available.notify()
+
+    async def fetch_batches(self, conn, query, params, batch_size):
+        async with conn.execute(query, tuple(params)) as cursor:
+            columns = [description[0] for description in cursor.description]
+            rows = await cursor.fetchmany(batch_size)
+            yield columns, rows
+            while rows:
+                rows = await cursor.fetchmany(batch_size)
+                if rows:
+                    yield columns, rows
+
+    async def execute(self, conn, query, params=()):
+        await conn.execute(query, tuple(params))
+        await conn.commit()
+
+    async def existing_indexes(self, conn):
+        indexes = {}
+        async with conn.execute(
+            "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'"
+        ) as cursor:
+            entries = await cursor.fetchall()
+        for name, table in entries:
+            if not _IDENTIFIER.match(name):
+                continue
+            async with conn.execute(f"PRAGMA index_info({name})") as cursor:
+                index_columns = await cursor.fetchall()
+            if index_columns:
+                # Only the leading column serves equality lookups on its own
+                leading = min(index_columns, key=lambda column: column[0])[2]
+                indexes[(table, leading)] = name
+        return indexes
+
+    async def close(self):
+        idle, self._idle, self._opened = self._idle, [], 0
+        for conn in idle:
+            await conn.close()
+
+
+class AsyncpgBackend(SQLBackend):
+    """Adapter for an ``asyncpg`` pool; ``?`` placeholders become ``$n``."""
+
+    def __init__(self, pool):
+        """
+        Args:
+            pool: ``asyncpg.Pool`` (e.g. ``DatabaseConnectionPool.pool``)
+        """
+        self.pool = pool
+
+    @staticmethod
+    def _numbered(query: str) -> str:
+        counter = iter(range(1, query.count('?') + 1))
+        return re.sub(r'\?', lambda _: f"${next(counter)}", query)
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self.pool.acquire() as conn:
+            yield conn
+
+    async def fetch_batches(self, conn, query, params, batch_size):
+        # Server-side cursors need a transaction; the statement is prepared
+        # once per connection and reused from asyncpg's statement cache
+        statement = await conn.prepare(self._numbered(query))
+        columns = [attribute.name for attribute in statement.get_attributes()]
+        async with conn.transaction():
+            cursor = await statement.cursor(*params)
+            rows = await cursor.fetch(batch_size)
+            yield columns, [tuple(row) for row in rows]
+            while rows:
+                rows = await cursor.fetch(batch_size)
+                if rows:
+                    yield columns, [tuple(row) for row in rows]
+
+    async def execute(self, conn, query, params=()):
+        await conn.execute(self._numbered(query), *params)
+
+    async def existing_indexes(self, conn):
+        rows = await conn.fetch(
+            "SELECT i.relname AS name, t.relname AS tbl, a.attname AS col "
+            "FROM pg_index x "
+            "JOIN pg_class i ON i.oid = x.indexrelid "
+            "JOIN pg_class t ON t.oid = x.indrelid "
+            "JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = x.indkey[0]"
+        )
+        return {(row['tbl'], row['col']): row['name'] for row in rows}
+
+    async def close(self):
+        # The pool belongs to its creator
+        pass
+
+
+class _ColumnBuffer:
+    """Growable typed array for one result column."""
+
+    def __init__(self, dtype: Optional[np.dtype], capacity: int):
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self.values: Optional[np.ndarray] = None
+        self.size = 0
+        self.capacity = capacity
+
+    def extend(self, values: tuple) -> None:
+        if self.dtype is not None:
+            chunk = np.asarray(values, dtype=self.dtype)
+        elif self.values is not None and self.values.dtype == object:
+            # Text columns keep NULLs as None
+            chunk = np.array(values, dtype=object)
+        else:
+            chunk = self._infer(values)
+        if self.values is None:
+            self.values = np.empty(max(self.capacity, len(chunk)), dtype=chunk.dtype)
+        elif chunk.dtype != self.values.dtype and self.dtype is None:
+            # A later batch needs a wider type (e.g. NULLs in an integer column)
+            wider = np.result_type(self.values.dtype, chunk.dtype)
+            self.values = self.values.astype(wider)
+            chunk = chunk.astype(wider)
+        if self.size + len(chunk) > len(self.values):
+            grown = np.empty(max(2 * len(self.values), self.size + len(chunk)), dtype=self.values.dtype)
+            grown[:self.size] = self.values[:self.size]
+            self.values = grown
+        self.values[self.size:self.size + len(chunk)] = chunk
+        self.size += len(chunk)
+
+    @staticmethod
+    def _infer(values: tuple) -> np.ndarray:
+        if any(value is None for value in values):
+            if all(value is None or isinstance(value, (int, float)) for value in values):
+                return np.array([np.nan if value is None else value for value in values],
+                                dtype=np.float64)
+            return np.array(values, dtype=object)
+        array = np.asarray(values)
+        return array if array.dtype.kind in 'biuf' else np.array(values, dtype=object)
+
+    def result(self) -> np.ndarray:
+        if self.values is None:
+            return np.empty(0, dtype=self.dtype or object)
+        return self.values[:self.size]
+
+
+class SQLSource:
+    """Streams parameterized queries from a pooled backend into DataFrames."""
+
+    def __init__(self, backend: SQLBackend, batch_size: int = 50_000):
+        """
+        Args:
+            backend: Connection pool implementation
+            batch_size: Rows fetched per round trip
+        """
+        self.backend = backend
+        self.batch_size = batch_size
+
+    async def stream(self, query: str, params: Sequence[Any] = (),
+                     batch_size: Optional[int] = None) -> AsyncIterator[Tuple[List[str], List[tuple]]]:
+        """Yield (column names, rows) batches of a parameterized query."""
+        async with self.backend.connection() as conn:
+            async for batch in self.backend.fetch_batches(conn, query, params,
+                                                          batch_size or self.batch_size):
+                yield batch
+
+    async def read_frame(self, query: str, params: Sequence[Any] = (),
+                         dtypes: Optional[Dict[str, Any]] = None,
+                         expected_rows: int = 0) -> pd.DataFrame:
+        """
+        Read a query into a DataFrame through preallocated column arrays.
+
+        Args:
+            query: SQL with ``?`` placeholders
+            params: Values bound to the placeholders
+            dtypes: Column dtypes; others are inferred from the first batch
+            expected_rows: Initial capacity of each column array
+
+        Returns:
+            DataFrame with one array per result column
+        """
+        dtypes = dtypes or {}
+        buffers: Optional[List[_ColumnBuffer]] = None
+        columns: List[str] = []
+        async for columns, rows in self.stream(query, params):
+            if buffers is None:
+                buffers = [_ColumnBuffer(dtypes.get(name), expected_rows) for name in columns]
+            for buffer, values in zip(buffers, zip(*rows)):
+                buffer.extend(values)
+        return pd.DataFrame({name: buffer.result() for name, buffer in zip(columns, buffers or [])},
+                            copy=False)
+
+    async def read_table(self, table: str, columns: Optional[Sequence[str]] = None,
+                         dtypes: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Read a whole table with its column arrays sized from a row count."""
+        table = self._identifier(table)
+        selection = ', '.join(self._identifier(column) for column in columns) if columns else '*'
+        return await self.read_frame(f"SELECT {selection} FROM {table}", dtypes=dtypes,
+                                     expected_rows=await self.count(table))
+
+    async def count(self, table: str) -> int:
+        """Row count of a table, for preallocating its columns."""
+        frame = await self.read_frame(f"SELECT COUNT(*) FROM {self._identifier(table)}")
+        return int(frame.iloc[0, 0])
+
+    async def ensure_indexes(self, create: bool = False) -> List[str]:
+        """
+        Check the indexes the loader's lookups rely on.
+
+        Args:
+            create: Create missing indexes instead of only reporting them
+
+        Returns:
+            ``CREATE INDEX`` statements for indexes that were missing
+        """
+        async with self.backend.connection() as conn:
+            existing = await self.backend.existing_indexes(conn)
+            missing = [
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"
+                for name, table, column in RECOMMENDED_INDEXES
+                if (table, column) not in existing
+            ]
+            for statement in missing:
+                if not create:
+                    logger.warning("Missing recommended index", statement=statement)
+                    continue
+                try:
+                    await self.backend.execute(conn, statement)
+                    logger.info("Created index", statement=statement)
+                except Exception as e:
+                    # e.g. the table does not exist in this database
+                    logger.warning("Could not create index", statement=statement, error=str(e))
+        return missing
+
+    @staticmethod
+    def _identifier(name: str) -> str:
+        if not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name}")
+        return name
+
+    async def close(self) -> None:
+        await self.backend.close()
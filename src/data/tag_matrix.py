@@ -0,0 +1,75 @@
+"""
+Sparse book x tag count matrix built straight from ``book_tags``.
+
+The string path merges books, book_tags and tags (one row per book-tag
+pair), joins each book's tag names into a string and lets
+``TfidfVectorizer`` tokenise it again, dropping the per-tag ``count``.
+Here each book_tags row becomes one ``coo_matrix`` entry, weighted by its
+count, so building the matrix is a handful of vectorised index lookups.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, csr_matrix
+
+from src.core.logging import StructuredLogger
+
+logger = StructuredLogger(__name__)
+
+
+@dataclass
+class TagMatrix:
+    """Book x tag counts with rows in ``books`` order and one column per used tag."""
+    counts: csr_matrix
+    tag_names: np.ndarray
+
+    @property
+    def shape(self):
+        return self.counts.shape
+
+
+def build_tag_matrix(books: pd.DataFrame, book_tags: pd.DataFrame,
+                     tags: Optional[pd.DataFrame] = None) -> TagMatrix:
+    """
+    Build the book x tag count matrix.
+
+    Args:
+        books: Books with a goodreads_book_id column; fixes the row order
+        book_tags: goodreads_book_id, tag_id and (optionally) count columns;
+            without counts every pair counts once
+        tags: tag_id -> tag_name table; tag ids are used as names without it
+
+    Returns:
+        TagMatrix whose columns are the tags used by at least one book, in
+        tag_id order. Repeated book-tag rows are summed; rows for books not
+        in ``books`` are ignored.
+    """
+    rows = pd.Index(books['goodreads_book_id']).get_indexer(book_tags['goodreads_book_id'])
+    tag_ids = book_tags['tag_id'].to_numpy()
+    if 'count' in book_tags.columns:
+        counts = book_tags['count'].to_numpy(dtype=np.float64)
+    else:
+        counts = np.ones(len(book_tags))
+    known = (rows >= 0) & (counts > 0)
+    rows, tag_ids, counts = rows[known], tag_ids[known], counts[known]
+
+    used_tags, columns = np.unique(tag_ids, return_inverse=True)
+    if tags is not None:
+        names = tags.drop_duplicates('tag_id').set_index('tag_id')['tag_name'].reindex(used_tags)
+        # Tags missing from the tags table keep their id as name
+        tag_names = names.where(names.notna(), pd.Series(used_tags, index=names.index).astype(str))
+        tag_names = tag_names.astype(str).to_numpy(dtype=object)
+    else:
+        tag_names = used_tags.astype(str).astype(object)
+
+    # COO -> CSR sums repeated (book, tag) pairs
+    matrix = coo_matrix((counts, (rows, columns)),
+                        shape=(len(books), len(used_tags))).tocsr()
+    matrix.sort_indices()
+
+    logger.info("Book tag matrix built", num_books=matrix.shape[0],
+                num_tags=matrix.shape[1], nnz=matrix.nnz)
+    return TagMatrix(counts=matrix, tag_names=tag_names)
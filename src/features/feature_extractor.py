@@ -1,13 +1,14 @@
 from typing import Dict, Tuple, Optional, List, Any
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+from scipy.sparse import csr_matrix, diags, vstack
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 from src.core.logging import StructuredLogger
 from src.core.exceptions import GoodBooksException
+from src.data.tag_matrix import TagMatrix
 
 logger = StructuredLogger(__name__)
 
@@ -15,24 +16,62 @@ class FeatureExtractionError(GoodBooksException):
     """Raised when feature extraction fails"""
     pass
 
+def _tag_tokens(text: str) -> List[str]:
+    """Analyzer for tag vocabularies: each whitespace-separated tag name is one term."""
+    return text.split()
+
 class FeatureExtractor:
-    def __init__(self, max_features: Optional[int] = None, ngram_range: Tuple[int, int] = (1, 2)):
+    def __init__(
+        self,
+        max_features: Optional[int] = None,
+        ngram_range: Tuple[int, int] = (1, 2),
+        n_neighbors: int = 100,
+        similarity_chunk_size: int = 1024,
+        idf_refresh_interval: Optional[int] = 1000,
+        sublinear_tf: bool = False,
+        n_top_terms: int = 20
+    ):
         """
         Initialize TF-IDF feature extractor with configurable parameters.
         
         Args:
             max_features: Maximum number of features to extract
             ngram_range: Range of n-grams to consider
+            n_neighbors: Nearest neighbours precomputed per book; requests
+                for more are answered by an on-demand similarity row
+            similarity_chunk_size: Books per sparse product while building
+                the neighbour index, bounding peak memory to chunk x N
+            idf_refresh_interval: Books added or changed through update_books
+                before IDF weights are recomputed; None leaves it to
+                explicit refresh_idf calls
+            sublinear_tf: Weight terms by 1 + log(count) instead of the raw
+                count; useful for book_tags counts, which span several orders
+                of magnitude
+            n_top_terms: Highest weighted terms precomputed per book for
+                explanations; requests for more read the TF-IDF row
         """
         self.tfidf = TfidfVectorizer(
             stop_words='english',
             max_features=max_features,
             ngram_range=ngram_range,
             lowercase=True,
-            strip_accents='unicode'
+            strip_accents='unicode',
+            sublinear_tf=sublinear_tf
         )
+        self.n_neighbors = n_neighbors
+        self.similarity_chunk_size = similarity_chunk_size
+        self.idf_refresh_interval = idf_refresh_interval
+        self.n_top_terms = n_top_terms
         self.tfidf_matrix: Optional[np.ndarray] = None
-        self.similarity_matrix: Optional[np.ndarray] = None
+        self.document_frequencies: Optional[np.ndarray] = None
+        self._term_counts: Optional[csr_matrix] = None
+        self._pending_idf_updates = 0
+        self.neighbor_indices: Optional[np.ndarray] = None
+        self.neighbor_scores: Optional[np.ndarray] = None
+        self.top_term_ids: Optional[np.ndarray] = None
+        self.top_term_weights: Optional[np.ndarray] = None
+        self._feature_names: Optional[np.ndarray] = None
+        self._normalized_matrix: Optional[csr_matrix] = None
         self.book_indices: Dict[str, int] = {}
         self._executor = ThreadPoolExecutor(max_workers=4)
     
@@ -61,14 +100,18 @@ class FeatureExtractor:
             
             # Check for empty or invalid tag data
             tags_series = books['all_tags'].fillna('')
+            self._pending_idf_updates = 0
             if tags_series.str.strip().eq('').all():
                 # Handle case where all tags are empty by creating empty matrix
                 logger.warning("All tag data is empty, creating empty feature matrix")
                 self.tfidf_matrix = csr_matrix((len(books), 0))
+                self._term_counts = csr_matrix((len(books), 0))
+                self.document_frequencies = np.zeros(0, dtype=np.int64)
                 self.book_indices = {title: idx for idx, title in enumerate(books['title'])}
                 
-                # Create empty similarity matrix
-                self.similarity_matrix = np.zeros((len(books), len(books)))
+                # All similarities are zero; the index still lists neighbours
+                self._build_neighbor_index(self.tfidf_matrix)
+                self._build_top_terms(self.tfidf_matrix)
                 
                 logger.info(
                     "TF-IDF feature extraction completed (empty matrix)",
@@ -83,7 +126,7 @@ class FeatureExtractor:
             try:
                 self.tfidf_matrix = await loop.run_in_executor(
                     self._executor, 
-                    self.tfidf.fit_transform, 
+                    self._fit_tfidf, 
                     tags_series
                 )
             except ValueError as ve:
@@ -91,15 +134,18 @@ class FeatureExtractor:
                     # Create a zero matrix for empty vocabulary case
                     logger.warning("Empty vocabulary detected, creating zero feature matrix")
                     self.tfidf_matrix = csr_matrix((len(books), 0))
+                    self._term_counts = csr_matrix((len(books), 0))
+                    self.document_frequencies = np.zeros(0, dtype=np.int64)
                 else:
                     raise
             
-            # Compute similarity matrix asynchronously
-            self.similarity_matrix = await loop.run_in_executor(
+            # Build the top-K neighbour index asynchronously
+            await loop.run_in_executor(
                 self._executor,
-                cosine_similarity,
+                self._build_neighbor_index,
                 self.tfidf_matrix
             )
+            self._build_top_terms(self.tfidf_matrix)
             
             # Create book title to index mapping
             self.book_indices = {title: idx for idx, title in enumerate(books['title'])}
@@ -137,6 +183,412 @@ class FeatureExtractor:
         except Exception as e:
             logger.error("Synchronous feature extraction failed", error=str(e))
             raise FeatureExtractionError(f"Error in synchronous feature extraction: {str(e)}") from e
+    
+    async def fit_tag_matrix_async(self, books: pd.DataFrame,
+                                   tag_matrix: TagMatrix) -> Tuple[csr_matrix, Dict[str, int]]:
+        """
+        Generate TF-IDF features from a book x tag count matrix asynchronously.
+        
+        The vocabulary is the matrix's tag names and the weights are computed
+        with sparse operations on its counts, so no tag strings are built or
+        tokenised. Later update_books calls read 'all_tags' as whitespace
+        separated tag names, each occurrence counting once.
+        
+        Args:
+            books: DataFrame with a 'title' column, rows aligned with the matrix
+            tag_matrix: Counts from ``src.data.tag_matrix.build_tag_matrix``
+            
+        Returns:
+            Tuple of TF-IDF matrix and book indices mapping
+            
+        Raises:
+            FeatureExtractionError: If feature extraction fails
+        """
+        try:
+            logger.info("Starting async tag matrix feature extraction", num_books=len(books),
+                        num_tags=tag_matrix.shape[1])
+            
+            if books.empty:
+                raise FeatureExtractionError("Books DataFrame cannot be empty")
+            if tag_matrix.shape[0] != len(books):
+                raise FeatureExtractionError(
+                    f"Tag matrix has {tag_matrix.shape[0]} rows for {len(books)} books"
+                )
+            
+            self._pending_idf_updates = 0
+            loop = asyncio.get_event_loop()
+            self.tfidf_matrix = await loop.run_in_executor(
+                self._executor, self._fit_counts, tag_matrix
+            )
+            await loop.run_in_executor(
+                self._executor, self._build_neighbor_index, self.tfidf_matrix
+            )
+            self._build_top_terms(self.tfidf_matrix)
+            self.book_indices = {title: idx for idx, title in enumerate(books['title'])}
+            
+            logger.info(
+                "Tag matrix feature extraction completed",
+                matrix_shape=self.tfidf_matrix.shape,
+                num_features=self.tfidf_matrix.shape[1],
+                num_books=len(self.book_indices)
+            )
+            return self.tfidf_matrix, self.book_indices
+            
+        except Exception as e:
+            logger.error("Tag matrix feature extraction failed", error=str(e), exc_info=True)
+            raise FeatureExtractionError(f"Error in tag matrix feature extraction: {str(e)}") from e
+    
+    def fit_tag_matrix(self, books: pd.DataFrame,
+                       tag_matrix: TagMatrix) -> Tuple[csr_matrix, Dict[str, int]]:
+        """
+        Synchronous wrapper for fit_tag_matrix_async.
+        
+        Args:
+            books: DataFrame with a 'title' column, rows aligned with the matrix
+            tag_matrix: Book x tag counts
+            
+        Returns:
+            Tuple of TF-IDF matrix and book indices mapping
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.fit_tag_matrix_async(books, tag_matrix))
+        finally:
+            loop.close()
+    
+    def use_tag_vocabulary(self, tag_names) -> None:
+        """Make the vectorizer treat each tag name as one term of a fixed vocabulary."""
+        self.tfidf.set_params(analyzer=_tag_tokens)
+        self.tfidf.vocabulary_ = {name: idx for idx, name in enumerate(tag_names)}
+        self._feature_names = None
+    
+    @property
+    def uses_tag_vocabulary(self) -> bool:
+        return self.tfidf.analyzer is _tag_tokens
+    
+    def _fit_counts(self, tag_matrix: TagMatrix) -> csr_matrix:
+        """Adopt the tag vocabulary and counts, then weight them with smoothed IDF."""
+        self.use_tag_vocabulary(tag_matrix.tag_names)
+        self._term_counts = csr_matrix(tag_matrix.counts, dtype=np.float64)
+        self.document_frequencies = np.bincount(self._term_counts.indices,
+                                                minlength=self._term_counts.shape[1])
+        if self._term_counts.shape[1] > 0:
+            self.tfidf.idf_ = self._compute_idf()
+        return self._weight(self._term_counts)
+    
+    def _fit_tfidf(self, tags: pd.Series) -> csr_matrix:
+        """
+        Fit the vocabulary and return TF-IDF rows, keeping raw term counts.
+        
+        The counts and document frequencies are retained so update_books can
+        add books against the same vocabulary and refresh_idf can reweight
+        without re-reading every book's tags.
+        """
+        tfidf_matrix = self.tfidf.fit_transform(tags)
+        self._feature_names = None
+        counts = csr_matrix(CountVectorizer.transform(self.tfidf, tags))
+        self._term_counts = counts
+        self.document_frequencies = np.bincount(counts.indices, minlength=counts.shape[1])
+        return tfidf_matrix
+    
+    def _compute_idf(self) -> np.ndarray:
+        """Smoothed IDF from the persisted document frequencies."""
+        n_documents = self._term_counts.shape[0]
+        return np.log((1 + n_documents) / (1 + self.document_frequencies)) + 1
+    
+    def _weight(self, counts: csr_matrix) -> csr_matrix:
+        """Apply the current IDF to raw counts and L2-normalise the rows."""
+        if counts.shape[1] == 0:
+            return csr_matrix(counts.shape)
+        counts = csr_matrix(counts, dtype=np.float64, copy=True)
+        if self.tfidf.sublinear_tf:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1
+        return normalize(csr_matrix(counts.multiply(self.tfidf.idf_)), norm='l2')
+    
+    @staticmethod
+    def _replace_rows(matrix: csr_matrix, rows: np.ndarray, new_rows: csr_matrix,
+                      n_rows: int) -> csr_matrix:
+        """Copy of ``matrix`` grown to ``n_rows`` with ``rows`` replaced by ``new_rows``."""
+        if n_rows > matrix.shape[0]:
+            matrix = vstack([matrix, csr_matrix((n_rows - matrix.shape[0], matrix.shape[1]),
+                                                dtype=matrix.dtype)])
+        keep = np.ones(n_rows, dtype=matrix.dtype)
+        keep[rows] = 0
+        placement = csr_matrix((np.ones(len(rows), dtype=matrix.dtype), (rows, np.arange(len(rows)))),
+                               shape=(n_rows, len(rows)))
+        result = csr_matrix(diags(keep) @ matrix + placement @ new_rows.astype(matrix.dtype))
+        result.eliminate_zeros()
+        return result
+    
+    async def update_books_async(self, books: pd.DataFrame,
+                                 rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Add new books or re-featurise changed ones without a full refit.
+        
+        Books are transformed against the fitted vocabulary (terms outside
+        it are ignored until the next fit_transform) with the current IDF,
+        and only the neighbour lists they can affect are updated. Document
+        frequencies are kept current; the IDF itself is refreshed once
+        ``idf_refresh_interval`` books have been updated, or by refresh_idf.
+        
+        Args:
+            books: DataFrame with 'title' and 'all_tags' columns
+            rows: Row positions to overwrite, with -1 for books appended in
+                order (each -1 is a distinct book); by default books are
+                matched on title and a title repeated in the batch keeps
+                its last version
+            
+        Returns:
+            Row position of each input book
+            
+        Raises:
+            FeatureExtractionError: If features have not been fitted or the update fails
+        """
+        if self._term_counts is None or self.neighbor_indices is None:
+            raise FeatureExtractionError("Features must be fitted before updating books")
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._executor, self._update_books, books, rows)
+        except FeatureExtractionError:
+            raise
+        except Exception as e:
+            logger.error("Incremental book update failed", error=str(e))
+            raise FeatureExtractionError(f"Error updating books: {str(e)}") from e
+    
+    def update_books(self, books: pd.DataFrame, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Synchronous wrapper for update_books_async.
+        
+        Args:
+            books: DataFrame with 'title' and 'all_tags' columns
+            rows: Row positions to overwrite, -1 for new books
+            
+        Returns:
+            Row position of each input book
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(self.update_books_async(books, rows))
+        finally:
+            loop.close()
+    
+    def _update_books(self, books: pd.DataFrame, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Featurise ``books`` into their rows and patch the neighbour index."""
+        n_old = self._term_counts.shape[0]
+        titles = books['title'].tolist()
+        match_titles = rows is None
+        if match_titles:
+            rows = np.array([self.book_indices.get(title, -1) for title in titles], dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64).copy()
+        is_new = rows < 0
+        if match_titles:
+            # A new title repeated in the batch gets a single row
+            new_slots, _ = pd.factorize(pd.Series(titles, dtype=object)[is_new], use_na_sentinel=False)
+        else:
+            new_slots = np.arange(is_new.sum())
+        rows[is_new] = n_old + new_slots
+        n_total = n_old + (int(new_slots.max()) + 1 if len(new_slots) else 0)
+        
+        # A row listed twice in one batch takes its last version
+        _, last = np.unique(rows[::-1], return_index=True)
+        batch = np.sort(len(rows) - 1 - last)
+        target_rows = rows[batch]
+        changed_rows = target_rows[target_rows < n_old]
+        
+        texts = books['all_tags'].fillna('').iloc[batch]
+        if self._term_counts.shape[1] > 0:
+            counts = csr_matrix(CountVectorizer.transform(self.tfidf, texts))
+        else:
+            counts = csr_matrix((len(batch), 0))
+        
+        # Document frequencies follow the counts: retire old rows, add new ones
+        n_terms = counts.shape[1]
+        old_presence = np.bincount(self._term_counts[changed_rows].indices, minlength=n_terms)
+        self.document_frequencies = self.document_frequencies - old_presence + \
+                                    np.bincount(counts.indices, minlength=n_terms)
+        self._term_counts = self._replace_rows(self._term_counts, target_rows, counts, n_total)
+        new_tfidf = self._weight(counts)
+        self.tfidf_matrix = self._replace_rows(csr_matrix(self.tfidf_matrix), target_rows,
+                                               new_tfidf, n_total)
+        normalized = self._replace_rows(self._normalized_matrix, target_rows,
+                                        new_tfidf.astype(np.float32), n_total)
+        
+        for position, row in zip(batch, target_rows):
+            self.book_indices[titles[position]] = int(row)
+        
+        self._pending_idf_updates += len(batch)
+        if self.idf_refresh_interval is not None and \
+                self._pending_idf_updates >= self.idf_refresh_interval:
+            self.refresh_idf()
+        else:
+            self._update_top_terms(new_tfidf, target_rows, n_total)
+            if min(self.n_neighbors, n_total - 1) != self.neighbor_indices.shape[1]:
+                # The neighbour count is capped by catalogue size; widen by rebuilding
+                self._build_neighbor_index(self.tfidf_matrix)
+            else:
+                self._update_neighbor_index(normalized, target_rows, changed_rows)
+        
+        logger.info(
+            "Books updated incrementally",
+            num_updated=len(batch),
+            num_new=int(n_total - n_old),
+            num_books=n_total
+        )
+        return rows
+    
+    def _update_neighbor_index(self, normalized: csr_matrix, target_rows: np.ndarray,
+                               changed_rows: np.ndarray) -> None:
+        """
+        Patch the top-K lists for re-featurised ``target_rows``.
+        
+        Updated books get fresh lists; books that listed a changed book are
+        recomputed since its old score may no longer hold; every other book
+        merges the updated books' scores into its list only when one beats
+        its current K-th neighbour.
+        """
+        n_total = normalized.shape[0]
+        n_old, k = self.neighbor_indices.shape
+        neighbor_indices = np.vstack([self.neighbor_indices,
+                                      np.zeros((n_total - n_old, k), dtype=np.int32)])
+        neighbor_scores = np.vstack([self.neighbor_scores,
+                                     np.zeros((n_total - n_old, k), dtype=np.float32)])
+        transposed = normalized.T.tocsr()
+        
+        stale = np.flatnonzero(np.isin(self.neighbor_indices, changed_rows).any(axis=1))
+        recompute = np.union1d(target_rows, stale)
+        for start in range(0, len(recompute), self.similarity_chunk_size):
+            chunk = recompute[start:start + self.similarity_chunk_size]
+            block = (normalized[chunk] @ transposed).toarray()
+            block[np.arange(len(chunk)), chunk] = -np.inf  # A book is not its own neighbour
+            neighbor_indices[chunk], neighbor_scores[chunk] = self._top_k_rows(block, k)
+        
+        if k > 0:
+            untouched = np.ones(n_total, dtype=bool)
+            untouched[recompute] = False
+            for start in range(0, len(target_rows), self.similarity_chunk_size):
+                chunk = target_rows[start:start + self.similarity_chunk_size]
+                scores = (normalized @ normalized[chunk].T).toarray()
+                affected = np.flatnonzero(untouched & (scores.max(axis=1) > neighbor_scores[:, -1]))
+                if len(affected) == 0:
+                    continue
+                candidates = np.hstack([neighbor_indices[affected],
+                                        np.broadcast_to(chunk, (len(affected), len(chunk)))])
+                candidate_scores = np.hstack([neighbor_scores[affected], scores[affected]])
+                order, top_scores = self._top_k_rows(candidate_scores, k)
+                neighbor_indices[affected] = np.take_along_axis(candidates, order, axis=1)
+                neighbor_scores[affected] = top_scores
+        
+        self._normalized_matrix = normalized
+        self.neighbor_indices = neighbor_indices
+        self.neighbor_scores = neighbor_scores
+    
+    def refresh_idf(self) -> None:
+        """
+        Recompute IDF from the current document frequencies and re-weight every book.
+        
+        Incremental updates reuse the IDF of the last refresh; call this on
+        a schedule (or let ``idf_refresh_interval`` trigger it) to fold
+        accumulated catalogue changes into all weights and neighbour lists.
+        """
+        if self._term_counts is None:
+            raise FeatureExtractionError("Features must be fitted before refreshing IDF")
+        if self._term_counts.shape[1] > 0:
+            self.tfidf.idf_ = self._compute_idf()
+        self.tfidf_matrix = self._weight(self._term_counts)
+        self._build_neighbor_index(self.tfidf_matrix)
+        self._build_top_terms(self.tfidf_matrix)
+        self._pending_idf_updates = 0
+        logger.info("IDF refreshed", num_books=self._term_counts.shape[0])
+    
+    def _build_neighbor_index(self, matrix: csr_matrix) -> None:
+        """
+        Precompute each book's top-K cosine neighbours without materializing N x N.
+        
+        Rows are L2-normalized once, then similarities are produced one chunk
+        of books at a time with a sparse product, so peak memory is
+        ``similarity_chunk_size x N`` instead of the full matrix.
+        """
+        normalized = csr_matrix(matrix, dtype=np.float32)
+        if normalized.shape[1] > 0:
+            normalized = normalize(normalized, norm='l2')
+        n_books = normalized.shape[0]
+        k = max(0, min(self.n_neighbors, n_books - 1))
+        
+        neighbor_indices = np.empty((n_books, k), dtype=np.int32)
+        neighbor_scores = np.empty((n_books, k), dtype=np.float32)
+        transposed = normalized.T.tocsr()
+        
+        for start in range(0, n_books, self.similarity_chunk_size):
+            stop = min(start + self.similarity_chunk_size, n_books)
+            block = (normalized[start:stop] @ transposed).toarray()
+            rows = np.arange(stop - start)
+            block[rows, start + rows] = -np.inf  # A book is not its own neighbour
+            neighbor_indices[start:stop], neighbor_scores[start:stop] = self._top_k_rows(block, k)
+        
+        self._normalized_matrix = normalized
+        self.neighbor_indices = neighbor_indices
+        self.neighbor_scores = neighbor_scores
+    
+    def _build_top_terms(self, matrix: csr_matrix) -> None:
+        """Precompute each book's highest weighted term ids and weights."""
+        self.top_term_ids, self.top_term_weights = self._top_terms_of(matrix, self.n_top_terms)
+    
+    def _update_top_terms(self, new_rows: csr_matrix, target_rows: np.ndarray, n_rows: int) -> None:
+        """Grow the top-term arrays to ``n_rows`` and replace ``target_rows``."""
+        n_old, width = self.top_term_ids.shape
+        if n_rows > n_old:
+            self.top_term_ids = np.vstack([self.top_term_ids,
+                                           np.full((n_rows - n_old, width), -1, dtype=np.int32)])
+            self.top_term_weights = np.vstack([self.top_term_weights,
+                                               np.zeros((n_rows - n_old, width), dtype=np.float32)])
+        elif not self.top_term_ids.flags.writeable:
+            # Memory-mapped artifacts are read-only
+            self.top_term_ids = self.top_term_ids.copy()
+            self.top_term_weights = self.top_term_weights.copy()
+        self.top_term_ids[target_rows], self.top_term_weights[target_rows] = \
+            self._top_terms_of(new_rows, width)
+    
+    @staticmethod
+    def _top_terms_of(matrix: csr_matrix, n_terms: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row-wise top ``n_terms`` (term id, weight) pairs of a sparse matrix.
+        
+        Ids are int32 padded with -1 and weights float32 padded with 0;
+        ties keep vocabulary order.
+        """
+        matrix = csr_matrix(matrix)
+        n_rows = matrix.shape[0]
+        ids = np.full((n_rows, n_terms), -1, dtype=np.int32)
+        weights = np.zeros((n_rows, n_terms), dtype=np.float32)
+        if n_terms <= 0 or matrix.nnz == 0:
+            return ids, weights
+        
+        rows = np.repeat(np.arange(n_rows), np.diff(matrix.indptr))
+        order = np.lexsort((matrix.indices, -matrix.data, rows))
+        rank = np.arange(len(order)) - matrix.indptr[rows[order]]
+        top = rank < n_terms
+        entries = order[top]
+        positive = matrix.data[entries] > 0
+        entries, rank = entries[positive], rank[top][positive]
+        ids[rows[entries], rank] = matrix.indices[entries]
+        weights[rows[entries], rank] = matrix.data[entries]
+        return ids, weights
+    
+    @staticmethod
+    def _top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row-wise top-k column indices and scores, best first."""
+        if k <= 0:
+            empty = np.empty((scores.shape[0], 0))
+            return empty.astype(np.int32), empty.astype(np.float32)
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        return (np.take_along_axis(candidates, order, axis=1),
+                np.take_along_axis(candidate_scores, order, axis=1))
 
     async def get_similar_books_async(
         self, 
@@ -160,7 +612,7 @@ class FeatureExtractor:
         """
         try:
             # Validate that features have been fitted
-            if self.similarity_matrix is None or not self.book_indices:
+            if self.neighbor_indices is None or not self.book_indices:
                 raise FeatureExtractionError("Features must be fitted before getting similarities")
             
             # Find book index
@@ -172,19 +624,16 @@ class FeatureExtractor:
             
             # Get similarity scores asynchronously
             loop = asyncio.get_event_loop()
-            sim_scores = await loop.run_in_executor(
+            book_indices, sim_scores = await loop.run_in_executor(
                 self._executor,
                 self._compute_similarity_scores,
-                idx
+                idx,
+                n_recommendations
             )
             
-            # Get top N similar books (excluding the input book)
-            sim_scores = sim_scores[1:n_recommendations + 1]
-            book_indices = [i[0] for i in sim_scores]
-            
             # Return recommended books with similarity scores
             recommendations = books.iloc[book_indices][['title', 'authors', 'average_rating']].copy()
-            recommendations['similarity_score'] = [score for _, score in sim_scores]
+            recommendations['similarity_score'] = sim_scores
             
             logger.info(
                 "Similar books computed",
@@ -200,10 +649,71 @@ class FeatureExtractor:
             logger.error("Error getting similar books", book_title=book_title, error=str(e))
             raise FeatureExtractionError(f"Error getting similar books: {str(e)}") from e
     
-    def _compute_similarity_scores(self, idx: int) -> List[Tuple[int, float]]:
-        """Helper method to compute similarity scores for a book index."""
-        sim_scores = list(enumerate(self.similarity_matrix[idx]))
-        return sorted(sim_scores, key=lambda x: x[1], reverse=True)
+    def get_similar_books(
+        self, 
+        book_title: str, 
+        books: pd.DataFrame, 
+        n_recommendations: int = 5
+    ) -> pd.DataFrame:
+        """
+        Synchronous wrapper for get_similar_books_async.
+        
+        Args:
+            book_title: Title of the book to find similarities for
+            books: DataFrame containing book data
+            n_recommendations: Number of recommendations to return
+            
+        Returns:
+            DataFrame with recommended books and similarity scores
+        """
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(
+                self.get_similar_books_async(book_title, books, n_recommendations)
+            )
+        finally:
+            loop.close()
+    
+    def get_neighbor_rows(self, book_title: str, n_recommendations: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row positions and similarity scores of a book's nearest neighbours.
+        
+        Array-level counterpart of get_similar_books for callers that index
+        book data themselves; unknown titles yield empty arrays.
+        
+        Args:
+            book_title: Title of the book to find similarities for
+            n_recommendations: Number of neighbours to return
+            
+        Returns:
+            Tuple of (row positions, similarity scores), best first
+            
+        Raises:
+            FeatureExtractionError: If features have not been fitted
+        """
+        if self.neighbor_indices is None or not self.book_indices:
+            raise FeatureExtractionError("Features must be fitted before getting similarities")
+        if book_title not in self.book_indices:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        return self._compute_similarity_scores(self.book_indices[book_title], n_recommendations)
+    
+    def _compute_similarity_scores(self, idx: int, n_recommendations: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-N neighbour indices and scores for a book index, excluding the book itself.
+        
+        Served from the precomputed index when N fits within it; larger
+        requests fall back to computing the book's similarity row on demand.
+        """
+        n_recommendations = max(0, n_recommendations)
+        if n_recommendations <= self.neighbor_indices.shape[1]:
+            return (self.neighbor_indices[idx, :n_recommendations],
+                    self.neighbor_scores[idx, :n_recommendations])
+        
+        row = (self._normalized_matrix[idx] @ self._normalized_matrix.T).toarray()
+        row[0, idx] = -np.inf
+        k = min(n_recommendations, row.shape[1] - 1)
+        indices, scores = self._top_k_rows(row, k)
+        return indices[0], scores[0]
     
     async def get_feature_importance_async(self, book_title: str) -> Dict[str, float]:
         """
@@ -252,17 +762,77 @@ class FeatureExtractor:
     
     def _compute_feature_importance(self, idx: int) -> Dict[str, float]:
         """Helper method to compute feature importance for a book index."""
-        feature_importance = dict(zip(
-            self.tfidf.get_feature_names_out(),
-            self.tfidf_matrix[idx].toarray()[0]
-        ))
-        
-        # Sort by importance and filter out zero values
-        return dict(sorted(
-            {k: v for k, v in feature_importance.items() if v > 0}.items(),
-            key=lambda x: x[1],
-            reverse=True
-        ))
+        row = csr_matrix(self.tfidf_matrix[idx])
+        ids, weights = self._top_terms_of(row, row.nnz)
+        return self._terms_dict(ids[0], weights[0])
+    
+    def _terms_dict(self, ids: np.ndarray, weights: np.ndarray) -> Dict[str, float]:
+        names = self.feature_names
+        return {names[term]: float(weight) for term, weight in zip(ids.tolist(), weights.tolist())
+                if term >= 0}
+    
+    def get_top_term_rows(self, rows: np.ndarray,
+                          n_terms: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Highest weighted term ids and weights of book rows, best first.
+        
+        Served as a slice of the precomputed arrays when ``n_terms`` fits
+        within them; larger requests rank the books' TF-IDF rows on demand.
+        
+        Args:
+            rows: Row positions of the books
+            n_terms: Terms per book (default: all precomputed)
+            
+        Returns:
+            Tuple of (int32 term ids padded with -1, float32 weights padded with 0)
+            
+        Raises:
+            FeatureExtractionError: If features have not been fitted
+        """
+        if self.top_term_ids is None:
+            raise FeatureExtractionError("Features must be fitted before getting top terms")
+        rows = np.asarray(rows, dtype=np.int64)
+        if n_terms is None or n_terms <= self.top_term_ids.shape[1]:
+            n_terms = self.top_term_ids.shape[1] if n_terms is None else max(0, n_terms)
+            return self.top_term_ids[rows, :n_terms], self.top_term_weights[rows, :n_terms]
+        return self._top_terms_of(csr_matrix(self.tfidf_matrix)[rows], n_terms)
+    
+    def get_top_terms(self, book_title: str, n_terms: int = 5) -> Dict[str, float]:
+        """
+        Highest weighted terms of a book, for explanations.
+        
+        Args:
+            book_title: Title of the book to explain
+            n_terms: Number of terms to return
+            
+        Returns:
+            Dictionary mapping terms to TF-IDF weights, highest first; empty
+            for unknown titles
+        """
+        return self.get_top_terms_batch([book_title], n_terms)[0]
+    
+    def get_top_terms_batch(self, book_titles: List[str], n_terms: int = 5) -> List[Dict[str, float]]:
+        """
+        Highest weighted terms of several books with one array lookup.
+        
+        Args:
+            book_titles: Titles of the books to explain, e.g. a recommendation list
+            n_terms: Number of terms per book
+            
+        Returns:
+            One term -> weight dictionary per title, in input order; empty
+            for unknown titles
+            
+        Raises:
+            FeatureExtractionError: If features have not been fitted
+        """
+        rows = np.array([self.book_indices.get(title, -1) for title in book_titles], dtype=np.int64)
+        known = rows >= 0
+        ids, weights = self.get_top_term_rows(rows[known], n_terms)
+        terms: List[Dict[str, float]] = [{} for _ in book_titles]
+        for position, book_ids, book_weights in zip(np.flatnonzero(known), ids, weights):
+            terms[position] = self._terms_dict(book_ids, book_weights)
+        return terms
     
     def get_vocabulary_size(self) -> int:
         """Get the size of the fitted vocabulary."""
@@ -270,15 +840,44 @@ class FeatureExtractor:
             return 0
         return self.tfidf_matrix.shape[1]
     
+    @property
+    def normalized_matrix(self) -> Optional[csr_matrix]:
+        """L2-normalized TF-IDF rows; their dot products are cosine similarities."""
+        return self._normalized_matrix
+    
+    @property
+    def feature_names(self) -> np.ndarray:
+        """Term of each TF-IDF column, built once per fitted vocabulary."""
+        if self._feature_names is None:
+            vocabulary = getattr(self.tfidf, 'vocabulary_', None) or {}
+            names = np.empty(len(vocabulary), dtype=object)
+            names[list(vocabulary.values())] = list(vocabulary.keys())
+            self._feature_names = names
+        return self._feature_names
+    
     def get_feature_names(self) -> List[str]:
         """Get the feature names from the fitted TF-IDF vectorizer."""
-        try:
-            if hasattr(self.tfidf, 'get_feature_names_out'):
-                return self.tfidf.get_feature_names_out().tolist()
-            return []
-        except Exception:
-            # Handle case when vectorizer is not fitted
-            return []
+        return self.feature_names.tolist()
+    
+    def __getstate__(self):
+        """Drop the thread pool, which cannot be pickled."""
+        state = self.__dict__.copy()
+        state.pop('_executor', None)
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__dict__.setdefault('idf_refresh_interval', 1000)
+        self.__dict__.setdefault('document_frequencies', None)
+        self.__dict__.setdefault('_term_counts', None)
+        self.__dict__.setdefault('_pending_idf_updates', 0)
+        self.__dict__.setdefault('n_top_terms', 20)
+        self.__dict__.setdefault('_feature_names', None)
+        if self.__dict__.get('top_term_ids') is None:
+            self.top_term_ids = self.top_term_weights = None
+            if self.tfidf_matrix is not None:
+                self._build_top_terms(self.tfidf_matrix)
+        self._executor = ThreadPoolExecutor(max_workers=4)
     
     def __del__(self):
         """Cleanup thread pool executor."""
@@ -0,0 +1,376 @@
+"""
+Two-stage candidate generation and re-ranking for hybrid recommendations.
+
+Stage one runs cheap generators (collaborative top-N, content neighbours of
+books the user rated, popularity) that each propose a bounded set of books.
+Stage two re-scores only the merged candidates with the hybrid weights, so
+per-request cost follows the candidate budget rather than catalogue size.
+"""
+
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.models.collaborative_filter import CollaborativeFilter
+from src.models.hybrid_recommender import HybridRecommender
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RecommendationContext:
+    """Per-request inputs shared by every generator and the re-ranker."""
+    user_id: Optional[int]
+    book_title: Optional[str]
+    user_index: Optional[int]
+    seed_rows: np.ndarray
+    excluded_rows: np.ndarray
+
+
+@dataclass
+class CandidateSet:
+    """Candidate book rows proposed by a single generator."""
+    source: str
+    rows: np.ndarray
+    scores: np.ndarray
+
+
+def _empty_candidates(source: str) -> CandidateSet:
+    return CandidateSet(source, np.empty(0, dtype=np.int64), np.empty(0))
+
+
+def _top_n(scores: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the n highest scores, best first."""
+    return CollaborativeFilter._top_k(scores[np.newaxis, :], n)[0][0]
+
+
+class CandidateGenerator(ABC):
+    """Base class for stage-one generators."""
+    name = "base"
+
+    def __init__(self, n_candidates: int):
+        self.n_candidates = n_candidates
+
+    def prepare(self, pipeline: "CandidateRerankPipeline") -> None:
+        """Precompute anything that does not depend on the request."""
+
+    @abstractmethod
+    def generate(self, pipeline: "CandidateRerankPipeline",
+                 context: RecommendationContext) -> CandidateSet:
+        """Propose at most ``n_candidates`` book rows for the request."""
+
+
+class CollaborativeCandidates(CandidateGenerator):
+    """Top-N books by collaborative filtering score for the user."""
+    name = "collaborative"
+
+    def __init__(self, n_candidates: int = 200):
+        super().__init__(n_candidates)
+
+    def generate(self, pipeline: "CandidateRerankPipeline",
+                 context: RecommendationContext) -> CandidateSet:
+        if context.user_index is None:
+            return _empty_candidates(self.name)
+
+        recs = pipeline.recommender.collab_recommender.get_recommendations_batch(
+            [context.user_id], n_recommendations=self.n_candidates, exclude_seen=True
+        )[0]
+        if not recs:
+            return _empty_candidates(self.name)
+
+        book_ids, scores = zip(*recs)
+        rows = pipeline.recommender.rows_for_book_ids(np.asarray(book_ids))
+        known = rows >= 0
+        return CandidateSet(self.name, rows[known], np.asarray(scores, dtype=np.float64)[known])
+
+
+class ContentNeighbourCandidates(CandidateGenerator):
+    """Precomputed content neighbours of the seed books (rated books and query title)."""
+    name = "content"
+
+    def __init__(self, n_candidates: int = 200, max_seeds: int = 50, per_seed: int = 20):
+        super().__init__(n_candidates)
+        self.max_seeds = max_seeds
+        self.per_seed = per_seed
+
+    def generate(self, pipeline: "CandidateRerankPipeline",
+                 context: RecommendationContext) -> CandidateSet:
+        extractor = pipeline.recommender.content_recommender
+        seeds = context.seed_rows[:self.max_seeds]
+        if seeds.size == 0 or extractor.neighbor_indices is None:
+            return _empty_candidates(self.name)
+
+        width = min(self.per_seed, extractor.neighbor_indices.shape[1])
+        neighbours = extractor.neighbor_indices[seeds, :width].ravel()
+        similarities = extractor.neighbor_scores[seeds, :width].ravel()
+        if neighbours.size == 0:
+            return _empty_candidates(self.name)
+
+        # A book reachable from several seeds keeps its best similarity
+        rows, inverse = np.unique(neighbours, return_inverse=True)
+        best = np.full(len(rows), -np.inf)
+        np.maximum.at(best, inverse, similarities)
+
+        top = _top_n(best, self.n_candidates)
+        return CandidateSet(self.name, rows[top].astype(np.int64), best[top])
+
+
+class PopularityCandidates(CandidateGenerator):
+    """Most-rated books in the training data, computed once."""
+    name = "popularity"
+
+    def __init__(self, n_candidates: int = 100):
+        super().__init__(n_candidates)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._scores = np.empty(0)
+
+    def prepare(self, pipeline: "CandidateRerankPipeline") -> None:
+        popularity = pipeline.popularity
+        top = _top_n(popularity, self.n_candidates)
+        top = top[popularity[top] > 0]
+        self._rows = top.astype(np.int64)
+        self._scores = popularity[top]
+
+    def generate(self, pipeline: "CandidateRerankPipeline",
+                 context: RecommendationContext) -> CandidateSet:
+        return CandidateSet(self.name, self._rows, self._scores)
+
+
+class CandidateRerankPipeline:
+    """
+    Bounded-cost hybrid recommendations over a fitted HybridRecommender.
+
+    Stage one unions the candidates of every generator; stage two scores
+    those candidates with collaborative predictions, content similarity to
+    the seed books, popularity and any registered per-book features, each
+    min-max normalized and blended with its weight.
+    """
+
+    def __init__(
+        self,
+        recommender: HybridRecommender,
+        generators: Optional[List[CandidateGenerator]] = None,
+        popularity_weight: float = 0.0
+    ):
+        """
+        Args:
+            recommender: Fitted hybrid recommender supplying both components
+            generators: Stage-one generators; defaults to collaborative top-200,
+                content neighbours and popularity
+            popularity_weight: Weight of the popularity feature in stage two
+        """
+        if recommender.books_data is None:
+            raise ValueError("Recommender must be fitted before building a pipeline")
+
+        self.recommender = recommender
+        self.generators = generators if generators is not None else [
+            CollaborativeCandidates(),
+            ContentNeighbourCandidates(),
+            PopularityCandidates()
+        ]
+        self.feature_weights: Dict[str, float] = {'popularity': popularity_weight}
+        self.features: Dict[str, np.ndarray] = {}
+        self._stage_stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {'count': 0, 'total_ms': 0.0, 'last_ms': 0.0}
+        )
+        self._prepared_for = None
+        self._prepare()
+
+    def _model_state(self) -> tuple:
+        """Objects the precomputed lookups are derived from; updates replace them."""
+        collab = self.recommender.collab_recommender
+        return (self.recommender.books_data, collab.item_ids, collab.seen_matrix)
+
+    def refresh(self) -> None:
+        """Rebuild the lookups if the catalogue or CF model changed since they were built.
+        
+        Called on every request, so books added by ``update_books`` and
+        ratings added by ``partial_fit`` are picked up without a new pipeline.
+        """
+        state = self._model_state()
+        if self._prepared_for is None or any(
+                current is not prepared for current, prepared in zip(state, self._prepared_for)):
+            self._prepare()
+
+    def _prepare(self) -> None:
+        """Precompute row-aligned lookups shared by generators and the re-ranker."""
+        collab = self.recommender.collab_recommender
+        n_books = len(self.recommender.books_data)
+        self._prepared_for = self._model_state()
+
+        # CF item index <-> books_data row
+        self.item_rows = self.recommender.rows_for_book_ids(collab.item_ids)
+        self.row_items = np.full(n_books, -1, dtype=np.int64)
+        known = self.item_rows >= 0
+        self.row_items[self.item_rows[known]] = np.flatnonzero(known)
+
+        # Rating counts per row double as the popularity feature
+        self.popularity = np.zeros(n_books)
+        item_counts = collab.seen_matrix.getnnz(axis=0)
+        self.popularity[self.item_rows[known]] = item_counts[known]
+        self.features['popularity'] = self.popularity
+
+        # Books appended since a feature was registered have no value for it
+        for name, values in self.features.items():
+            if len(values) < n_books:
+                self.features[name] = np.concatenate([values, np.zeros(n_books - len(values))])
+
+        for generator in self.generators:
+            generator.prepare(self)
+
+    def add_feature(self, name: str, values: np.ndarray, weight: float) -> None:
+        """
+        Register an extra per-book feature for stage two.
+
+        Args:
+            name: Feature name, also used in stage metrics
+            values: One value per row of books_data
+            weight: Blend weight applied after min-max normalization
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) != len(self.recommender.books_data):
+            raise ValueError(f"Feature '{name}' must have one value per book")
+        self.features[name] = values
+        self.feature_weights[name] = weight
+
+    def _record(self, stage: str, started: float) -> float:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self._stage_stats[stage]
+        stats['count'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['last_ms'] = elapsed_ms
+        return elapsed_ms
+
+    def get_stage_metrics(self) -> Dict[str, Dict[str, float]]:
+        """Call count, last and average latency (ms) for every stage and generator."""
+        return {
+            stage: {
+                'count': stats['count'],
+                'last_ms': stats['last_ms'],
+                'avg_ms': stats['total_ms'] / stats['count'] if stats['count'] else 0.0
+            }
+            for stage, stats in self._stage_stats.items()
+        }
+
+    def _build_context(self, user_id: Optional[int], book_title: Optional[str],
+                       exclude_seen: bool) -> RecommendationContext:
+        self.refresh()
+        collab = self.recommender.collab_recommender
+        extractor = self.recommender.content_recommender
+
+        user_index = collab.user_mapping.get(user_id) if user_id is not None else None
+        rated_rows = np.empty(0, dtype=np.int64)
+        if user_index is not None:
+            rated_rows = self.item_rows[collab.seen_matrix[user_index].indices]
+            rated_rows = rated_rows[rated_rows >= 0]
+
+        title_rows = np.empty(0, dtype=np.int64)
+        if book_title is not None and book_title in extractor.book_indices:
+            title_rows = np.array([extractor.book_indices[book_title]], dtype=np.int64)
+
+        # The query book seeds first so it survives the max_seeds cut
+        seed_rows = np.concatenate([title_rows, rated_rows])
+        excluded_rows = np.concatenate([title_rows, rated_rows]) if exclude_seen else title_rows
+        return RecommendationContext(user_id, book_title, user_index, seed_rows, excluded_rows)
+
+    def generate_candidates(self, context: RecommendationContext) -> np.ndarray:
+        """Stage one: union of every generator's candidate rows."""
+        started = time.perf_counter()
+        candidate_sets = []
+        for generator in self.generators:
+            generator_started = time.perf_counter()
+            candidate_sets.append(generator.generate(self, context))
+            self._record(f"generator.{generator.name}", generator_started)
+
+        rows = np.unique(np.concatenate(
+            [np.empty(0, dtype=np.int64)] + [c.rows.astype(np.int64) for c in candidate_sets]
+        ))
+        if context.excluded_rows.size:
+            rows = rows[~np.isin(rows, context.excluded_rows)]
+        self._record("candidates", started)
+        return rows
+
+    def rerank(self, context: RecommendationContext, candidates: np.ndarray) -> np.ndarray:
+        """Stage two: hybrid score for each candidate row."""
+        started = time.perf_counter()
+        recommender = self.recommender
+        normalize = HybridRecommender._normalize_scores
+        scores = np.zeros(len(candidates))
+
+        if candidates.size:
+            # Collaborative predictions for candidates only
+            if context.user_index is not None:
+                collab = recommender.collab_recommender
+                items = self.row_items[candidates]
+                has_item = items >= 0
+                predicted = np.zeros(len(candidates))
+                predicted[has_item] = (
+                    collab.global_mean
+                    + collab.user_biases[context.user_index]
+                    + collab.item_biases[items[has_item]]
+                    + collab.item_factors[items[has_item]] @ collab.user_factors[context.user_index]
+                )
+                if has_item.any():
+                    predicted[~has_item] = predicted[has_item].min()
+                scores += recommender.collab_weight * normalize(predicted)
+
+            # Best cosine similarity to any seed book
+            normalized = recommender.content_recommender.normalized_matrix
+            if context.seed_rows.size and normalized is not None:
+                similarity = (normalized[candidates] @ normalized[context.seed_rows].T).toarray()
+                scores += recommender.content_weight * normalize(similarity.max(axis=1))
+
+            for name, values in self.features.items():
+                weight = self.feature_weights.get(name, 0.0)
+                if weight:
+                    scores += weight * normalize(values[candidates])
+
+        self._record("rerank", started)
+        return scores
+
+    def recommend(self, user_id: Optional[int] = None, book_title: Optional[str] = None,
+                  n_recommendations: int = 5, exclude_seen: bool = True) -> pd.DataFrame:
+        """
+        Get recommendations through candidate generation and re-ranking.
+
+        Args:
+            user_id: Optional user ID for collaborative candidates and seeds
+            book_title: Optional book title used as a content seed
+            n_recommendations: Number of recommendations to return
+            exclude_seen: Drop books the user already rated
+
+        Returns:
+            DataFrame with the same columns as HybridRecommender.get_recommendations
+        """
+        try:
+            started = time.perf_counter()
+            context = self._build_context(user_id, book_title, exclude_seen)
+            candidates = self.generate_candidates(context)
+            scores = self.rerank(context, candidates)
+
+            top = _top_n(scores, n_recommendations)
+            top_rows, top_scores = candidates[top], scores[top]
+            top_books = self.recommender.books_data.iloc[top_rows]
+            recommendations = pd.DataFrame({
+                'book_id': top_books['book_id'].to_numpy(),
+                'title': top_books['title'].to_numpy(),
+                'hybrid_score': top_scores,
+                'authors': top_books['authors'].to_numpy(),
+                'average_rating': top_books['average_rating'].to_numpy()
+            })
+
+            total_ms = self._record("total", started)
+            logger.debug(
+                f"Pipeline served {len(recommendations)} recommendations from "
+                f"{len(candidates)} candidates in {total_ms:.2f}ms"
+            )
+            return recommendations
+
+        except Exception as e:
+            raise Exception(f"Error getting pipeline recommendations: {str(e)}")
@@ -1,76 +1,456 @@
+import logging
+import time
 import numpy as np
 import pandas as pd
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Iterable, Optional, Union
+from scipy.sparse import csr_matrix
 from sklearn.metrics.pairwise import cosine_similarity
 
+from src.data.rating_matrix import RatingMatrix
+from .parallel_sgd import ParallelSGDTrainer, sgd_pass
+
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
 class CollaborativeFilter:
     def __init__(self, n_factors: int = 50, learning_rate: float = 0.01, 
-                 regularization: float = 0.02, n_epochs: int = 20):
+                 regularization: float = 0.02, n_epochs: int = 20,
+                 solver: str = "sgd", als_block_nnz: int = 262144,
+                 retrieval: str = "exact", ann_index_type: str = "hnsw",
+                 ann_candidates: int = 200, n_jobs: Optional[int] = None,
+                 random_state: Optional[int] = None, early_stopping_rounds: int = 0,
+                 early_stopping_tol: float = 1e-4):
+        """
+        Args:
+            n_factors: Number of latent factors
+            learning_rate: SGD step size (ignored by the ALS solver)
+            regularization: L2 penalty per observed rating
+            n_epochs: Training epochs (ALS sweeps when solver is "als")
+            solver: "sgd" for per-rating updates, "parallel_sgd" for
+                stratified SGD across worker processes, or "als" for
+                alternating least squares over a CSR rating matrix
+            als_block_nnz: Padded ratings per batched ALS solve; bounds the
+                memory used by each block of normal equations
+            retrieval: "exact" scores every item; "ann" retrieves candidates
+                from a FAISS inner-product index and re-scores them exactly
+            ann_index_type: FAISS index for "ann" retrieval ("hnsw" or "ivf")
+            ann_candidates: Minimum candidates fetched per user from the index
+            n_jobs: Worker processes for "parallel_sgd" (default: CPU count)
+            random_state: Seed for initialisation and parallel SGD ordering;
+                None keeps the global NumPy random state
+            early_stopping_rounds: Stop once validation RMSE has not improved
+                by ``early_stopping_tol`` for this many epochs (0 disables;
+                needs ``validation`` in ``fit``)
+            early_stopping_tol: Minimum RMSE decrease that counts as progress
+        """
+        if solver not in ("sgd", "parallel_sgd", "als"):
+            raise ValueError(f"Unsupported solver: {solver}")
+        if retrieval not in ("exact", "ann"):
+            raise ValueError(f"Unsupported retrieval mode: {retrieval}")
+        if ann_index_type not in ("hnsw", "ivf"):
+            raise ValueError(f"Unsupported ANN index type: {ann_index_type}")
         self.n_factors = n_factors
         self.learning_rate = learning_rate
         self.regularization = regularization
         self.n_epochs = n_epochs
+        self.solver = solver
+        self.als_block_nnz = als_block_nnz
+        self.retrieval = retrieval
+        self.ann_index_type = ann_index_type
+        self.ann_candidates = ann_candidates
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.early_stopping_rounds = early_stopping_rounds
+        self.early_stopping_tol = early_stopping_tol
+        self.training_history: List[Dict[str, float]] = []
+        self.ann_index = None
+        self._buffers: Dict[str, np.ndarray] = {}
         self.user_factors = None
         self.item_factors = None
         self.user_biases = None
         self.item_biases = None
         self.global_mean = None
+        self.item_ids = None
+        self.seen_matrix = None
         
     def _init_matrices(self, n_users: int, n_items: int) -> None:
         """Initialize model parameters."""
-        self.user_factors = np.random.normal(0, 0.1, (n_users, self.n_factors))
-        self.item_factors = np.random.normal(0, 0.1, (n_items, self.n_factors))
+        rng = np.random if self.random_state is None else np.random.default_rng(self.random_state)
+        self.user_factors = rng.normal(0, 0.1, (n_users, self.n_factors))
+        self.item_factors = rng.normal(0, 0.1, (n_items, self.n_factors))
         self.user_biases = np.zeros(n_users)
         self.item_biases = np.zeros(n_items)
         
-    def fit(self, ratings: pd.DataFrame) -> None:
-        """Train the collaborative filtering model."""
+    def fit(self, ratings: Union[pd.DataFrame, RatingMatrix],
+            validation: Optional[pd.DataFrame] = None,
+            warm_start_from: Optional['CollaborativeFilter'] = None) -> None:
+        """Train the collaborative filtering model.
+        
+        Args:
+            ratings: DataFrame with user_id, book_id and rating columns, or a
+                streamed ``RatingMatrix`` (see ``src.data.rating_matrix``)
+            validation: Held-out ratings scored after every epoch; drives
+                early stopping when ``early_stopping_rounds`` is set
+            warm_start_from: Previously fitted model whose factors and biases
+                seed users and books it already knows; new ones start random
+        """
         try:
-            # Create user and item mappings
-            self.user_mapping = {uid: idx for idx, uid in enumerate(ratings['user_id'].unique())}
-            self.item_mapping = {iid: idx for idx, iid in enumerate(ratings['book_id'].unique())}
+            if isinstance(ratings, RatingMatrix):
+                # Ids are already dense indices; train straight off the CSR arrays
+                user_ids, item_ids = ratings.user_ids, ratings.item_ids
+                users, items, ratings_array = ratings.coordinates()
+                self.seen_matrix = ratings.latest()
+            else:
+                # Dense indices in order of first appearance
+                users, user_ids = pd.factorize(ratings['user_id'])
+                items, item_ids = pd.factorize(ratings['book_id'])
+                ratings_array = ratings['rating'].values
+                
+                # The user x item matrix of known ratings (latest rating per
+                # pair); its nonzeros are the "seen" mask
+                latest = pd.DataFrame({'user': users, 'item': items, 'rating': ratings_array})
+                latest = latest.drop_duplicates(subset=['user', 'item'], keep='last')
+                self.seen_matrix = csr_matrix(
+                    (latest['rating'].values.astype(np.float32),
+                     (latest['user'].values, latest['item'].values)),
+                    shape=(len(user_ids), len(item_ids))
+                )
             
-            # Convert ratings to matrix format
-            users = ratings['user_id'].map(self.user_mapping)
-            items = ratings['book_id'].map(self.item_mapping)
-            ratings_array = ratings['rating'].values
+            # Id -> index mappings and the index -> book_id lookup
+            self.user_mapping = dict(zip(np.asarray(user_ids).tolist(), range(len(user_ids))))
+            self.item_mapping = dict(zip(np.asarray(item_ids).tolist(), range(len(item_ids))))
+            self.item_ids = np.asarray(item_ids)
             
             # Initialize matrices
             self._init_matrices(len(self.user_mapping), len(self.item_mapping))
+            if warm_start_from is not None:
+                self._warm_start(warm_start_from)
             
             # Calculate global mean
-            self.global_mean = ratings_array.mean()
-            
-            # Training loop
-            for epoch in range(self.n_epochs):
-                for user, item, rating in zip(users, items, ratings_array):
-                    # Predict rating
-                    pred = self.global_mean + \
-                           self.user_biases[user] + \
-                           self.item_biases[item] + \
-                           self.user_factors[user].dot(self.item_factors[item])
-                    
-                    # Calculate error
-                    error = rating - pred
-                    
-                    # Update biases
-                    self.user_biases[user] += self.learning_rate * \
-                                             (error - self.regularization * self.user_biases[user])
-                    self.item_biases[item] += self.learning_rate * \
-                                             (error - self.regularization * self.item_biases[item])
-                    
-                    # Update factors
-                    user_factors_update = error * self.item_factors[item] - \
-                                        self.regularization * self.user_factors[user]
-                    item_factors_update = error * self.user_factors[user] - \
-                                        self.regularization * self.item_factors[item]
-                    
-                    self.user_factors[user] += self.learning_rate * user_factors_update
-                    self.item_factors[item] += self.learning_rate * item_factors_update
+            self.global_mean = ratings_array.mean(dtype=np.float64)
+            
+            self.training_history = []
+            self._validation = self._index_ratings(validation) if validation is not None else None
+            self._best_val_rmse = np.inf
+            self._best_params = None
+            self._stale_epochs = 0
+            
+            if self.solver == "als":
+                self._fit_als(users, items, ratings_array)
+            elif self.solver == "parallel_sgd":
+                self._fit_parallel_sgd(users, items, ratings_array)
+            else:
+                self._fit_sgd(users, items, ratings_array)
+            
+            if self._best_params is not None:
+                # Early stopping keeps the parameters of the best validation epoch
+                (self.user_factors, self.item_factors,
+                 self.user_biases, self.item_biases) = self._best_params
+            self._validation = None
+            self._best_params = None
+            
+            if self.retrieval == "ann":
+                self.build_ann_index()
                     
         except Exception as e:
             raise Exception(f"Error training collaborative filter: {str(e)}")
     
+    def _warm_start(self, previous: 'CollaborativeFilter') -> None:
+        """Seed factors and biases of ids known to ``previous``, aligned through its mappings.
+        
+        A previous model with a different factor count or solver family
+        (ALS vs SGD) is skipped with a warning and training starts cold.
+        """
+        reason = self._warm_start_incompatibility(previous)
+        if reason is not None:
+            logger.warning(f"Warm start skipped, training from scratch: {reason}")
+            return
+        for side, mapping, previous_mapping in (('user', self.user_mapping, previous.user_mapping),
+                                                ('item', self.item_mapping, previous.item_mapping)):
+            previous_rows = pd.Series(previous_mapping, dtype=np.float64).reindex(
+                list(mapping.keys())
+            ).to_numpy()
+            known = ~np.isnan(previous_rows)
+            previous_rows = previous_rows[known].astype(np.int64)
+            getattr(self, f'{side}_factors')[known] = getattr(previous, f'{side}_factors')[previous_rows]
+            getattr(self, f'{side}_biases')[known] = getattr(previous, f'{side}_biases')[previous_rows]
+            logger.info(f"Warm start: reused {known.sum()} {side}s, initialised {(~known).sum()} new")
+    
+    def _warm_start_incompatibility(self, previous: 'CollaborativeFilter') -> Optional[str]:
+        """Why ``previous`` cannot seed this model, or None if it can."""
+        if getattr(previous, 'user_factors', None) is None or getattr(previous, 'item_factors', None) is None:
+            return "previous model is not fitted"
+        if previous.n_factors != self.n_factors or previous.item_factors.shape[1] != self.n_factors:
+            return f"{previous.n_factors}-factor previous model, {self.n_factors} factors requested"
+        # SGD variants share an objective and factor scale; ALS factors do not carry over
+        if (getattr(previous, 'solver', 'sgd') == "als") != (self.solver == "als"):
+            return f"previous model used the {previous.solver} solver, this one {self.solver}"
+        return None
+    
+    def _index_ratings(self, ratings: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Map ratings to (user, item, rating) index arrays, dropping unknown ids."""
+        users = ratings['user_id'].map(self.user_mapping)
+        items = ratings['book_id'].map(self.item_mapping)
+        known = (users.notna() & items.notna()).to_numpy()
+        return (users.to_numpy()[known].astype(np.int64), items.to_numpy()[known].astype(np.int64),
+                ratings['rating'].to_numpy()[known].astype(np.float64))
+    
+    def _end_epoch(self, stats: Dict[str, float], user_factors: np.ndarray,
+                   item_factors: np.ndarray, user_biases: np.ndarray,
+                   item_biases: np.ndarray) -> bool:
+        """Record an epoch's stats; return True once validation RMSE has plateaued.
+        
+        With early stopping enabled, the parameters of the best epoch so far
+        are snapshotted so ``fit`` can restore them.
+        """
+        if self._validation is not None and len(self._validation[0]):
+            users, items, ratings = self._validation
+            predictions = self.global_mean + user_biases[users] + item_biases[items] + \
+                          np.einsum('ij,ij->i', user_factors[users], item_factors[items])
+            stats['val_rmse'] = float(np.sqrt(np.mean((predictions - ratings) ** 2)))
+        self.training_history.append(stats)
+        
+        if 'val_rmse' not in stats or self.early_stopping_rounds <= 0:
+            return False
+        if stats['val_rmse'] < self._best_val_rmse - self.early_stopping_tol:
+            self._best_val_rmse = stats['val_rmse']
+            self._best_params = tuple(np.array(array) for array in
+                                      (user_factors, item_factors, user_biases, item_biases))
+            self._stale_epochs = 0
+        else:
+            self._stale_epochs += 1
+        if self._stale_epochs >= self.early_stopping_rounds:
+            logger.info(f"Early stopping after epoch {stats['epoch']}: "
+                        f"validation RMSE plateaued at {self._best_val_rmse:.4f}")
+            return True
+        return False
+    
+    def _fit_sgd(self, users: np.ndarray, items: np.ndarray, ratings_array: np.ndarray) -> None:
+        """Train with per-rating stochastic gradient descent."""
+        # Training loop
+        for epoch in range(self.n_epochs):
+            start_time = time.perf_counter()
+            sgd_pass(users, items, ratings_array,
+                     self.user_factors, self.item_factors,
+                     self.user_biases, self.item_biases,
+                     self.global_mean, self.learning_rate, self.regularization)
+            stats = {'epoch': epoch, 'seconds': time.perf_counter() - start_time}
+            if self._end_epoch(stats, self.user_factors, self.item_factors,
+                               self.user_biases, self.item_biases):
+                break
+    
+    def _fit_parallel_sgd(self, users: np.ndarray, items: np.ndarray,
+                          ratings_array: np.ndarray) -> None:
+        """Train with stratified SGD over shared-memory factors on ``n_jobs`` processes."""
+        trainer = ParallelSGDTrainer(n_jobs=self.n_jobs, random_state=self.random_state)
+        trainer.fit(self, users, items, ratings_array, epoch_callback=self._end_epoch)
+    
+    def partial_fit(self, ratings: pd.DataFrame, n_iterations: int = 2) -> None:
+        """Fold new ratings into a fitted model without a full retrain.
+        
+        Item factors of books that were already known stay frozen. Each
+        affected user is re-solved against them from their full rating
+        history (stored ratings merged with the new ones, newest wins), and
+        books seen for the first time are solved against the users who
+        rated them. Both solves use the same ridge systems as the ALS
+        solver. New users and books extend the mappings, and the factor
+        arrays grow by doubling so repeated fold-ins stay amortized O(1).
+        
+        Args:
+            ratings: DataFrame with user_id, book_id and rating columns
+            n_iterations: User/new-book alternations; only matters when the
+                batch introduces new books
+        """
+        try:
+            if self.item_factors is None:
+                raise ValueError("Model must be fitted before partial_fit")
+            if ratings.empty:
+                return
+            
+            # Memory-mapped artifacts are read-only; fold-ins work on copies
+            for name in ('user_factors', 'item_factors', 'user_biases', 'item_biases'):
+                array = getattr(self, name)
+                if not array.flags.writeable:
+                    setattr(self, name, np.array(array))
+            
+            n_old_items = len(self.item_mapping)
+            for uid in ratings['user_id'].unique():
+                if uid not in self.user_mapping:
+                    self.user_mapping[uid] = len(self.user_mapping)
+            new_books = [iid for iid in ratings['book_id'].unique() if iid not in self.item_mapping]
+            for iid in new_books:
+                self.item_mapping[iid] = len(self.item_mapping)
+            n_users, n_items = len(self.user_mapping), len(self.item_mapping)
+            
+            if new_books:
+                self.item_ids = np.concatenate([self.item_ids, np.asarray(new_books)])
+            for name in ('user_factors', 'user_biases'):
+                self._grow_rows(name, n_users)
+            for name in ('item_factors', 'item_biases'):
+                self._grow_rows(name, n_items)
+            
+            # Merge into the stored ratings; a new rating replaces an old one
+            latest = pd.DataFrame({
+                'user': ratings['user_id'].map(self.user_mapping).values,
+                'item': ratings['book_id'].map(self.item_mapping).values,
+                'rating': ratings['rating'].values.astype(np.float32)
+            }).drop_duplicates(subset=['user', 'item'], keep='last')
+            update = csr_matrix(
+                (latest['rating'].values, (latest['user'].values, latest['item'].values)),
+                shape=(n_users, n_items)
+            )
+            seen = self.seen_matrix.copy()
+            seen.resize((n_users, n_items))
+            seen = seen - seen.multiply(update != 0) + update
+            seen.eliminate_zeros()
+            self.seen_matrix = seen.tocsr()
+            
+            affected_users = np.unique(latest['user'].values)
+            user_history = self.seen_matrix[affected_users]
+            new_items = np.arange(n_old_items, n_items)
+            item_history = self.seen_matrix[:, new_items].T.tocsr() if new_books else None
+            ones_items = np.ones((n_items, 1))
+            ones_users = np.ones((n_users, 1))
+            
+            for _ in range(max(1, n_iterations if new_books else 1)):
+                residuals = user_history.data - self.global_mean - \
+                            self.item_biases[user_history.indices]
+                solution = self._solve_als_side(
+                    user_history, residuals, np.hstack([self.item_factors, ones_items])
+                )
+                self.user_factors[affected_users] = solution[:, :self.n_factors]
+                self.user_biases[affected_users] = solution[:, self.n_factors]
+                
+                if item_history is not None:
+                    residuals = item_history.data - self.global_mean - \
+                                self.user_biases[item_history.indices]
+                    solution = self._solve_als_side(
+                        item_history, residuals, np.hstack([self.user_factors, ones_users])
+                    )
+                    self.item_factors[new_items] = solution[:, :self.n_factors]
+                    self.item_biases[new_items] = solution[:, self.n_factors]
+            
+            if self.ann_index is not None and new_books:
+                self.ann_index.add(np.ascontiguousarray(
+                    np.hstack([self.item_factors[new_items], self.item_biases[new_items, None]]),
+                    dtype=np.float32
+                ))
+        except Exception as e:
+            raise Exception(f"Error folding in ratings: {str(e)}")
+    
+    def _grow_rows(self, name: str, n_rows: int) -> None:
+        """Resize a factor/bias array to ``n_rows`` through a doubling buffer.
+        
+        The public attribute is a view of the first ``n_rows`` buffer rows;
+        new rows start at zero until they are solved.
+        """
+        array = getattr(self, name)
+        if n_rows == array.shape[0]:
+            return
+        buffer = self._buffers.get(name)
+        if buffer is None or array.base is not buffer or buffer.shape[0] < n_rows:
+            capacity = max(n_rows, 2 * array.shape[0])
+            buffer = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            buffer[:array.shape[0]] = array
+            self._buffers[name] = buffer
+        else:
+            buffer[array.shape[0]:n_rows] = 0
+        setattr(self, name, buffer[:n_rows])
+    
+    @staticmethod
+    def _build_csr(rows: np.ndarray, cols: np.ndarray, values: np.ndarray,
+                   shape: Tuple[int, int]) -> csr_matrix:
+        """Build a CSR matrix that keeps repeated (row, col) ratings as separate entries."""
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+        return csr_matrix(
+            (values[order].astype(np.float64), cols[order], indptr),
+            shape=shape
+        )
+    
+    def _fit_als(self, users: np.ndarray, items: np.ndarray, ratings_array: np.ndarray) -> None:
+        """Train with alternating least squares, solving each side as batched linear systems."""
+        n_users, n_items = len(self.user_mapping), len(self.item_mapping)
+        by_user = self._build_csr(users, items, ratings_array, (n_users, n_items))
+        by_item = self._build_csr(items, users, ratings_array, (n_items, n_users))
+        ones_items = np.ones((n_items, 1))
+        ones_users = np.ones((n_users, 1))
+        
+        for epoch in range(self.n_epochs):
+            start_time = time.perf_counter()
+            # Users against fixed items: target is r - mu - b_i
+            residuals = by_user.data - self.global_mean - self.item_biases[by_user.indices]
+            solution = self._solve_als_side(
+                by_user, residuals, np.hstack([self.item_factors, ones_items])
+            )
+            self.user_factors = solution[:, :self.n_factors]
+            self.user_biases = solution[:, self.n_factors]
+            
+            # Items against fixed users: target is r - mu - b_u
+            residuals = by_item.data - self.global_mean - self.user_biases[by_item.indices]
+            solution = self._solve_als_side(
+                by_item, residuals, np.hstack([self.user_factors, ones_users])
+            )
+            self.item_factors = solution[:, :self.n_factors]
+            self.item_biases = solution[:, self.n_factors]
+            
+            stats = {'epoch': epoch, 'seconds': time.perf_counter() - start_time}
+            if self._end_epoch(stats, self.user_factors, self.item_factors,
+                               self.user_biases, self.item_biases):
+                break
+    
+    def _solve_als_side(self, matrix: csr_matrix, residuals: np.ndarray,
+                        fixed: np.ndarray) -> np.ndarray:
+        """Solve the ridge systems for every row of ``matrix`` against ``fixed``.
+        
+        Rows are visited in order of rating count so each block pads to a
+        similar width; the Gram matrices of a block come from one batched
+        matmul and are solved with one ``np.linalg.solve`` call. The penalty
+        scales with the row's rating count, matching the per-rating
+        regularization of the SGD objective.
+        """
+        n_rows = matrix.shape[0]
+        n_cols = fixed.shape[1]
+        solution = np.zeros((n_rows, n_cols))
+        if matrix.nnz == 0:
+            return solution
+        
+        counts = np.diff(matrix.indptr)
+        order = np.argsort(counts, kind='stable')
+        eye = np.eye(n_cols)
+        
+        start = 0
+        while start < n_rows:
+            width = max(int(counts[order[start]]), 1)
+            stop = min(n_rows, start + max(1, self.als_block_nnz // width))
+            width = max(int(counts[order[stop - 1]]), 1)
+            stop = min(stop, start + max(1, self.als_block_nnz // width))
+            
+            rows = order[start:stop]
+            degrees = counts[rows]
+            width = max(int(degrees.max()), 1)
+            offsets = np.arange(width)
+            valid = offsets[None, :] < degrees[:, None]
+            positions = np.where(valid, matrix.indptr[rows][:, None] + offsets[None, :], 0)
+            
+            design = fixed[matrix.indices[positions]] * valid[..., None]
+            target = np.where(valid, residuals[positions], 0.0)
+            
+            design_t = design.transpose(0, 2, 1)
+            gram = design_t @ design
+            gram += (self.regularization * np.maximum(degrees, 1))[:, None, None] * eye
+            rhs = design_t @ target[..., None]
+            solution[rows] = np.linalg.solve(gram, rhs)[..., 0]
+            start = stop
+        
+        return solution
+    
     def predict(self, user_id: int, book_id: int) -> float:
         """Predict rating for a user-item pair."""
         try:
@@ -95,20 +475,168 @@ class CollaborativeFilter:
             
             user_idx = self.user_mapping[user_id]
             
-            # Calculate predicted ratings for all items
-            user_vector = self.user_factors[user_idx]
-            predictions = self.global_mean + \
-                         self.user_biases[user_idx] + \
-                         self.item_biases + \
-                         self.item_factors.dot(user_vector)
+            # Calculate predicted ratings for all (or ANN-retrieved) items
+            top_items, top_scores = self._top_items(np.array([user_idx]), n_recommendations)
+            
+            # Convert back to original item IDs and include predicted ratings,
+            # dropping slots the ANN index could not fill
+            valid = np.isfinite(top_scores[0])
+            return list(zip(self.item_ids[top_items[0]][valid], top_scores[0][valid]))
+        except Exception as e:
+            raise Exception(f"Error getting recommendations: {str(e)}")
+    
+    def get_recommendations_batch(self, user_ids: Iterable[int], n_recommendations: int = 5,
+                                  exclude_seen: bool = False,
+                                  batch_size: int = 1024) -> List[List[Tuple[int, float]]]:
+        """Get top N recommendations for many users with one matmul per batch.
+        
+        Args:
+            user_ids: User IDs to score; unknown users get an empty list
+            n_recommendations: Number of recommendations per user
+            exclude_seen: Drop books the user rated in the training data
+            batch_size: Users scored per ``user_factors @ item_factors.T`` call
+                (or per ANN index search when retrieval is "ann")
+            
+        Returns:
+            One list of (book_id, predicted_rating) tuples per input user,
+            in input order
+        """
+        try:
+            user_ids = list(user_ids)
+            results: List[List[Tuple[int, float]]] = [[] for _ in user_ids]
+            known = [(pos, self.user_mapping[uid]) for pos, uid in enumerate(user_ids)
+                     if uid in self.user_mapping]
+            if not known:
+                return results
             
-            # Get top N items
-            top_items = np.argsort(predictions)[::-1][:n_recommendations]
+            positions = np.array([pos for pos, _ in known])
+            user_indices = np.array([idx for _, idx in known])
             
-            # Convert back to original item IDs and include predicted ratings
-            reverse_mapping = {idx: iid for iid, idx in self.item_mapping.items()}
-            recommendations = [(reverse_mapping[idx], predictions[idx]) for idx in top_items]
+            for start in range(0, len(user_indices), batch_size):
+                batch = user_indices[start:start + batch_size]
+                top_items, top_scores = self._top_items(batch, n_recommendations, exclude_seen)
+                top_book_ids = self.item_ids[top_items]
+                for pos, book_ids, item_scores in zip(
+                        positions[start:start + batch_size], top_book_ids, top_scores):
+                    valid = np.isfinite(item_scores)
+                    results[pos] = list(zip(book_ids[valid], item_scores[valid]))
             
-            return recommendations
+            return results
         except Exception as e:
-            raise Exception(f"Error getting recommendations: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error getting batch recommendations: {str(e)}")
+    
+    def _top_items(self, user_indices: np.ndarray, k: int,
+                   exclude_seen: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k internal item indices and predicted ratings for a batch of users.
+        
+        Masked or missing slots carry a score of -inf.
+        """
+        if self.ann_index is None:
+            scores = self._score_users(user_indices)
+            if exclude_seen:
+                rows, cols = self.seen_matrix[user_indices].nonzero()
+                scores[rows, cols] = -np.inf
+            return self._top_k(scores, k)
+        
+        # Fetch enough candidates that masking seen items still leaves k
+        n_search = max(self.ann_candidates, 4 * k)
+        if exclude_seen:
+            n_search += int(np.diff(self.seen_matrix.indptr)[user_indices].max())
+        n_search = min(n_search, len(self.item_ids))
+        
+        queries = np.hstack([
+            self.user_factors[user_indices], np.ones((len(user_indices), 1))
+        ]).astype(np.float32)
+        _, candidates = self.ann_index.search(queries, n_search)
+        missing = candidates < 0
+        candidates = np.where(missing, 0, candidates)
+        
+        # Re-apply exact biases and factors to the retrieved candidates only
+        scores = self.global_mean + \
+                 self.user_biases[user_indices][:, None] + \
+                 self.item_biases[candidates] + \
+                 np.einsum('uf,ucf->uc', self.user_factors[user_indices],
+                           self.item_factors[candidates])
+        scores[missing] = -np.inf
+        if exclude_seen:
+            seen = self.seen_matrix[user_indices[:, None], candidates].toarray()
+            scores[seen > 0] = -np.inf
+        
+        positions, top_scores = self._top_k(scores, k)
+        return np.take_along_axis(candidates, positions, axis=1), top_scores
+    
+    def build_ann_index(self) -> None:
+        """Index item factors for approximate maximum-inner-product retrieval.
+        
+        Each item is stored as ``[q_i, b_i]`` so that the query ``[p_u, 1]``
+        ranks items by ``p_u . q_i + b_i``, i.e. by predicted rating up to the
+        user's constant terms.
+        """
+        if not FAISS_AVAILABLE:
+            raise ImportError("faiss is required for approximate retrieval")
+        
+        vectors = np.ascontiguousarray(
+            np.hstack([self.item_factors, self.item_biases[:, None]]), dtype=np.float32
+        )
+        n_items, dimension = vectors.shape
+        
+        if self.ann_index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dimension, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = 200
+            index.hnsw.efSearch = max(128, self.ann_candidates)
+        else:
+            nlist = max(1, min(1024, int(np.sqrt(n_items))))
+            quantizer = faiss.IndexFlatIP(dimension)
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.nprobe = max(1, nlist // 4)
+        
+        index.add(vectors)
+        self.ann_index = index
+        logger.info(f"Built {self.ann_index_type} ANN index over {n_items} item factors")
+    
+    def __getstate__(self) -> Dict:
+        # FAISS indexes are not picklable; they are rebuilt on load
+        state = self.__dict__.copy()
+        state['ann_index'] = None
+        state['_buffers'] = {}  # Growth headroom is not worth persisting
+        return state
+    
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self.__dict__.setdefault('retrieval', 'exact')
+        self.__dict__.setdefault('ann_index', None)
+        self.__dict__.setdefault('_buffers', {})
+        self.__dict__.setdefault('n_jobs', None)
+        self.__dict__.setdefault('random_state', None)
+        self.__dict__.setdefault('training_history', [])
+        self.__dict__.setdefault('early_stopping_rounds', 0)
+        self.__dict__.setdefault('early_stopping_tol', 1e-4)
+        if self.retrieval == "ann" and self.item_factors is not None:
+            try:
+                self.build_ann_index()
+            except ImportError:
+                logger.warning("faiss unavailable; falling back to exact retrieval")
+    
+    def _score_users(self, user_indices: np.ndarray) -> np.ndarray:
+        """Predicted ratings for every item, one row per internal user index."""
+        return self.global_mean + \
+               self.user_biases[user_indices][:, None] + \
+               self.item_biases[None, :] + \
+               self.user_factors[user_indices] @ self.item_factors.T
+    
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Row-wise top-k item indices and scores, best first."""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            empty = np.empty((scores.shape[0], 0))
+            return empty.astype(np.int64), empty
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        return (np.take_along_axis(candidates, order, axis=1),
+                np.take_along_axis(candidate_scores, order, axis=1))
\ No newline at end of file
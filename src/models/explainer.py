@@ -23,7 +23,7 @@ class RecommendationExplainer:
                 raise ValueError("Book title must be a non-empty string")
 
             tfidf_matrix = self.model.content_recommender.tfidf_matrix
-            feature_names = self.model.content_recommender.tfidf.get_feature_names_out()
+            feature_names = self.model.content_recommender.feature_names
             
             if book_title not in self.model.content_recommender.book_indices:
                 raise KeyError(f"Book title '{book_title}' not found in the database")
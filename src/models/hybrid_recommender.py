@@ -1,8 +1,10 @@
 from typing import List, Dict, Tuple
 import pandas as pd
 import numpy as np
+from src.data.tag_matrix import TagMatrix
 from src.features.feature_extractor import FeatureExtractor
 from src.models.collaborative_filter import CollaborativeFilter
+from src.config import Config
 
 class HybridRecommender:
     def __init__(self, content_weight: float = 0.5):
@@ -14,28 +16,102 @@ class HybridRecommender:
         self.content_weight = content_weight
         self.collab_weight = 1 - content_weight
         self.content_recommender = FeatureExtractor()
-        self.collab_recommender = CollaborativeFilter()
+        self.collab_recommender = CollaborativeFilter(**Config.get_model_params('collaborative'))
         self.books_data = None
         
-    def fit(self, books: pd.DataFrame, ratings: pd.DataFrame) -> None:
-        """Train both recommendation models."""
+    def fit(self, books: pd.DataFrame, ratings: pd.DataFrame,
+            validation: pd.DataFrame = None,
+            warm_start_from: 'HybridRecommender' = None,
+            tag_matrix: TagMatrix = None) -> None:
+        """Train both recommendation models.
+        
+        Args:
+            books: Book metadata with an 'all_tags' column
+            ratings: Training ratings, as a DataFrame or a streamed RatingMatrix
+            validation: Held-out ratings for per-epoch RMSE and early stopping
+            warm_start_from: Previous model whose collaborative factors seed
+                the users and books it already knows
+            tag_matrix: Book x tag counts aligned with ``books``; content
+                features come from it instead of the 'all_tags' strings
+        """
         try:
             # Store books data for later use
             self.books_data = books
+            self._build_book_lookup(books)
             
             # Train content-based model
-            self.content_recommender.fit_transform(books)
+            if tag_matrix is not None:
+                self.content_recommender.fit_tag_matrix(books, tag_matrix)
+            else:
+                self.content_recommender.fit_transform(books)
             
             # Train collaborative filtering model
-            self.collab_recommender.fit(ratings)
+            self.collab_recommender.fit(
+                ratings,
+                validation=validation,
+                warm_start_from=warm_start_from.collab_recommender if warm_start_from else None
+            )
             
         except Exception as e:
             raise Exception(f"Error training hybrid recommender: {str(e)}")
     
+    def update_books(self, books: pd.DataFrame) -> None:
+        """Add new books or refresh changed ones without refitting the content model.
+        
+        Books are matched on book_id; known ids are overwritten in place and
+        the rest are appended, keeping books_data rows aligned with the
+        content model's feature rows. An id repeated in the batch keeps its
+        last version.
+        """
+        try:
+            # A book_id repeated in the batch takes its last version
+            books = books[~books['book_id'].duplicated(keep='last').to_numpy()]
+            rows = self.rows_for_book_ids(books['book_id'].to_numpy())
+            rows = self.content_recommender.update_books(books, rows=rows)
+            
+            n_old = len(self.books_data)
+            updated = books.set_axis(rows)
+            books_data = pd.concat([self.books_data, updated[updated.index >= n_old]])
+            books_data = books_data.reset_index(drop=True)
+            changed = updated[updated.index < n_old]
+            books_data.loc[changed.index, changed.columns] = changed
+            
+            self.books_data = books_data
+            self._build_book_lookup(books_data)
+        except Exception as e:
+            raise Exception(f"Error updating books: {str(e)}")
+    
+    def _build_book_lookup(self, books: pd.DataFrame) -> None:
+        """Precompute the book_id -> row position lookup used during fusion."""
+        book_ids = books['book_id'].to_numpy()
+        first_occurrence = ~pd.Index(book_ids).duplicated()
+        self._book_id_index = pd.Index(book_ids[first_occurrence])
+        self._book_id_rows = np.flatnonzero(first_occurrence)
+    
+    def rows_for_book_ids(self, book_ids: np.ndarray) -> np.ndarray:
+        """Map book_ids to row positions in books_data; unknown ids map to -1."""
+        positions = self._book_id_index.get_indexer(book_ids)
+        return np.where(positions >= 0, self._book_id_rows[positions], -1)
+    
+    @staticmethod
+    def _normalize_scores(scores: np.ndarray) -> np.ndarray:
+        """Min-max scale a component's scores to [0, 1] so the weights are comparable."""
+        if scores.size == 0:
+            return scores
+        low, high = scores.min(), scores.max()
+        if high - low <= 0:
+            return np.ones_like(scores, dtype=np.float64)
+        return (scores - low) / (high - low)
+    
     def get_recommendations(self, user_id: int = None, book_title: str = None,
                            n_recommendations: int = 5) -> pd.DataFrame:
         """Get hybrid recommendations based on user ID and/or book title.
         
+        Component scores are placed in dense vectors indexed by row position
+        in ``books_data``; when both components contribute they are min-max
+        normalized and blended with the configured weights. Metadata is only
+        attached to the final top-N rows.
+        
         Args:
             user_id: Optional user ID for collaborative filtering
             book_title: Optional book title for content-based filtering
@@ -45,19 +121,18 @@ class HybridRecommender:
             DataFrame with recommended books and scores
         """
         try:
-            content_scores = {}
-            collab_scores = {}
+            n_books = len(self.books_data)
+            content_rows = np.empty(0, dtype=np.int64)
+            content_scores = np.empty(0)
+            collab_rows = np.empty(0, dtype=np.int64)
+            collab_scores = np.empty(0)
             
             # Get content-based recommendations if book title is provided
             if book_title is not None:
-                content_recs = self.content_recommender.get_similar_books(
+                content_rows, content_scores = self.content_recommender.get_neighbor_rows(
                     book_title,
-                    self.books_data,
                     n_recommendations=n_recommendations
                 )
-                if not content_recs.empty:
-                    for _, row in content_recs.iterrows():
-                        content_scores[row['title']] = row['similarity_score']
             
             # Get collaborative filtering recommendations if user ID is provided
             if user_id is not None:
@@ -65,45 +140,41 @@ class HybridRecommender:
                     user_id,
                     n_recommendations=n_recommendations
                 )
-                for book_id, score in collab_recs:
-                    book_title = self.books_data[
-                        self.books_data['book_id'] == book_id
-                    ]['title'].iloc[0]
-                    collab_scores[book_title] = score
-            
-            # Combine and normalize scores
-            all_books = set(content_scores.keys()) | set(collab_scores.keys())
-            hybrid_scores = {}
-            
-            for book in all_books:
-                # Normalize individual scores
-                content_score = content_scores.get(book, 0)
-                collab_score = collab_scores.get(book, 0)
-                
-                if content_scores and collab_scores:  # Both components available
-                    hybrid_scores[book] = (self.content_weight * content_score +
-                                         self.collab_weight * collab_score)
-                elif content_scores:  # Only content-based available
-                    hybrid_scores[book] = content_score
-                else:  # Only collaborative available
-                    hybrid_scores[book] = collab_score
-            
-            # Sort and prepare recommendations DataFrame
-            sorted_recs = sorted(hybrid_scores.items(),
-                                key=lambda x: x[1],
-                                reverse=True)[:n_recommendations]
-            
-            recommendations = pd.DataFrame(
-                sorted_recs,
-                columns=['title', 'hybrid_score']
-            )
-            
-            # Add book metadata
-            recommendations = recommendations.merge(
-                self.books_data[['title', 'authors', 'average_rating']],
-                on='title',
-                how='left'
-            )
+                if collab_recs:
+                    book_ids, scores = zip(*collab_recs)
+                    rows = self.rows_for_book_ids(np.asarray(book_ids))
+                    known = rows >= 0
+                    collab_rows = rows[known]
+                    collab_scores = np.asarray(scores, dtype=np.float64)[known]
+            
+            # Blend component scores in dense row-indexed vectors
+            hybrid = np.zeros(n_books)
+            is_candidate = np.zeros(n_books, dtype=bool)
+            is_candidate[content_rows] = True
+            is_candidate[collab_rows] = True
+            
+            if content_rows.size and collab_rows.size:  # Both components available
+                hybrid[content_rows] += self.content_weight * self._normalize_scores(content_scores)
+                hybrid[collab_rows] += self.collab_weight * self._normalize_scores(collab_scores)
+            elif content_rows.size:  # Only content-based available
+                hybrid[content_rows] = content_scores
+            else:  # Only collaborative available
+                hybrid[collab_rows] = collab_scores
+            
+            # Select the top N candidates, best first
+            candidates = np.flatnonzero(is_candidate)
+            order = np.argsort(-hybrid[candidates], kind='stable')[:n_recommendations]
+            top_rows = candidates[order]
+            
+            # Add book metadata for the final rows only
+            top_books = self.books_data.iloc[top_rows]
+            recommendations = pd.DataFrame({
+                'book_id': top_books['book_id'].to_numpy(),
+                'title': top_books['title'].to_numpy(),
+                'hybrid_score': hybrid[top_rows],
+                'authors': top_books['authors'].to_numpy(),
+                'average_rating': top_books['average_rating'].to_numpy()
+            })
             
             return recommendations
             
@@ -118,9 +189,8 @@ class HybridRecommender:
                 'similar_books': []
             }
             
-            # Get feature importance
-            feature_importance = self.content_recommender.get_feature_importance(book_title)
-            explanations['top_tags'] = list(feature_importance.keys())[:5]
+            # Precomputed top terms of the book
+            explanations['top_tags'] = list(self.content_recommender.get_top_terms(book_title, 5))
             
             # Get similar books with high content similarity
             similar_books = self.content_recommender.get_similar_books(
@@ -133,5 +203,13 @@ class HybridRecommender:
             
             return explanations
             
+        except Exception as e:
+            raise Exception(f"Error explaining recommendations: {str(e)}")
+    
+    def explain_top_tags(self, book_titles: List[str], n_tags: int = 5) -> Dict[str, List[str]]:
+        """Top tags of every book in a recommendation list, from one batch lookup."""
+        try:
+            top_terms = self.content_recommender.get_top_terms_batch(book_titles, n_tags)
+            return {title: list(terms) for title, terms in zip(book_titles, top_terms)}
         except Exception as e:
             raise Exception(f"Error explaining recommendations: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""
+Memory-mappable model artifacts.
+
+A saved ``HybridRecommender`` is a directory holding ``manifest.json`` and
+one ``.npy`` file per array (sparse matrices are stored as their
+``data``/``indices``/``indptr`` triple). Float arrays are written as
+float32. Text columns are a UTF-8 blob plus row offsets, the layout of
+``ColumnarMetadataStore``, and strings are decoded only when read. Loading with ``mmap=True`` opens every array with
+``np.load(mmap_mode='r')``, so API workers on the same host share the
+pages through the OS page cache instead of each holding a private
+unpickled copy. Memory-mapped arrays are read-only.
+"""
+
+import json
+import logging
+import pickle
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+
+from src.core.metadata_store import ColumnarMetadataStore
+from src.features.feature_extractor import FeatureExtractor
+from src.models.collaborative_filter import CollaborativeFilter, FAISS_AVAILABLE
+from src.models.hybrid_recommender import HybridRecommender
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 2
+# Version 1 stored text as fixed-width unicode arrays
+_READABLE_VERSIONS = (1, 2)
+MANIFEST_FILE = 'manifest.json'
+
+_CF_PARAMS = ('n_factors', 'learning_rate', 'regularization', 'n_epochs', 'solver',
+              'als_block_nnz', 'retrieval', 'ann_index_type', 'ann_candidates',
+              'n_jobs', 'random_state', 'early_stopping_rounds', 'early_stopping_tol')
+
+
+class _ArtifactWriter:
+    """Writes component arrays into an artifact directory and records them."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.components: Dict[str, Dict[str, Any]] = {}
+
+    def array(self, name: str, array: np.ndarray, downcast: bool = True) -> None:
+        array = np.asarray(array)
+        if array.dtype == object:
+            array = array.astype(str)
+        elif downcast and array.dtype.kind == 'f':
+            array = array.astype(np.float32, copy=False)
+        file_name = f'{name}.npy'
+        np.save(self.directory / file_name, np.ascontiguousarray(array), allow_pickle=False)
+        self.components[name] = {
+            'kind': 'array', 'file': file_name,
+            'dtype': array.dtype.str, 'shape': list(array.shape)
+        }
+
+    def csr(self, name: str, matrix: csr_matrix) -> None:
+        matrix = csr_matrix(matrix)
+        for part in ('data', 'indices', 'indptr'):
+            self.array(f'{name}.{part}', getattr(matrix, part))
+        self.components[name] = {'kind': 'csr', 'shape': list(matrix.shape)}
+
+    def strings(self, name: str, values) -> None:
+        """Store text as a UTF-8 blob plus row offsets, with a null mask if needed."""
+        series = pd.Series(values, dtype=object)
+        nulls = series.isna().to_numpy()
+        offsets, blob = ColumnarMetadataStore.encode_text(series.where(~nulls, '').astype(str).tolist())
+        self.array(f'{name}.offsets', offsets)
+        self.array(f'{name}.blob', blob)
+        if nulls.any():
+            self.array(f'{name}.null', nulls)
+        self.components[name] = {'kind': 'text', 'rows': len(series)}
+
+
+class _TextColumn(Sequence):
+    """Strings of an offsets + UTF-8 blob column, decoded when read."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray, nulls: Optional[np.ndarray] = None):
+        self.offsets = offsets
+        self.blob = blob
+        self.nulls = nulls
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if self.nulls is not None and self.nulls[row]:
+            return None
+        return self.blob[self.offsets[row]:self.offsets[row + 1]].tobytes().decode('utf-8')
+
+    def to_numpy(self) -> np.ndarray:
+        """Every row as an object array of str (None for nulls)."""
+        raw = self.blob.tobytes()
+        bounds = zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist())
+        if raw.isascii():
+            # Byte offsets are character offsets: decode the blob once and slice
+            text = raw.decode('ascii')
+            strings = [text[start:stop] for start, stop in bounds]
+        else:
+            strings = [raw[start:stop].decode('utf-8') for start, stop in bounds]
+        values = np.empty(len(strings), dtype=object)
+        values[:] = strings
+        if self.nulls is not None:
+            values[np.asarray(self.nulls)] = None
+        return values
+
+    def tolist(self) -> List[Optional[str]]:
+        return self.to_numpy().tolist()
+
+
+class _ArtifactReader:
+    """Opens component arrays of an artifact directory, optionally memory-mapped."""
+
+    def __init__(self, directory: Path, components: Dict[str, Dict[str, Any]], mmap: bool):
+        self.directory = directory
+        self.components = components
+        self.mmap_mode = 'r' if mmap else None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.components
+
+    def array(self, name: str) -> np.ndarray:
+        entry = self.components[name]
+        return np.load(self.directory / entry['file'], mmap_mode=self.mmap_mode,
+                       allow_pickle=False)
+
+    def csr(self, name: str) -> csr_matrix:
+        matrix = csr_matrix((self.array(f'{name}.data'), self.array(f'{name}.indices'),
+                             self.array(f'{name}.indptr')),
+                            shape=tuple(self.components[name]['shape']), copy=False)
+        return matrix
+
+    def strings(self, name: str) -> _TextColumn:
+        nulls = self.array(f'{name}.null') if f'{name}.null' in self.components else None
+        if self.components[name]['kind'] != 'text':
+            # Version 1 fixed-width unicode array
+            offsets, blob = ColumnarMetadataStore.encode_text(self.array(name).tolist())
+            return _TextColumn(offsets, blob, nulls)
+        return _TextColumn(self.array(f'{name}.offsets'), self.array(f'{name}.blob'), nulls)
+
+
+def save_model_artifact(model: HybridRecommender, directory: Union[str, Path],
+                        metadata: Optional[Dict[str, Any]] = None) -> Path:
+    """
+    Write a fitted hybrid recommender as a memory-mappable artifact directory.
+
+    Args:
+        model: Fitted recommender
+        directory: Target directory (created if missing)
+        metadata: Extra JSON-serialisable entries stored in the manifest
+
+    Returns:
+        The artifact directory
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    writer = _ArtifactWriter(directory)
+
+    # Books table: one array per column
+    books = model.books_data
+    book_columns = []
+    for column in books.columns:
+        values = books[column].to_numpy()
+        if values.dtype.kind in 'biuf':
+            # Metadata keeps its dtype (e.g. float64 ISBNs would lose digits)
+            writer.array(f'books.{column}', values, downcast=False)
+            book_columns.append({'name': column, 'kind': 'numeric'})
+        else:
+            writer.strings(f'books.{column}', values)
+            book_columns.append({'name': column, 'kind': 'text'})
+
+    # Collaborative filter
+    collab = model.collab_recommender
+    writer.array('collab.user_ids', np.asarray(list(collab.user_mapping.keys())))
+    writer.array('collab.item_ids', collab.item_ids)
+    for name in ('user_factors', 'item_factors', 'user_biases', 'item_biases'):
+        writer.array(f'collab.{name}', getattr(collab, name))
+    writer.csr('collab.seen_matrix', collab.seen_matrix)
+
+    # Content model
+    content = model.content_recommender
+    vocabulary = getattr(content.tfidf, 'vocabulary_', None)
+    if vocabulary is not None:
+        terms = np.empty(len(vocabulary), dtype=object)
+        for term, index in vocabulary.items():
+            terms[index] = term
+        writer.strings('content.terms', terms)
+        writer.array('content.idf', content.tfidf.idf_)
+    writer.csr('content.tfidf_matrix', content.tfidf_matrix)
+    writer.csr('content.normalized_matrix', content._normalized_matrix)
+    writer.array('content.neighbor_indices', content.neighbor_indices)
+    writer.array('content.neighbor_scores', content.neighbor_scores)
+    if content.top_term_ids is not None:
+        writer.array('content.top_term_ids', content.top_term_ids)
+        writer.array('content.top_term_weights', content.top_term_weights)
+    if content._term_counts is not None:
+        # Counts and document frequencies let a loaded model take incremental updates
+        writer.csr('content.term_counts', content._term_counts)
+        writer.array('content.document_frequencies', content.document_frequencies)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model': {'content_weight': model.content_weight},
+        'books': {'columns': book_columns},
+        'collaborative': {
+            'params': {name: getattr(collab, name, None) for name in _CF_PARAMS},
+            'global_mean': float(collab.global_mean),
+            'training_history': getattr(collab, 'training_history', []),
+        },
+        'content': {
+            'max_features': content.tfidf.max_features,
+            'ngram_range': list(content.tfidf.ngram_range),
+            'n_neighbors': content.n_neighbors,
+            'similarity_chunk_size': content.similarity_chunk_size,
+            'idf_refresh_interval': content.idf_refresh_interval,
+            'pending_idf_updates': content._pending_idf_updates,
+            'sublinear_tf': content.tfidf.sublinear_tf,
+            'tag_vocabulary': content.uses_tag_vocabulary,
+            'n_top_terms': content.n_top_terms,
+        },
+        'components': writer.components,
+        'metadata': metadata or {},
+    }
+    # The manifest goes last so a crashed save never looks complete
+    with open(directory / MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+
+    logger.info(f"Saved model artifact to {directory}")
+    return directory
+
+
+def load_model_artifact(directory: Union[str, Path], mmap: bool = True) -> HybridRecommender:
+    """
+    Load a hybrid recommender from an artifact directory.
+
+    Args:
+        directory: Directory written by ``save_model_artifact``
+        mmap: Memory-map arrays read-only; False reads private copies
+
+    Returns:
+        Recommender ready for inference
+    """
+    directory = Path(directory)
+    with open(directory / MANIFEST_FILE, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') not in _READABLE_VERSIONS:
+        raise ValueError(
+            f"Unsupported model artifact version: {manifest.get('format_version')}"
+        )
+    reader = _ArtifactReader(directory, manifest['components'], mmap)
+
+    books = pd.DataFrame({
+        column['name']: (reader.array(f"books.{column['name']}") if column['kind'] == 'numeric'
+                         else reader.strings(f"books.{column['name']}").to_numpy())
+        for column in manifest['books']['columns']
+    }, copy=False)
+
+    collab_manifest = manifest['collaborative']
+    collab = CollaborativeFilter(**collab_manifest['params'])
+    collab.global_mean = collab_manifest['global_mean']
+    collab.training_history = collab_manifest.get('training_history', [])
+    user_ids = reader.array('collab.user_ids')
+    collab.item_ids = reader.array('collab.item_ids')
+    collab.user_mapping = dict(zip(user_ids.tolist(), range(len(user_ids))))
+    collab.item_mapping = dict(zip(collab.item_ids.tolist(), range(len(collab.item_ids))))
+    for name in ('user_factors', 'item_factors', 'user_biases', 'item_biases'):
+        setattr(collab, name, reader.array(f'collab.{name}'))
+    collab.seen_matrix = reader.csr('collab.seen_matrix')
+    if collab.retrieval == "ann":
+        if FAISS_AVAILABLE:
+            collab.build_ann_index()
+        else:
+            logger.warning("faiss is not installed; ANN retrieval index not rebuilt")
+
+    content_manifest = manifest['content']
+    content = FeatureExtractor(
+        max_features=content_manifest['max_features'],
+        ngram_range=tuple(content_manifest['ngram_range']),
+        n_neighbors=content_manifest['n_neighbors'],
+        similarity_chunk_size=content_manifest['similarity_chunk_size'],
+        idf_refresh_interval=content_manifest.get('idf_refresh_interval', 1000),
+        sublinear_tf=content_manifest.get('sublinear_tf', False),
+        n_top_terms=content_manifest.get('n_top_terms', 20),
+    )
+    if 'content.terms' in reader:
+        terms = reader.strings('content.terms')
+        if content_manifest.get('tag_vocabulary'):
+            content.use_tag_vocabulary(terms.tolist())
+        else:
+            content.tfidf.vocabulary_ = dict(zip(terms.tolist(), range(len(terms))))
+        content.tfidf.idf_ = np.asarray(reader.array('content.idf'), dtype=np.float64)
+    content.tfidf_matrix = reader.csr('content.tfidf_matrix')
+    content._normalized_matrix = reader.csr('content.normalized_matrix')
+    content.neighbor_indices = reader.array('content.neighbor_indices')
+    content.neighbor_scores = reader.array('content.neighbor_scores')
+    if 'content.top_term_ids' in reader:
+        content.top_term_ids = reader.array('content.top_term_ids')
+        content.top_term_weights = reader.array('content.top_term_weights')
+    else:
+        content._build_top_terms(content.tfidf_matrix)
+    if 'content.term_counts' in reader:
+        content._term_counts = reader.csr('content.term_counts')
+        content.document_frequencies = reader.array('content.document_frequencies')
+        content._pending_idf_updates = content_manifest.get('pending_idf_updates', 0)
+    content.book_indices = {title: idx for idx, title in enumerate(books['title'])}
+
+    model = HybridRecommender(content_weight=manifest['model']['content_weight'])
+    model.collab_recommender = collab
+    model.content_recommender = content
+    model.books_data = books
+    model._build_book_lookup(books)
+
+    logger.info(f"Loaded model artifact from {directory} (mmap={mmap})")
+    return model
+
+
+def convert_pickle_to_artifact(pickle_path: Union[str, Path], directory: Union[str, Path],
+                               metadata: Optional[Dict[str, Any]] = None) -> Path:
+    """Convert a pickled ``HybridRecommender`` into an artifact directory."""
+    with open(pickle_path, 'rb') as f:
+        model = pickle.load(f)
+    return save_model_artifact(model, directory,
+                               {'converted_from': str(pickle_path), **(metadata or {})})
@@ -3,12 +3,16 @@ import json
 import pickle
 import logging
 import threading
+import shutil
 import time
 from typing import Dict, Any, Optional, List, Callable
 from datetime import datetime
 from pathlib import Path
 from src.config import Config
 from src.models.hybrid_recommender import HybridRecommender
+from src.models.model_artifacts import (
+    MANIFEST_FILE, convert_pickle_to_artifact, load_model_artifact, save_model_artifact
+)
 
 logger = logging.getLogger(__name__)
 
@@ -288,7 +292,7 @@ class ModelManager:
     def _get_latest_version_id(self) -> Optional[str]:
         """Get the latest model version ID."""
         try:
-            model_files = list(self.model_dir.glob('model_*.pkl'))
+            model_files = self._list_model_paths()
             if not model_files:
                 return None
                 
@@ -305,37 +309,70 @@ class ModelManager:
             logger.error(f"Error getting latest version: {str(e)}")
             return None
             
-    def _load_model_version(self, version_id: str) -> HybridRecommender:
-        """Load a specific model version from disk."""
+    def _list_model_paths(self) -> List[Path]:
+        """Model versions on disk: artifact directories and legacy pickles."""
+        return [
+            path for path in self.model_dir.glob('model_*')
+            if path.suffix == '.pkl' or (path / MANIFEST_FILE).exists()
+        ]
+    
+    def _model_path(self, version_id: str) -> Path:
+        """Path of a model version, preferring the artifact directory over a pickle."""
+        artifact_dir = self.model_dir / f'model_{version_id}'
+        if (artifact_dir / MANIFEST_FILE).exists():
+            return artifact_dir
         model_path = self.model_dir / f'model_{version_id}.pkl'
-        
         if not model_path.exists():
             raise FileNotFoundError(f"Model version {version_id} not found")
-            
+        return model_path
+    
+    def _read_model(self, version_id: str) -> HybridRecommender:
+        """Read a model version in whichever format it was saved."""
+        model_path = self._model_path(version_id)
+        if model_path.is_dir():
+            return load_model_artifact(model_path, mmap=True)
         with open(model_path, 'rb') as f:
-            model = pickle.load(f)
+            return pickle.load(f)
+            
+    def _load_model_version(self, version_id: str) -> HybridRecommender:
+        """Load a specific model version from disk."""
+        model = self._read_model(version_id)
             
         logger.info(f"Loaded model version {version_id}")
         return model
 
-    def save_model(self, model: HybridRecommender, metrics: Dict[str, float], params: Dict[str, Any]) -> str:
-        """Save model, metrics, and parameters with versioning."""
+    def save_model(self, model: HybridRecommender, metrics: Dict[str, float], params: Dict[str, Any],
+                   model_format: Optional[str] = None) -> str:
+        """Save model, metrics, and parameters with versioning.
+        
+        ``model_format`` defaults to ``Config.MODEL_FORMAT``: "mmap" writes a
+        memory-mappable artifact directory, "pickle" a single pickle file.
+        """
         try:
+            model_format = model_format or self.config.MODEL_FORMAT
+            if model_format not in ('mmap', 'pickle'):
+                raise ValueError(f"Unsupported model format: {model_format}")
+            
             # Generate version ID based on timestamp
             version_id = datetime.now().strftime('%Y%m%d_%H%M%S')
             
             # Save model file
-            model_path = self.model_dir / f'model_{version_id}.pkl'
-            with open(model_path, 'wb') as f:
-                pickle.dump(model, f)
+            if model_format == 'mmap':
+                save_model_artifact(model, self.model_dir / f'model_{version_id}',
+                                    {'version_id': version_id})
+            else:
+                model_path = self.model_dir / f'model_{version_id}.pkl'
+                with open(model_path, 'wb') as f:
+                    pickle.dump(model, f)
             
             # Save metadata
             metadata = {
                 'version_id': version_id,
                 'timestamp': datetime.now().isoformat(),
+                'format': model_format,
                 'metrics': metrics,
                 'parameters': params,
-                'python_version': self.config.PYTHON_VERSION,
+                'python_version': getattr(self.config, 'PYTHON_VERSION', None),
                 'dependencies': self._get_dependencies()
             }
             
@@ -355,19 +392,14 @@ class ModelManager:
         try:
             if version_id is None:
                 # Get the latest version
-                model_files = list(self.model_dir.glob('model_*.pkl'))
+                model_files = self._list_model_paths()
                 if not model_files:
                     raise FileNotFoundError("No model files found")
                 
-                latest_model = max(model_files, key=lambda x: x.stem.split('_')[1])
-                version_id = latest_model.stem.split('_')[1]
-            
-            model_path = self.model_dir / f'model_{version_id}.pkl'
-            if not model_path.exists():
-                raise FileNotFoundError(f"Model version {version_id} not found")
+                latest_model = max(model_files, key=lambda x: x.stem.replace('model_', ''))
+                version_id = latest_model.stem.replace('model_', '')
             
-            with open(model_path, 'rb') as f:
-                model = pickle.load(f)
+            model = self._read_model(version_id)
             
             self.current_model = model
             self.current_model_version = version_id
@@ -379,6 +411,34 @@ class ModelManager:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def convert_to_artifact(self, version_id: str, remove_pickle: bool = False) -> Path:
+        """Convert a pickled model version into the memory-mappable artifact format.
+        
+        Args:
+            version_id: Version whose ``model_<version_id>.pkl`` is converted
+            remove_pickle: Delete the pickle once the artifact is written
+            
+        Returns:
+            Path of the artifact directory
+        """
+        try:
+            pickle_path = self.model_dir / f'model_{version_id}.pkl'
+            if not pickle_path.exists():
+                raise FileNotFoundError(f"Pickled model version {version_id} not found")
+            
+            artifact_dir = convert_pickle_to_artifact(
+                pickle_path, self.model_dir / f'model_{version_id}', {'version_id': version_id}
+            )
+            if remove_pickle:
+                pickle_path.unlink()
+            
+            logger.info(f"Converted model version {version_id} to artifact format")
+            return artifact_dir
+            
+        except Exception as e:
+            logger.error(f"Error converting model version: {str(e)}")
+            raise
+    
     def get_model_metadata(self, version_id: Optional[str] = None) -> Dict[str, Any]:
         """Get metadata for a specific model version or the latest model."""
         try:
@@ -410,7 +470,8 @@ class ModelManager:
             metadata_files = self.model_dir.glob('metadata_*.json')
             
             for metadata_file in metadata_files:
-                version_id = metadata_file.stem.split('_')[1]
+                # Version ids are timestamps with an underscore (YYYYmmdd_HHMMSS)
+                version_id = metadata_file.stem[len('metadata_'):]
                 metadata = self.get_model_metadata(version_id)
                 versions.append(metadata)
             
@@ -425,14 +486,17 @@ class ModelManager:
     def delete_model_version(self, version_id: str) -> bool:
         """Delete a specific model version and its metadata."""
         try:
-            model_path = self.model_dir / f'model_{version_id}.pkl'
+            model_path = self._model_path(version_id)
             metadata_path = self.model_dir / f'metadata_{version_id}.json'
             
-            if not model_path.exists() or not metadata_path.exists():
+            if not metadata_path.exists():
                 raise FileNotFoundError(f"Model version {version_id} not found")
             
             # Delete files
-            model_path.unlink()
+            if model_path.is_dir():
+                shutil.rmtree(model_path)
+            else:
+                model_path.unlink()
             metadata_path.unlink()
             
             logger.info(f"Deleted model version {version_id}")
@@ -0,0 +1,197 @@
+"""
+Stratified parallel SGD for the collaborative filter.
+
+Users and items are split into ``P`` blocks each. An epoch runs ``P``
+sub-epochs; in sub-epoch ``s`` worker ``b`` updates the ratings of user
+block ``b`` against item block ``(b + s) % P``, so no two workers ever
+touch the same factor rows and the updates need no locks. Factors,
+biases and the block-sorted rating arrays live in
+``multiprocessing.shared_memory`` so workers update them in place.
+"""
+
+import logging
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Views onto the shared arrays, attached once per worker process
+_WORKER_ARRAYS: Dict[str, np.ndarray] = {}
+_WORKER_SEGMENTS: List[shared_memory.SharedMemory] = []
+_WORKER_PARAMS: Dict[str, float] = {}
+
+
+def sgd_pass(users: np.ndarray, items: np.ndarray, ratings: np.ndarray,
+             user_factors: np.ndarray, item_factors: np.ndarray,
+             user_biases: np.ndarray, item_biases: np.ndarray,
+             global_mean: float, learning_rate: float, regularization: float) -> None:
+    """Run one in-place SGD pass over the given ratings, in order."""
+    for user, item, rating in zip(users, items, ratings):
+        # Predict rating
+        pred = global_mean + \
+               user_biases[user] + \
+               item_biases[item] + \
+               user_factors[user].dot(item_factors[item])
+
+        # Calculate error
+        error = rating - pred
+
+        # Update biases
+        user_biases[user] += learning_rate * \
+                             (error - regularization * user_biases[user])
+        item_biases[item] += learning_rate * \
+                             (error - regularization * item_biases[item])
+
+        # Update factors
+        user_factors_update = error * item_factors[item] - \
+                              regularization * user_factors[user]
+        item_factors_update = error * user_factors[user] - \
+                              regularization * item_factors[item]
+
+        user_factors[user] += learning_rate * user_factors_update
+        item_factors[item] += learning_rate * item_factors_update
+
+
+def _share(array: np.ndarray, segments: List[shared_memory.SharedMemory]
+           ) -> Tuple[Tuple[str, Tuple[int, ...], str], np.ndarray]:
+    """Copy an array into a new shared memory segment; return its spec and a view."""
+    segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(segment)
+    view = np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)
+    view[...] = array
+    return (segment.name, array.shape, array.dtype.str), view
+
+
+def _attach(specs: Dict[str, Tuple[str, Tuple[int, ...], str]],
+            params: Dict[str, float]) -> None:
+    """Pool initializer: map the shared segments into this worker."""
+    for name, (segment_name, shape, dtype) in specs.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _WORKER_SEGMENTS.append(segment)
+        _WORKER_ARRAYS[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    _WORKER_PARAMS.update(params)
+
+
+def _run_block(task: Tuple[int, int, int]) -> int:
+    """Train on ratings[start:stop] of the block-sorted stream in a seeded order."""
+    start, stop, seed = task
+    if stop <= start:
+        return 0
+    arrays = _WORKER_ARRAYS
+    order = start + np.random.default_rng(seed).permutation(stop - start)
+    sgd_pass(arrays['users'][order], arrays['items'][order], arrays['ratings'][order],
+             arrays['user_factors'], arrays['item_factors'],
+             arrays['user_biases'], arrays['item_biases'],
+             _WORKER_PARAMS['global_mean'], _WORKER_PARAMS['learning_rate'],
+             _WORKER_PARAMS['regularization'])
+    return stop - start
+
+
+class ParallelSGDTrainer:
+    """Train collaborative filter parameters with stratified SGD on a process pool."""
+
+    def __init__(self, n_jobs: Optional[int] = None, random_state: Optional[int] = None):
+        """
+        Args:
+            n_jobs: Worker processes (and blocks per side); defaults to the
+                CPU count
+            random_state: Seed for the block partition and the per-block
+                rating order; with a fixed seed and worker count the result
+                is deterministic regardless of scheduling
+        """
+        self.n_jobs = max(1, n_jobs or os.cpu_count() or 1)
+        self.random_state = random_state
+        self.epoch_stats: List[Dict[str, float]] = []
+
+    def _stratify(self, users: np.ndarray, items: np.ndarray, n_users: int,
+                  n_items: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+        """Order ratings by (sub-epoch, user block) and return the block offsets."""
+        n_blocks = self.n_jobs
+        user_block = rng.permutation(n_users) % n_blocks
+        item_block = rng.permutation(n_items) % n_blocks
+        ub = user_block[users]
+        stratum = (item_block[items] - ub) % n_blocks
+        key = stratum * n_blocks + ub
+        order = np.argsort(key, kind='stable')
+        offsets = np.zeros(n_blocks * n_blocks + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key, minlength=n_blocks * n_blocks), out=offsets[1:])
+        return order, offsets
+
+    def fit(self, model, users: np.ndarray, items: np.ndarray, ratings: np.ndarray,
+            epoch_callback: Optional[Callable[..., bool]] = None) -> None:
+        """Train ``model``'s initialised factors and biases in place.
+        
+        ``epoch_callback(stats, user_factors, item_factors, user_biases,
+        item_biases)`` runs between epochs on the live shared arrays and
+        stops training by returning True.
+        """
+        n_blocks = self.n_jobs
+        seeds = np.random.SeedSequence(self.random_state)
+        order, offsets = self._stratify(users, items, len(model.user_factors),
+                                        len(model.item_factors),
+                                        np.random.default_rng(seeds.spawn(1)[0]))
+
+        segments: List[shared_memory.SharedMemory] = []
+        views: Dict[str, np.ndarray] = {}
+        try:
+            arrays = {
+                'users': np.ascontiguousarray(users[order], dtype=np.int64),
+                'items': np.ascontiguousarray(items[order], dtype=np.int64),
+                'ratings': np.ascontiguousarray(ratings[order], dtype=np.float64),
+                'user_factors': model.user_factors,
+                'item_factors': model.item_factors,
+                'user_biases': model.user_biases,
+                'item_biases': model.item_biases,
+            }
+            shared = {name: _share(array, segments) for name, array in arrays.items()}
+            specs = {name: spec for name, (spec, _) in shared.items()}
+            views = {name: view for name, (_, view) in shared.items()}
+            shared = None
+            params = {
+                'global_mean': float(model.global_mean),
+                'learning_rate': model.learning_rate,
+                'regularization': model.regularization,
+            }
+
+            self.epoch_stats = []
+            method = 'fork' if 'fork' in mp.get_all_start_methods() else 'spawn'
+            with mp.get_context(method).Pool(n_blocks, initializer=_attach,
+                                             initargs=(specs, params)) as pool:
+                for epoch, epoch_seeds in enumerate(seeds.spawn(model.n_epochs)):
+                    block_seeds = epoch_seeds.generate_state(n_blocks * n_blocks)
+                    start_time = time.perf_counter()
+                    processed = 0
+                    for s in range(n_blocks):
+                        tasks = [
+                            (int(offsets[s * n_blocks + b]), int(offsets[s * n_blocks + b + 1]),
+                             int(block_seeds[s * n_blocks + b]))
+                            for b in range(n_blocks)
+                        ]
+                        processed += sum(pool.map(_run_block, tasks, chunksize=1))
+                    elapsed = time.perf_counter() - start_time
+                    self.epoch_stats.append({
+                        'epoch': epoch,
+                        'seconds': elapsed,
+                        'ratings_per_sec': processed / elapsed if elapsed > 0 else 0.0
+                    })
+                    logger.info("Parallel SGD epoch %d: %.0f ratings/sec on %d workers",
+                                epoch, self.epoch_stats[-1]['ratings_per_sec'], n_blocks)
+                    if epoch_callback is not None and epoch_callback(
+                            self.epoch_stats[-1], views['user_factors'], views['item_factors'],
+                            views['user_biases'], views['item_biases']):
+                        break
+
+            # Copy the trained parameters out before the segments are released
+            for name in ('user_factors', 'item_factors', 'user_biases', 'item_biases'):
+                setattr(model, name, views[name].copy())
+        finally:
+            # Views must be released before their segments can be closed
+            views = None
+            for segment in segments:
+                segment.close()
+                segment.unlink()
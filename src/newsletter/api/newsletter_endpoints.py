@@ -14,6 +14,7 @@ import json
 from src.core.logging import StructuredLogger
 from src.core.cache import AsyncCacheManager
 from src.core.monitoring import MetricsCollector
+from src.data.data_loader import DataLoader
 from src.auth.security import get_current_user, User, require_permissions
 from src.newsletter.core.personalization_engine import PersonalizationEngine, UserPersona
 from src.newsletter.core.content_curator import AIContentCurator, ContentItem
@@ -107,7 +108,8 @@ class NewsletterAPI:
     def __init__(
         self,
         cache_manager: AsyncCacheManager,
-        metrics_collector: MetricsCollector
+        metrics_collector: MetricsCollector,
+        data_loader: Optional[DataLoader] = None
     ):
         self.cache = cache_manager
         self.metrics = metrics_collector
@@ -115,7 +117,7 @@ class NewsletterAPI:
         
         # Initialize newsletter components
         self.personalization_engine = PersonalizationEngine(cache_manager)
-        self.content_curator = AIContentCurator(cache_manager)
+        self.content_curator = AIContentCurator(cache_manager, data_loader=data_loader)
         self.send_time_optimizer = SendTimeOptimizer(cache_manager)
         self.template_engine = AdaptiveTemplateEngine(cache_manager)
         self.campaign_manager = CampaignManager(
@@ -774,11 +776,12 @@ newsletter_router.include_router(validation_router, prefix="/validation")
 
 
 # Initialize function to set up the newsletter API
-async def initialize_newsletter_api(cache_manager: AsyncCacheManager, metrics_collector: MetricsCollector) -> NewsletterAPI:
+async def initialize_newsletter_api(cache_manager: AsyncCacheManager, metrics_collector: MetricsCollector,
+                                    data_loader: Optional[DataLoader] = None) -> NewsletterAPI:
     """Initialize the newsletter API with dependencies"""
     global newsletter_api
     
-    newsletter_api = NewsletterAPI(cache_manager, metrics_collector)
+    newsletter_api = NewsletterAPI(cache_manager, metrics_collector, data_loader)
     await newsletter_api.initialize()
     
     return newsletter_api
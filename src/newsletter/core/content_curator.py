@@ -16,6 +16,7 @@ from collections import defaultdict, Counter
 
 from src.core.logging import StructuredLogger
 from src.core.cache import AsyncCacheManager
+from src.data.data_loader import DataLoader
 from src.models.hybrid_recommender import HybridRecommender
 from src.newsletter.core.personalization_engine import ContentType, UserPersona
 
@@ -89,11 +90,13 @@ class AIContentCurator:
     def __init__(
         self,
         cache_manager: AsyncCacheManager,
-        recommender: HybridRecommender,
-        config: Optional[ContentCurationConfig] = None
+        recommender: Optional[HybridRecommender] = None,
+        config: Optional[ContentCurationConfig] = None,
+        data_loader: Optional[DataLoader] = None
     ):
         self.cache = cache_manager
         self.recommender = recommender
+        self.data_loader = data_loader
         self.config = config or ContentCurationConfig()
         self.logger = StructuredLogger(__name__)
         
@@ -335,6 +338,9 @@ class AIContentCurator:
             popular_books = await self._get_popular_books()
             
             for book in popular_books[:10]:  # Limit to top 10
+                genres = book.get('genres') or []
+                if isinstance(genres, str):
+                    genres = genres.split()
                 content_item = ContentItem(
                     id=f"rec_{book.get('book_id', 'unknown')}",
                     type=ContentType.BOOK_RECOMMENDATION,
@@ -344,15 +350,15 @@ class AIContentCurator:
                     description=f"A highly-rated book by {book.get('authors', 'Unknown Author')}",
                     content=self._format_book_content(book),
                     metadata=book,
-                    tags=book.get('genres', []),
+                    tags=genres,
                     target_audience=["general"],
                     estimated_read_time=2,
-                    quality_score=min(1.0, book.get('average_rating', 3.0) / 5.0),
+                    quality_score=min(1.0, (book.get('average_rating') or 3.0) / 5.0),
                     engagement_prediction=0.7,
                     created_at=datetime.utcnow(),
                     expires_at=datetime.utcnow() + timedelta(days=7),
                     personalization_hints={
-                        "genres": book.get('genres', []),
+                        "genres": genres,
                         "rating": book.get('average_rating', 0),
                         "popularity": book.get('ratings_count', 0)
                     }
@@ -728,7 +734,10 @@ class AIContentCurator:
     
     async def _get_popular_books(self) -> List[Dict]:
         """Get popular books for recommendations"""
-        # This would integrate with the existing book database
+        if self.data_loader is not None:
+            book_index = await self.data_loader.get_book_index_async()
+            if 'ratings_count' in book_index.columns:
+                return book_index.top('ratings_count', 10)
         return [
             {
                 "book_id": "1",
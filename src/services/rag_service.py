@@ -8,11 +8,15 @@ from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
 
 from src.core.vector_store import BookVectorStore, VectorStoreError
+from src.data.data_loader import DataLoader
 from src.core.logging import StructuredLogger
 from src.core.exceptions import GoodBooksException
 
 logger = StructuredLogger(__name__)
 
+# Metadata the explanation templates read from similar books
+CONTEXT_FIELDS = ("average_rating", "description", "all_tags", "genres")
+
 class RAGError(GoodBooksException):
     """Raised when RAG operations fail"""
     pass
@@ -32,14 +36,18 @@ class RAGExplanationService:
     Uses vector store for content retrieval and template-based generation.
     """
     
-    def __init__(self, vector_store: BookVectorStore):
+    def __init__(self, vector_store: BookVectorStore,
+                 data_loader: Optional[DataLoader] = None):
         """
         Initialize RAG explanation service.
         
         Args:
             vector_store: Initialized BookVectorStore instance
+            data_loader: Source of the shared book metadata index; query book
+                metadata falls back to the vector store without it
         """
         self.vector_store = vector_store
+        self.data_loader = data_loader
         self.explanation_templates = self._load_explanation_templates()
     
     def _load_explanation_templates(self) -> Dict[str, str]:
@@ -122,15 +130,18 @@ Search insights:
             )
             
             # Get book metadata from vector store
-            if book_id not in self.vector_store.book_id_to_id:
+            if book_id not in self.vector_store.book_metadata:
                 raise RAGError(f"Book {book_id} not found in vector store")
             
-            vector_id = self.vector_store.book_id_to_id[book_id]
-            query_book = self.vector_store.book_metadata[vector_id]
+            query_book = None
+            if self.data_loader is not None:
+                query_book = await self.data_loader.get_book_metadata_async(book_id)
+            if query_book is None:
+                query_book = self.vector_store.book_metadata[book_id]
             
             # Get similar books for context
             similar_books = await self.vector_store.get_similar_books_async(
-                book_id, k=n_context_books
+                book_id, k=n_context_books, fields=CONTEXT_FIELDS
             )
             
             # Create explanation context
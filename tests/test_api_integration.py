@@ -113,9 +113,8 @@ class TestAPIIntegration:
                 ]
             )
             mock_vector_store.book_metadata = {
-                0: {"title": "The Great Gatsby", "authors": "F. Scott Fitzgerald"}
+                1: {"title": "The Great Gatsby", "authors": "F. Scott Fitzgerald"}
             }
-            mock_vector_store.book_id_to_id = {1: 0}
             
             # Setup RAG service mock
             mock_rag_service.explain_recommendation_async = AsyncMock(
@@ -273,7 +272,7 @@ class TestAPIIntegration:
         }
         
         # Mock vector store to return None for invalid book
-        with patch('src.api.main.vector_store.book_id_to_id', {}):
+        with patch('src.api.main.vector_store.book_metadata', {}):
             response = client.post("/explain", json=payload, headers=api_headers)
             
             # Should still work but with empty book_info
@@ -312,6 +312,29 @@ class TestDataValidation:
             assert not results["books"].is_valid
             assert len(results["books"].errors) > 0
     
+    def test_chunked_validation_matches_in_memory(self, validator, temp_data_dir):
+        """Test streamed validation merges chunk results into the same report."""
+        in_memory = validator.validate_all_datasets(temp_data_dir)
+        chunked = validator.validate_all_datasets(temp_data_dir, chunk_size=2)
+        
+        for table_name in ["books", "ratings", "tags", "book_tags"]:
+            assert chunked[table_name].is_valid == in_memory[table_name].is_valid
+            assert chunked[table_name].row_count == in_memory[table_name].row_count
+            assert chunked[table_name].summary["chunks"] > 1 or chunked[table_name].row_count <= 2
+        assert chunked["ratings"].summary["numeric_stats"]["rating"]["max"] == 5
+        
+        # Violations that only show up across chunk boundaries
+        (temp_data_dir / "ratings.csv").write_text(
+            "user_id,book_id,rating\n1,1,5\n1,2,4\n2,999,3\n1,1,2\n3,3,7\n"
+        )
+        results = validator.validate_all_datasets(temp_data_dir, chunk_size=2)
+        errors_text = " ".join(results["ratings"].errors)
+        assert "Primary key ['user_id', 'book_id'] has duplicate values" in errors_text
+        assert "above maximum 5" in errors_text
+        assert results["referential_integrity"].errors == [
+            "Ratings table references non-existent book_ids: [999]..."
+        ]
+    
     def test_validate_data_directory_function(self, temp_data_dir):
         """Test the main validate_data_directory function."""
         results = validate_data_directory(str(temp_data_dir))
@@ -1,10 +1,21 @@
+import asyncio
 import pytest
 import pandas as pd
 import numpy as np
+from src.core.faiss_index import INDEX_TYPES, IndexSpec, create_index, ivf_of, train_index
+from src.core.metadata_store import ColumnarMetadataStore
+from src.core.stage_cache import StageCache, load_frame, save_frame
 from src.data.data_loader import DataLoader
+from src.data.rating_matrix import read_rating_matrix
+from src.data.synthetic import SyntheticSpec, generate_goodbooks_dataset
+from src.data.tag_matrix import build_tag_matrix
 from src.features.feature_extractor import FeatureExtractor
 from src.models.collaborative_filter import CollaborativeFilter
 from src.models.hybrid_recommender import HybridRecommender
+from src.models.candidate_pipeline import CandidateRerankPipeline, PopularityCandidates
+from src.models.model_artifacts import (
+    convert_pickle_to_artifact, load_model_artifact, save_model_artifact
+)
 
 @pytest.fixture
 def sample_books_data():
@@ -57,6 +68,187 @@ def test_collaborative_filter(sample_ratings_data):
     assert len(recommendations) > 0
     assert all(isinstance(rec, tuple) for rec in recommendations)
 
+def test_collaborative_filter_als(sample_ratings_data):
+    cf = CollaborativeFilter(n_factors=2, n_epochs=5, solver="als")
+    cf.fit(sample_ratings_data)
+    
+    assert cf.user_factors.shape == (3, 2)
+    assert cf.item_factors.shape == (3, 2)
+    assert cf.user_biases.shape == (3,)
+    assert cf.item_biases.shape == (3,)
+    
+    # ALS should fit the observed ratings at least as well as the global mean
+    preds = np.array([
+        cf.predict(user_id=u, book_id=b)
+        for u, b in zip(sample_ratings_data['user_id'], sample_ratings_data['book_id'])
+    ])
+    actual = sample_ratings_data['rating'].values
+    assert np.all(np.isfinite(preds))
+    assert np.mean((preds - actual) ** 2) <= np.mean((cf.global_mean - actual) ** 2)
+    
+    recommendations = cf.get_recommendations(user_id=1)
+    assert len(recommendations) > 0
+    
+    with pytest.raises(ValueError):
+        CollaborativeFilter(solver="newton")
+
+def test_collaborative_filter_batch_recommendations(sample_ratings_data):
+    cf = CollaborativeFilter(n_factors=2, n_epochs=2)
+    cf.fit(sample_ratings_data)
+    
+    batch = cf.get_recommendations_batch([1, 2, 999], n_recommendations=3, batch_size=1)
+    assert len(batch) == 3
+    assert batch[2] == []  # Unknown users get no recommendations
+    
+    # Batch scoring must agree with the single-user path
+    for user_id, recs in zip([1, 2], batch[:2]):
+        single = cf.get_recommendations(user_id, n_recommendations=3)
+        assert [book_id for book_id, _ in recs] == [book_id for book_id, _ in single]
+        assert np.allclose([s for _, s in recs], [s for _, s in single])
+    
+    # Seen-item masking removes books the user already rated
+    unseen = cf.get_recommendations_batch([1], n_recommendations=3, exclude_seen=True)[0]
+    rated = set(sample_ratings_data.loc[sample_ratings_data['user_id'] == 1, 'book_id'])
+    assert [book_id for book_id, _ in unseen] == [3]
+    assert not rated & {book_id for book_id, _ in unseen}
+
+def test_collaborative_filter_parallel_sgd(sample_ratings_data):
+    models = []
+    for _ in range(2):
+        cf = CollaborativeFilter(n_factors=2, n_epochs=2, solver="parallel_sgd",
+                                 n_jobs=2, random_state=0)
+        cf.fit(sample_ratings_data)
+        models.append(cf)
+    
+    # A fixed seed and worker count give identical factors across runs
+    assert np.array_equal(models[0].user_factors, models[1].user_factors)
+    assert np.array_equal(models[0].item_biases, models[1].item_biases)
+    assert len(models[0].training_history) == 2
+    assert all(epoch['ratings_per_sec'] > 0 for epoch in models[0].training_history)
+    assert len(models[0].get_recommendations(1, n_recommendations=2)) == 2
+
+def test_collaborative_filter_warm_start(sample_ratings_data):
+    previous = CollaborativeFilter(n_factors=2, n_epochs=3, solver="als", random_state=0)
+    previous.fit(sample_ratings_data)
+    
+    # User 4 is new; everyone else is aligned to the previous model's factors
+    extended = pd.concat([
+        sample_ratings_data,
+        pd.DataFrame({'user_id': [4], 'book_id': [3], 'rating': [2]})
+    ]).iloc[::-1]
+    warm = CollaborativeFilter(n_factors=2, n_epochs=0, solver="als", random_state=1)
+    warm.fit(extended, warm_start_from=previous)
+    for user_id in [1, 2, 3]:
+        assert np.allclose(warm.user_factors[warm.user_mapping[user_id]],
+                           previous.user_factors[previous.user_mapping[user_id]])
+    for book_id in [1, 2, 3]:
+        assert np.isclose(warm.item_biases[warm.item_mapping[book_id]],
+                          previous.item_biases[previous.item_mapping[book_id]])
+    assert not np.allclose(warm.user_factors[warm.user_mapping[4]], 0)
+    
+    # Incompatible previous models fall back to a cold start instead of failing
+    cold = CollaborativeFilter(n_factors=2, n_epochs=0, solver="als", random_state=1)
+    cold.fit(extended)
+    for n_factors, solver in [(3, "als"), (2, "sgd")]:
+        incompatible = CollaborativeFilter(n_factors=n_factors, n_epochs=1, solver=solver, random_state=0)
+        incompatible.fit(sample_ratings_data)
+        rebuilt = CollaborativeFilter(n_factors=2, n_epochs=0, solver="als", random_state=1)
+        rebuilt.fit(extended, warm_start_from=incompatible)
+        assert np.array_equal(rebuilt.user_factors, cold.user_factors)
+    
+    # A flat validation curve stops training after the patience runs out
+    stopping = CollaborativeFilter(n_factors=2, n_epochs=20, solver="als",
+                                   early_stopping_rounds=2, early_stopping_tol=1.0)
+    stopping.fit(sample_ratings_data, validation=sample_ratings_data)
+    assert len(stopping.training_history) == 3
+    assert all('val_rmse' in epoch for epoch in stopping.training_history)
+
+def test_streamed_rating_matrix_matches_frame(sample_ratings_data, tmp_path):
+    # Duplicate (user, book) ratings stay separate; the latest one is "seen"
+    ratings = pd.concat([
+        sample_ratings_data,
+        pd.DataFrame({'user_id': [1], 'book_id': [1], 'rating': [2]})
+    ]).sort_values('user_id', kind='stable')
+    path = tmp_path / 'ratings.csv'
+    ratings.to_csv(path, index=False)
+    
+    matrix = read_rating_matrix(path, chunksize=2)
+    assert matrix.nnz == len(ratings)
+    assert list(matrix.user_ids) == list(ratings['user_id'].unique())
+    assert np.array_equal(matrix.to_frame().to_numpy(), ratings.to_numpy())
+    
+    streamed = CollaborativeFilter(n_factors=2, n_epochs=3, solver="als", random_state=0)
+    streamed.fit(matrix)
+    framed = CollaborativeFilter(n_factors=2, n_epochs=3, solver="als", random_state=0)
+    framed.fit(ratings)
+    assert streamed.user_mapping == framed.user_mapping
+    assert np.allclose(streamed.user_factors, framed.user_factors)
+    assert streamed.seen_matrix[streamed.user_mapping[1], streamed.item_mapping[1]] == 2
+    assert (streamed.seen_matrix != framed.seen_matrix).nnz == 0
+
+def test_collaborative_filter_partial_fit(sample_ratings_data):
+    cf = CollaborativeFilter(n_factors=2, n_epochs=3, solver="als")
+    cf.fit(sample_ratings_data)
+    item_factors = cf.item_factors.copy()
+    
+    new_ratings = pd.DataFrame({
+        'user_id': [42, 42, 1],
+        'book_id': [1, 99, 3],
+        'rating': [5, 4, 2]
+    })
+    cf.partial_fit(new_ratings)
+    
+    # New user and book are folded in; known item factors stay frozen
+    assert 42 in cf.user_mapping and 99 in cf.item_mapping
+    assert cf.item_factors.shape[0] == cf.seen_matrix.shape[1] == len(cf.item_ids)
+    assert np.allclose(cf.item_factors[:len(item_factors)], item_factors)
+    assert cf.seen_matrix[cf.user_mapping[1], cf.item_mapping[3]] == 2
+    
+    recs = cf.get_recommendations_batch([42], n_recommendations=5, exclude_seen=True)[0]
+    assert {book_id for book_id, _ in recs}.isdisjoint({1, 99})
+    assert np.isfinite(cf.predict(42, 99))
+
+def test_collaborative_filter_ann_retrieval(sample_ratings_data):
+    pytest.importorskip("faiss")
+    import pickle
+    
+    np.random.seed(0)
+    exact = CollaborativeFilter(n_factors=2, n_epochs=3, solver="als")
+    exact.fit(sample_ratings_data)
+    np.random.seed(0)
+    approx = CollaborativeFilter(n_factors=2, n_epochs=3, solver="als", retrieval="ann")
+    approx.fit(sample_ratings_data)
+    assert approx.ann_index is not None
+    
+    # On a tiny catalogue the index returns every item, so results match exactly
+    for user_id in [1, 2, 3]:
+        assert approx.get_recommendations(user_id, 3) == exact.get_recommendations(user_id, 3)
+    assert (approx.get_recommendations_batch([1], 3, exclude_seen=True)
+            == exact.get_recommendations_batch([1], 3, exclude_seen=True))
+    
+    # The index is dropped on pickling and rebuilt on load
+    restored = pickle.loads(pickle.dumps(approx))
+    assert restored.ann_index is not None
+    assert restored.get_recommendations(1, 3) == approx.get_recommendations(1, 3)
+
+    # Slots the index leaves empty (id -1) are dropped, not returned as -inf
+    class OneHitIndex:
+        def __init__(self, index):
+            self.index = index
+        
+        def search(self, queries, k):
+            distances, ids = self.index.search(queries, k)
+            ids[:, 1:] = -1
+            return distances, ids
+    
+    approx.ann_index = OneHitIndex(approx.ann_index)
+    single = approx.get_recommendations(1, 3)
+    assert len(single) == 1 and np.isfinite(single[0][1])
+    assert single == approx.get_recommendations_batch([1], 3)[0]
+    
+    with pytest.raises(ValueError):
+        CollaborativeFilter(retrieval="lsh")
+
 def test_hybrid_recommender(sample_books_data, sample_ratings_data):
     recommender = HybridRecommender(content_weight=0.5)
     
@@ -78,6 +270,331 @@ def test_hybrid_recommender(sample_books_data, sample_ratings_data):
     assert not hybrid_recs.empty
     assert 'hybrid_score' in hybrid_recs.columns
 
+def test_hybrid_fusion_keeps_duplicate_titles_apart(sample_ratings_data):
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3],
+        'title': ['Same Title', 'Same Title', 'Other'],
+        'authors': ['Author 1', 'Author 2', 'Author 3'],
+        'average_rating': [4.5, 4.0, 3.5],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    
+    recs = recommender.get_recommendations(user_id=1, n_recommendations=3)
+    assert sorted(recs['book_id']) == [1, 2, 3]
+    assert recs['hybrid_score'].is_monotonic_decreasing
+    
+    # Metadata comes from the book's own row, not a title join
+    by_id = recs.set_index('book_id')
+    assert by_id.loc[1, 'authors'] == 'Author 1'
+    assert by_id.loc[2, 'authors'] == 'Author 2'
+    
+    # Blended scores are normalized per component, so they stay within [0, 1]
+    blended = recommender.get_recommendations(user_id=1, book_title='Other')
+    assert blended['hybrid_score'].between(0, 1).all()
+
+def test_hybrid_update_books(sample_ratings_data):
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3],
+        'title': ['Book 1', 'Book 2', 'Book 3'],
+        'authors': ['Author 1', 'Author 2', 'Author 3'],
+        'average_rating': [4.5, 4.0, 3.5],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    
+    recommender.update_books(pd.DataFrame({
+        'book_id': [4, 3],
+        'title': ['Book 4', 'Book 3'],
+        'authors': ['Author 4', 'Author 3b'],
+        'average_rating': [4.1, 3.6],
+        'all_tags': ['fantasy mystery', 'fiction fantasy']
+    }))
+    
+    assert list(recommender.books_data['book_id']) == [1, 2, 3, 4]
+    assert recommender.books_data.loc[2, 'authors'] == 'Author 3b'
+    recs = recommender.get_recommendations(book_title='Book 1', n_recommendations=3)
+    assert set(recs['book_id']) == {2, 3, 4}
+
+def test_hybrid_update_books_repeated_new_id(sample_ratings_data):
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3],
+        'title': ['Book 1', 'Book 2', 'Book 3'],
+        'authors': ['Author 1', 'Author 2', 'Author 3'],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    
+    # The same new book twice in one batch is appended once, with its last version
+    recommender.update_books(pd.DataFrame({
+        'book_id': [4, 4],
+        'title': ['Book 4', 'Book 4'],
+        'authors': ['Author 4', 'Author 4b'],
+        'all_tags': ['fiction', 'fantasy mystery']
+    }))
+    content = recommender.content_recommender
+    assert list(recommender.books_data['book_id']) == [1, 2, 3, 4]
+    assert recommender.books_data.loc[3, 'authors'] == 'Author 4b'
+    assert content.tfidf_matrix.shape[0] == 4
+    assert content.book_indices['Book 4'] == 3
+
+def test_model_artifact_round_trip(sample_ratings_data, tmp_path):
+    import pickle
+    
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3],
+        'title': ['Book 1', 'Book 2', 'Book 3'],
+        'authors': ['Author 1', None, 'Émile Zoë'],
+        'average_rating': [4.5, 4.0, 3.5],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    expected = recommender.get_recommendations(user_id=1, book_title='Book 1')
+    
+    save_model_artifact(recommender, tmp_path / 'artifact')
+    loaded = load_model_artifact(tmp_path / 'artifact')
+    
+    # Arrays are float32 memory maps, shared read-only across processes
+    assert isinstance(loaded.collab_recommender.item_factors, np.memmap)
+    assert loaded.collab_recommender.item_factors.dtype == np.float32
+    assert pd.isna(loaded.books_data.loc[1, 'authors'])
+    assert loaded.books_data.loc[2, 'authors'] == 'Émile Zoë'
+    # Text is a UTF-8 blob plus offsets, not a fixed-width unicode array
+    assert np.load(tmp_path / 'artifact' / 'books.authors.blob.npy').dtype == np.uint8
+    assert not (tmp_path / 'artifact' / 'books.authors.npy').exists()
+    
+    actual = loaded.get_recommendations(user_id=1, book_title='Book 1')
+    assert list(actual['book_id']) == list(expected['book_id'])
+    assert np.allclose(actual['hybrid_score'], expected['hybrid_score'], atol=1e-5)
+    assert (loaded.content_recommender.tfidf.transform(['fiction']).toarray()
+            == recommender.content_recommender.tfidf.transform(['fiction']).toarray()).all()
+    
+    # Existing pickles convert to the same artifact layout
+    with open(tmp_path / 'model.pkl', 'wb') as f:
+        pickle.dump(recommender, f)
+    converted = load_model_artifact(convert_pickle_to_artifact(tmp_path / 'model.pkl',
+                                                               tmp_path / 'converted'))
+    assert list(converted.get_recommendations(user_id=1)['book_id']) == \
+        list(recommender.get_recommendations(user_id=1)['book_id'])
+
+def test_hybrid_tag_matrix_features(sample_books_data, sample_ratings_data, tmp_path):
+    book_tags = pd.DataFrame({
+        'goodreads_book_id': [1001, 1001, 1002, 1002, 1003],
+        'tag_id': [7, 8, 7, 9, 10],
+        'count': [120, 30, 80, 40, 200]
+    })
+    tags = pd.DataFrame({'tag_id': [7, 8, 9, 10],
+                         'tag_name': ['fiction', 'fantasy', 'mystery', 'non-fiction']})
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(sample_books_data, sample_ratings_data,
+                    tag_matrix=build_tag_matrix(sample_books_data, book_tags, tags))
+    
+    content = recommender.content_recommender
+    assert content.get_feature_names() == ['fiction', 'fantasy', 'mystery', 'non-fiction']
+    similar = content.get_similar_books('Book 1', sample_books_data, 1)
+    assert list(similar['title']) == ['Book 2']
+    
+    # The tag vocabulary survives an artifact round trip
+    loaded = load_model_artifact(save_model_artifact(recommender, tmp_path / 'artifact'))
+    assert loaded.content_recommender.uses_tag_vocabulary
+    assert (loaded.content_recommender.tfidf.transform(['fantasy']).toarray()
+            == content.tfidf.transform(['fantasy']).toarray()).all()
+
+def test_model_manager_lists_saved_versions(sample_ratings_data, tmp_path):
+    from src.models.model_manager import ModelManager
+    
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3],
+        'title': ['Book 1', 'Book 2', 'Book 3'],
+        'authors': ['Author 1', 'Author 2', 'Author 3'],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    manager = ModelManager()
+    manager.model_dir = tmp_path
+    
+    # Version ids are YYYYmmdd_HHMMSS timestamps; the saved parameters come back with them
+    version_id = manager.save_model(recommender, {'rmse': 1.0}, {'model_key': 'abc'})
+    versions = manager.list_model_versions()
+    assert [v['version_id'] for v in versions] == [version_id]
+    assert versions[0]['parameters']['model_key'] == 'abc'
+
+def test_stage_cache_reuses_unchanged_stages(sample_ratings_data, tmp_path):
+    ratings_path = tmp_path / 'ratings.csv'
+    sample_ratings_data.to_csv(ratings_path, index=False)
+    calls = []
+    
+    def run(force=False):
+        cache = StageCache(tmp_path / 'cache', force=force)
+        ratings_key = cache.key('ratings', files=[ratings_path])
+        ratings = cache.run('ratings', ratings_key,
+                            lambda: calls.append('ratings') or pd.read_csv(ratings_path),
+                            save_frame, load_frame)
+        means = cache.run('means', cache.key('means', params={'by': 'user_id'}, upstream=[ratings_key]),
+                          lambda: calls.append('means') or ratings.groupby('user_id').mean().reset_index(),
+                          save_frame, load_frame)
+        return cache, means
+    
+    _, expected = run()
+    cache, means = run()
+    assert calls == ['ratings', 'means']
+    assert [record['hit'] for record in cache.report()] == [True, True]
+    pd.testing.assert_frame_equal(means, expected)
+    
+    # Rewriting a file with the same content keeps its fingerprint
+    sample_ratings_data.to_csv(ratings_path, index=False)
+    run()
+    assert calls == ['ratings', 'means']
+    
+    # A content change invalidates the stage and everything downstream
+    sample_ratings_data.assign(rating=1).to_csv(ratings_path, index=False)
+    _, means = run()
+    assert calls[2:] == ['ratings', 'means']
+    assert (means['rating'] == 1).all()
+    
+    cache, _ = run(force=True)
+    assert calls[4:] == ['ratings', 'means']
+    assert not any(record['hit'] for record in cache.report())
+    assert 'total saved' in cache.format_report()
+
+def test_synthetic_dataset_is_deterministic_and_loadable(tmp_path):
+    spec = SyntheticSpec(n_books=300, n_users=5000, n_ratings=60_000, n_tags=400,
+                         tags_per_book=20, seed=7)
+    rows = generate_goodbooks_dataset(tmp_path / 'a', spec)
+    generate_goodbooks_dataset(tmp_path / 'b', spec)
+    assert rows == {'books': 300, 'tags': 400, 'ratings': 60_000, 'book_tags': 6000}
+    for name in ['books', 'ratings', 'tags', 'book_tags']:
+        assert (tmp_path / 'a' / f'{name}.csv').read_bytes() == (tmp_path / 'b' / f'{name}.csv').read_bytes()
+
+    # Ratings span more than one generation block and load like the real files
+    books, ratings, tags, book_tags = asyncio.run(DataLoader(str(tmp_path / 'a')).load_datasets_async())
+    assert not ratings.duplicated(['user_id', 'book_id']).any()
+    assert ratings['user_id'].is_monotonic_increasing
+    assert ratings['rating'].between(1, 5).all()
+    assert set(book_tags['goodreads_book_id']) <= set(books['goodreads_book_id'])
+
+    # Popularity is skewed towards low book ids, as in goodbooks
+    counts = ratings['book_id'].value_counts()
+    assert counts.loc[range(1, 31)].sum() > 0.3 * len(ratings)
+
+def test_columnar_metadata_store_round_trip(sample_books_data, tmp_path):
+    numeric = {'book_id': (np.int64, None), 'average_rating': (np.float32, 0.0),
+               'publication_year': (np.float32, np.nan)}
+    text = ('title', 'authors', 'description')
+    books = sample_books_data.assign(title=['Book 1', 'Café', None])
+    store = ColumnarMetadataStore.from_frame(books, numeric, text)
+    assert store[2] == {'book_id': 2, 'average_rating': 4.0, 'publication_year': None,
+                        'title': 'Café', 'authors': 'Author 2', 'description': ''}
+    assert store.get_many([3, 99], fields=['title', 'average_rating']) == [
+        {'title': '', 'average_rating': 3.5}, None
+    ]
+    
+    # Upserts and removals overlay the columns until they are saved
+    update = books.iloc[[0]].assign(title='Book 1 (2nd ed.)', average_rating=4.75)
+    store.upsert(ColumnarMetadataStore.from_frame(pd.concat([update, update.assign(book_id=4)]), numeric, text))
+    assert store.remove([2, 99]) == 1
+    assert 2 not in store and len(store) == 3
+    assert store.get(1, fields=['title'])['title'] == 'Book 1 (2nd ed.)'
+    
+    store.save(tmp_path / 'metadata')
+    loaded = ColumnarMetadataStore.load(tmp_path / 'metadata')
+    assert isinstance(loaded.text['title'][1], np.memmap)
+    assert sorted(loaded.ids().tolist()) == [1, 3, 4]
+    assert [loaded[book_id] for book_id in (1, 3, 4)] == [store[book_id] for book_id in (1, 3, 4)]
+    assert loaded[4]['average_rating'] == 4.75
+
+def test_quantized_index_types_find_catalogue_vectors():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((3000, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    for index_type in INDEX_TYPES:
+        index = create_index(IndexSpec.for_index_type(index_type, opq_iterations=2, train_size=2000),
+                             32, len(vectors))
+        train_index(index, vectors)
+        index.add(vectors)
+        _, found = index.search(vectors[:20], 1)
+        assert (found[:, 0] == np.arange(20)).mean() >= 0.9, index_type
+        if index_type in ('ivf_pq', 'opq'):
+            assert ivf_of(index) is not None
+    
+    with pytest.raises(ValueError):
+        IndexSpec.for_index_type('lsh')
+
+def test_candidate_rerank_pipeline(sample_ratings_data):
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3, 4],
+        'title': ['Book 1', 'Book 2', 'Book 3', 'Book 4'],
+        'authors': ['Author 1', 'Author 2', 'Author 3', 'Author 4'],
+        'average_rating': [4.5, 4.0, 3.5, 4.2],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction', 'fantasy dragons']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    pipeline = CandidateRerankPipeline(recommender, popularity_weight=0.1)
+    
+    # User 1 rated books 1 and 2, so only unseen books come back
+    recs = pipeline.recommend(user_id=1, n_recommendations=5)
+    assert set(recs['book_id']) == {3, 4}
+    assert recs['hybrid_score'].is_monotonic_decreasing
+    
+    # Title-only requests exclude the query book
+    recs = pipeline.recommend(book_title='Book 1', n_recommendations=2)
+    assert 1 not in recs['book_id'].values
+    assert recs['book_id'].iloc[0] == 4
+    
+    # Unknown users still get popular candidates
+    recs = pipeline.recommend(user_id=999, n_recommendations=2)
+    assert len(recs) == 2
+    
+    metrics = pipeline.get_stage_metrics()
+    for stage in ['candidates', 'rerank', 'total', 'generator.collaborative',
+                  'generator.content', 'generator.popularity']:
+        assert metrics[stage]['count'] == 3
+        assert metrics[stage]['avg_ms'] >= 0
+    
+    # Extra features must be aligned with books_data
+    with pytest.raises(ValueError):
+        pipeline.add_feature('recency', np.ones(2), weight=0.2)
+    
+    popular_only = CandidateRerankPipeline(recommender, generators=[PopularityCandidates(n_candidates=1)])
+    assert len(popular_only.recommend(user_id=999, n_recommendations=5)) == 1
+
+def test_candidate_rerank_pipeline_follows_model_updates(sample_ratings_data):
+    books = pd.DataFrame({
+        'book_id': [1, 2, 3],
+        'title': ['Book 1', 'Book 2', 'Book 3'],
+        'authors': ['Author 1', 'Author 2', 'Author 3'],
+        'average_rating': [4.5, 4.0, 3.5],
+        'all_tags': ['fiction fantasy', 'fiction mystery', 'non-fiction']
+    })
+    recommender = HybridRecommender(content_weight=0.5)
+    recommender.fit(books, sample_ratings_data)
+    pipeline = CandidateRerankPipeline(recommender, popularity_weight=0.1)
+    pipeline.add_feature('recency', np.array([0.1, 0.5, 0.9]), weight=0.01)
+    
+    # A book added after the pipeline was built is scored and recommended
+    recommender.update_books(pd.DataFrame({
+        'book_id': [4], 'title': ['Book 4'], 'authors': ['Author 4'],
+        'average_rating': [4.2], 'all_tags': ['fantasy fiction']
+    }))
+    recs = pipeline.recommend(book_title='Book 1', n_recommendations=3)
+    assert recs['book_id'].iloc[0] == 4
+    assert len(pipeline.row_items) == len(pipeline.popularity) == 4
+    assert len(pipeline.features['recency']) == 4
+    
+    # Ratings folded in with partial_fit move the popularity feature
+    recommender.collab_recommender.partial_fit(
+        pd.DataFrame({'user_id': [1, 2, 3], 'book_id': [4, 4, 4], 'rating': [5, 4, 5]})
+    )
+    recs = pipeline.recommend(user_id=999, n_recommendations=1)
+    assert pipeline.popularity[3] == 3
+    assert list(recs['book_id']) == [4]
+
 def test_explanation_feature(sample_books_data, sample_ratings_data):
     recommender = HybridRecommender()
     recommender.fit(sample_books_data, sample_ratings_data)
@@ -11,7 +11,8 @@ import asyncio
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 from src.features.feature_extractor import FeatureExtractor, FeatureExtractionError
-from src.data.data_loader import DataLoader, DataLoadError
+from src.data.data_loader import ColumnarCache, DataLoader, DataLoadError
+from src.data.tag_matrix import build_tag_matrix
 
 
 class TestFeatureExtractorEdgeCases:
@@ -50,7 +51,8 @@ class TestFeatureExtractorEdgeCases:
         """Test FeatureExtractor initialization with default parameters."""
         extractor = FeatureExtractor()
         assert extractor.tfidf_matrix is None
-        assert extractor.similarity_matrix is None
+        assert extractor.neighbor_indices is None
+        assert extractor.neighbor_scores is None
         assert extractor.book_indices == {}
         assert extractor.tfidf.stop_words == 'english'
         assert extractor.tfidf.ngram_range == (1, 2)
@@ -71,8 +73,10 @@ class TestFeatureExtractorEdgeCases:
         assert tfidf_matrix is not None
         assert tfidf_matrix.shape[0] == len(sample_books_data)
         assert len(book_indices) == len(sample_books_data)
-        assert extractor.similarity_matrix is not None
-        assert extractor.similarity_matrix.shape == (len(sample_books_data), len(sample_books_data))
+        assert extractor.neighbor_indices is not None
+        assert extractor.neighbor_indices.shape == (len(sample_books_data), len(sample_books_data) - 1)
+        assert extractor.neighbor_indices.dtype == np.int32
+        assert extractor.neighbor_scores.dtype == np.float32
         
         # Verify book indices mapping
         for idx, title in enumerate(sample_books_data['title']):
@@ -172,6 +176,109 @@ class TestFeatureExtractorEdgeCases:
         # Verify Book A is not in the recommendations
         assert 'Book A' not in similar_books['title'].values
     
+    @pytest.mark.asyncio
+    async def test_get_similar_books_async_beyond_neighbor_index(self, sample_books_data):
+        """Requests larger than the precomputed index fall back to on-demand scoring."""
+        extractor = FeatureExtractor(n_neighbors=1, similarity_chunk_size=2)
+        await extractor.fit_transform_async(sample_books_data)
+        
+        assert extractor.neighbor_indices.shape == (len(sample_books_data), 1)
+        
+        similar_books = await extractor.get_similar_books_async('Book A', sample_books_data, 3)
+        
+        assert len(similar_books) == 3
+        assert 'Book A' not in similar_books['title'].values
+        assert similar_books['similarity_score'].is_monotonic_decreasing
+        # The closest book is the same whether it comes from the index or not
+        assert similar_books['title'].iloc[0] == 'Book D'
+    
+    @pytest.mark.asyncio
+    async def test_update_books_async_matches_refit(self, sample_books_data):
+        """Incremental updates plus an IDF refresh reproduce a full refit."""
+        extractor = FeatureExtractor(n_neighbors=2, ngram_range=(1, 1), idf_refresh_interval=None)
+        await extractor.fit_transform_async(sample_books_data)
+        
+        updates = pd.DataFrame({
+            'title': ['Book E', 'Book B'],
+            'all_tags': ['fantasy adventure thriller', 'fiction crime mystery']
+        })
+        rows = await extractor.update_books_async(updates)
+        
+        assert list(rows) == [4, 1]
+        assert extractor.book_indices['Book E'] == 4
+        assert extractor.neighbor_indices.shape == (5, 2)
+        # The new book is listed as the nearest neighbour of the book it resembles
+        assert extractor.neighbor_indices[0, 0] == 4
+        
+        extractor.refresh_idf()
+        catalogue = pd.concat([sample_books_data, updates.iloc[:1]], ignore_index=True)
+        catalogue.loc[1, 'all_tags'] = updates.loc[1, 'all_tags']
+        refit = FeatureExtractor(n_neighbors=2, ngram_range=(1, 1))
+        await refit.fit_transform_async(catalogue)
+        
+        assert np.allclose(extractor.tfidf_matrix.toarray(), refit.tfidf_matrix.toarray())
+        assert np.array_equal(extractor.document_frequencies, refit.document_frequencies)
+        assert np.allclose(extractor.neighbor_scores, refit.neighbor_scores)
+    
+    @pytest.mark.asyncio
+    async def test_update_books_async_repeated_new_title(self, sample_books_data):
+        """A new title repeated in one batch takes one row, holding its last version."""
+        extractor = FeatureExtractor(n_neighbors=2, ngram_range=(1, 1), idf_refresh_interval=None)
+        await extractor.fit_transform_async(sample_books_data)
+        n_terms = extractor.tfidf_matrix.shape[1]
+        
+        updates = pd.DataFrame({
+            'title': ['Book E', 'Book E'],
+            'all_tags': ['fiction crime', 'fantasy adventure thriller']
+        })
+        rows = await extractor.update_books_async(updates)
+        
+        assert list(rows) == [4, 4]
+        assert extractor.book_indices['Book E'] == 4
+        assert extractor.tfidf_matrix.shape == (5, n_terms)
+        assert extractor.neighbor_indices.shape == (5, 2)
+        last = extractor.tfidf.transform(['fantasy adventure thriller']).toarray()[0]
+        assert np.allclose(extractor.tfidf_matrix[4].toarray()[0], last)
+    
+    @pytest.mark.asyncio
+    async def test_update_books_async_not_fitted(self):
+        """Incremental updates require a fitted vocabulary."""
+        extractor = FeatureExtractor()
+        
+        with pytest.raises(FeatureExtractionError, match="Features must be fitted before updating books"):
+            await extractor.update_books_async(pd.DataFrame({'title': ['X'], 'all_tags': ['x']}))
+    
+    @pytest.mark.asyncio
+    async def test_fit_tag_matrix_async_uses_counts(self):
+        """Book x tag counts are weighted like TF-IDF over repeated tag tokens."""
+        books = pd.DataFrame({'goodreads_book_id': [10, 20, 30], 'title': ['A', 'B', 'C']})
+        book_tags = pd.DataFrame({
+            'goodreads_book_id': [10, 10, 20, 30, 30, 99],
+            'tag_id': [1, 2, 2, 3, 1, 1],
+            'count': [3, 1, 2, 5, 1, 4]
+        })
+        tags = pd.DataFrame({'tag_id': [1, 2, 3], 'tag_name': ['fantasy', 'to-read', 'sci-fi']})
+        tag_matrix = build_tag_matrix(books, book_tags, tags)
+        assert list(tag_matrix.tag_names) == ['fantasy', 'to-read', 'sci-fi']
+        assert tag_matrix.counts.toarray().tolist() == [[3, 1, 0], [0, 2, 0], [1, 0, 5]]
+        
+        extractor = FeatureExtractor(n_neighbors=2, sublinear_tf=True)
+        tfidf_matrix, book_indices = await extractor.fit_tag_matrix_async(books, tag_matrix)
+        
+        documents = ['fantasy fantasy fantasy to-read', 'to-read to-read', 'sci-fi ' * 5 + 'fantasy']
+        reference = TfidfVectorizer(analyzer=str.split, sublinear_tf=True).fit(documents)
+        columns = [reference.vocabulary_[name] for name in tag_matrix.tag_names]
+        assert np.allclose(tfidf_matrix.toarray(), reference.transform(documents).toarray()[:, columns])
+        assert book_indices == {'A': 0, 'B': 1, 'C': 2}
+        assert extractor.get_feature_names() == ['fantasy', 'to-read', 'sci-fi']
+        
+        # Updates read tag names from 'all_tags'
+        await extractor.update_books_async(pd.DataFrame({'title': ['D'], 'all_tags': ['sci-fi']}))
+        assert extractor.neighbor_indices[3, 0] == 2
+        
+        with pytest.raises(FeatureExtractionError, match="rows for"):
+            await extractor.fit_tag_matrix_async(books.iloc[:2], tag_matrix)
+    
     @pytest.mark.asyncio
     async def test_get_similar_books_async_not_fitted(self, sample_books_data):
         """Test similar books retrieval when features haven't been fitted."""
@@ -232,6 +339,26 @@ class TestFeatureExtractorEdgeCases:
         values = list(importance.values())
         assert values == sorted(values, reverse=True)
     
+    @pytest.mark.asyncio
+    async def test_top_terms_precomputed_and_batched(self, sample_books_data):
+        """Top terms are slices of fit-time arrays that agree with feature importance."""
+        extractor = FeatureExtractor(n_top_terms=3, idf_refresh_interval=None)
+        await extractor.fit_transform_async(sample_books_data)
+        assert extractor.top_term_ids.dtype == np.int32
+        assert extractor.top_term_weights.dtype == np.float32
+
+        importance = await extractor.get_feature_importance_async('Book A')
+        assert list(extractor.get_top_terms('Book A', 3)) == list(importance)[:3]
+        # Beyond the precomputed width the TF-IDF row is ranked on demand
+        assert list(extractor.get_top_terms('Book A', 10)) == list(importance)[:10]
+
+        batch = extractor.get_top_terms_batch(['Book B', 'Unknown', 'Book A'], 2)
+        assert batch[1] == {}
+        assert batch[2] == extractor.get_top_terms('Book A', 2)
+
+        await extractor.update_books_async(pd.DataFrame({'title': ['Book B'], 'all_tags': ['romance romance']}))
+        assert list(extractor.get_top_terms('Book B', 1)) == ['romance']
+
     @pytest.mark.asyncio
     async def test_get_feature_importance_async_not_fitted(self):
         """Test feature importance retrieval when features haven't been fitted."""
@@ -399,6 +526,44 @@ class TestDataLoaderEdgeCases:
         assert len(tags) == 3
         assert len(book_tags) == 3
     
+    def test_columnar_cache_round_trip(self, temp_data_dir, tmp_path):
+        """CSVs are converted once into compact memory-mapped columns."""
+        cache_dir = tmp_path / "cache"
+        cache = ColumnarCache(cache_dir)
+        ratings_path = temp_data_dir / 'ratings.csv'
+        
+        first = cache.load(ratings_path)
+        assert len(list(cache_dir.glob("ratings-*"))) == 1
+        
+        ratings = cache.load(ratings_path)
+        assert ratings['rating'].dtype == np.int8
+        assert list(ratings['rating']) == [5, 4, 3]
+        assert ratings.equals(first)
+        ratings.loc[0, 'rating'] = 1  # cached columns stay writable in memory
+        
+        books = cache.load(temp_data_dir / 'books.csv')
+        assert list(books['title']) == ['Book A', 'Book B', 'Book C']
+        
+        # Repetitive strings are stored as codes but come back with the CSV's dtype
+        authors_path = tmp_path / 'authors.csv'
+        pd.DataFrame({'book_id': [1, 2, 3, 4], 'authors': ['X', 'Y', 'X', None]}).to_csv(
+            authors_path, index=False
+        )
+        uncached = pd.read_csv(authors_path)
+        for authors in (cache.load(authors_path), cache.load(authors_path)):
+            assert authors['authors'].dtype == uncached['authors'].dtype
+            assert authors['authors'].iloc[:3].tolist() == ['X', 'Y', 'X']
+            assert pd.isna(authors['authors'].iloc[3])
+            authors.loc[0, 'authors'] = 'New Author'
+        assert 'categories' in next(cache_dir.glob('authors-*/manifest.json')).read_text()
+        
+        # Rewriting a CSV changes its fingerprint and replaces the stale entry
+        pd.DataFrame({'user_id': [7], 'book_id': [1], 'rating': [2]}).to_csv(
+            ratings_path, index=False
+        )
+        assert list(cache.load(ratings_path)['user_id']) == [7]
+        assert len(list(cache_dir.glob("ratings-*"))) == 1
+    
     @pytest.mark.asyncio
     async def test_load_datasets_async_empty_files(self, tmp_path):
         """Test async dataset loading with empty CSV files."""
@@ -486,6 +651,77 @@ class TestDataLoaderEdgeCases:
         assert metadata['book_id'] == 1
         assert metadata['title'] == 'Book A'
     
+    @pytest.mark.asyncio
+    async def test_book_index_shared_and_refreshed(self, temp_data_dir):
+        """Loaders of one source share an index that is rebuilt when the CSVs change."""
+        pd.DataFrame({
+            'goodreads_book_id': [101, 101, 101, 102],
+            'tag_id': [1, 2, 3, 3],
+            'count': [5, 50, 1, 7]
+        }).to_csv(temp_data_dir / 'book_tags.csv', index=False)
+        first = DataLoader(str(temp_data_dir), source_type="file")
+        second = DataLoader(str(temp_data_dir), source_type="file")
+        
+        index = await first.get_book_index_async()
+        assert await second.get_book_index_async() is index
+        
+        books = await second.get_books_metadata_async([3, 999, 1])
+        assert books[0]['title'] == 'Book C'
+        assert books[1] is None
+        assert books[2]['genres'] == 'fantasy fiction romance'
+        assert books[2]['book_id'] == 1 and isinstance(books[2]['book_id'], int)
+        
+        pd.DataFrame({
+            'book_id': [1, 4],
+            'title': ['Book A (2nd ed.)', 'Book D'],
+            'goodreads_book_id': [101, 104]
+        }).to_csv(temp_data_dir / 'books.csv', index=False)
+        refreshed = await first.get_book_index_async()
+        assert refreshed is not index
+        assert (await first.get_book_metadata_async(4))['title'] == 'Book D'
+        assert await first.get_book_metadata_async(3) is None
+    
+    @pytest.mark.asyncio
+    async def test_sqlite_source_pooled_and_streamed(self, tmp_path):
+        """Database loads stream through a bounded pool with bound parameters."""
+        import sqlite3
+        db_path = tmp_path / "goodbooks.db"
+        with sqlite3.connect(db_path) as conn:
+            pd.DataFrame({
+                'user_id': [1, 1, 2, 3, 3, 3],
+                'book_id': [10, 20, 10, 20, 30, 10],
+                'rating': [5, 4, 3, 2, 1, 4]
+            }).to_sql('ratings', conn, index=False)
+            pd.DataFrame({
+                'book_id': [10, 20, 30], 'goodreads_book_id': [110, 120, 130],
+                'title': ['A', 'B', None]
+            }).to_sql('books', conn, index=False)
+
+        loader = DataLoader(str(db_path), source_type="db")
+        loader._sql.batch_size = 2
+        loader._sql.backend.pool_size = 1
+        try:
+            users = await asyncio.gather(*[loader.get_user_ratings_async(user_id=u) for u in (1, 2, 3)])
+            assert [len(frame) for frame in users] == [2, 1, 3]
+            assert users[2]['rating'].tolist() == [2, 1, 4]
+            assert loader._sql.backend._opened == 1
+
+            books = await loader._sql.read_table('books')
+            assert books['book_id'].dtype == np.int64
+            assert books['title'][:2].tolist() == ['A', 'B'] and pd.isna(books['title'][2])
+
+            matrix = await loader.load_rating_matrix_async(chunksize=4)
+            assert matrix.nnz == 6 and matrix.user_ids.tolist() == [1, 2, 3]
+
+            missing = await loader.ensure_indexes_async()
+            assert any('ratings (user_id)' in statement for statement in missing)
+            await loader.ensure_indexes_async(create=True)
+            remaining = await loader.ensure_indexes_async()
+            # book_tags does not exist, so only its index stays missing
+            assert remaining == [statement for statement in missing if 'book_tags' in statement]
+        finally:
+            await loader.close_async()
+
     @pytest.mark.asyncio
     async def test_get_book_metadata_async_nonexistent_book(self, temp_data_dir):
         """Test async book metadata retrieval for non-existent book."""
@@ -0,0 +1,292 @@
+import asyncio
+import zlib
+import pytest
+import pandas as pd
+import numpy as np
+
+# The module imports sentence_transformers; the tests swap in a stub encoder
+pytest.importorskip("sentence_transformers")
+from src.core.distributed_vector_store import DistributedVectorStore, VectorStoreConfig
+from src.core.vector_store import BookVectorStore
+
+DIMENSION = 128
+
+class StubEncoder:
+    """Bag-of-words hashing encoder standing in for a sentence transformer."""
+
+    def __init__(self, dimension):
+        self.dimension = dimension
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, show_progress_bar=False):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().replace('|', ' ').replace(':', ' ').split():
+                vectors[row, zlib.crc32(token.encode()) % self.dimension] += 1
+        return vectors
+
+@pytest.fixture
+def make_store(tmp_path, monkeypatch):
+    def init_encoder(self):
+        self.encoder = StubEncoder(self.dimension)
+    monkeypatch.setattr(BookVectorStore, '_init_encoder', init_encoder)
+
+    def make(index_type='flat', **kwargs):
+        return BookVectorStore(dimension=DIMENSION, index_type=index_type,
+                               store_path=str(tmp_path / index_type), **kwargs)
+    return make
+
+@pytest.fixture
+def books():
+    return pd.DataFrame({
+        'book_id': [1, 2, 3, 4, 5, 6, 7, 8],
+        'title': ['Book 1', 'Book 2', 'Book 3', 'Book 4', 'Book 5', 'Book 6', 'Book 7', 'Book 8'],
+        'authors': ['Author 1', 'Author 2', 'Author 3', 'Author 4',
+                    'Author 5', 'Author 6', 'Author 7', 'Author 8'],
+        'all_tags': ['dragons wizards', 'space lasers', 'detective murder', 'romance wedding',
+                     'cooking recipes', 'history war', 'robots androids', 'ocean pirates'],
+        'average_rating': [4.5, 4.0, 3.5, 4.2, 3.9, 4.1, 3.8, 4.4]
+    })
+
+def test_query_embeddings_are_batched_and_cached(make_store, books):
+    store = make_store()
+    asyncio.run(store.build_from_books_async(books))
+    encoder = store.encoder
+    encoder.calls.clear()
+
+    # Uncached queries go to the encoder together, once per distinct query
+    results = store.semantic_search_batch(['dragons wizards', 'space lasers', 'dragons  wizards'], k=1)
+    assert encoder.calls == [['dragons wizards', 'space lasers']]
+    assert [rows[0]['book_id'] for rows in results] == [1, 2, 1]
+    assert store.get_stats()['query_cache'] == {'size': 2, 'max_size': 4096, 'hits': 1, 'misses': 2}
+
+    # Repeated queries are served from the cache, still in query order
+    results = store.semantic_search_batch(['space lasers', 'ocean pirates', 'dragons wizards'], k=1)
+    assert encoder.calls[1:] == [['ocean pirates']]
+    assert [rows[0]['book_id'] for rows in results] == [2, 8, 1]
+
+    # Normalization only builds the cache key: the encoder gets the query as typed
+    store.semantic_search_batch(['Space  Lasers'], k=1)
+    assert encoder.calls[-1] == ['Space  Lasers']
+
+def test_query_cache_evicts_least_recently_used(make_store, books):
+    store = make_store(query_cache_size=2)
+    asyncio.run(store.build_from_books_async(books))
+
+    store.semantic_search_batch(['dragons'], k=1)
+    store.semantic_search_batch(['space'], k=1)
+    store.semantic_search_batch(['dragons'], k=1)  # 'space' is now least recently used
+    store.semantic_search_batch(['pirates'], k=1)
+    assert list(store._query_cache) == ['dragons', 'pirates']
+
+    store.encoder.calls.clear()
+    store.semantic_search_batch(['space', 'dragons'], k=1)
+    assert store.encoder.calls == [['space']]
+
+def test_query_cache_disabled(make_store, books):
+    store = make_store(query_cache_size=0)
+    asyncio.run(store.build_from_books_async(books))
+    store.encoder.calls.clear()
+
+    first = store.semantic_search_batch(['robots', 'robots'], k=2)
+    second = store.semantic_search_batch(['robots'], k=2)
+    assert store.encoder.calls == [['robots'], ['robots']]
+    assert len(store._query_cache) == 0
+    assert first[0] == first[1] == second[0]
+
+def _top_ids(store, query, k=3):
+    return [row['book_id'] for row in store.semantic_search_batch([query], k=k, score_threshold=-1.0)[0]]
+
+@pytest.mark.parametrize('index_type', ['flat', 'ivf', 'hnsw'])
+def test_upsert_and_remove_books(make_store, books, index_type):
+    store = make_store(index_type, compaction_threshold=10.0)
+    asyncio.run(store.build_from_books_async(books))
+
+    changes = pd.DataFrame({
+        'book_id': [2, 9],
+        'title': ['Book 2', 'Book 9'],
+        'authors': ['Author 2', 'Author 9'],
+        'all_tags': ['volcano eruption', 'glacier icebergs'],
+        'average_rating': [4.0, 3.0]
+    })
+    stats = asyncio.run(store.upsert_books_async(changes))
+    assert stats == {'embedded': 2, 'unchanged': 0, 'compacted': False}
+    assert _top_ids(store, 'volcano eruption', k=1) == [2]
+    assert _top_ids(store, 'glacier icebergs', k=1) == [9]
+    assert 2 not in _top_ids(store, 'space lasers')
+    assert store.book_metadata[9]['all_tags'] == 'glacier icebergs'
+
+    # The replaced vector is the one reconstructed by book_id
+    expected = store.encoder.encode([asyncio.run(store._prepare_book_texts_async(changes))[0]])
+    expected /= np.linalg.norm(expected)
+    assert np.allclose(store.index.reconstruct(2), expected[0], atol=1e-6)
+    assert asyncio.run(store.get_similar_books_async(2, k=1))[0]['book_id'] != 2
+
+    assert asyncio.run(store.remove_books_async([3, 42])) == 1
+    assert 3 not in store.book_metadata
+    assert 3 not in _top_ids(store, 'detective murder', k=len(books))
+    assert len(store.book_metadata) == 8
+
+def test_hnsw_searches_skip_stale_positions(make_store, books):
+    store = make_store('hnsw', compaction_threshold=10.0)
+    asyncio.run(store.build_from_books_async(books))
+
+    changed = books.iloc[[0]].assign(all_tags='volcano eruption')
+    asyncio.run(store.upsert_books_async(changed))
+    asyncio.run(store.remove_books_async([3]))
+
+    # HNSW keeps the old vectors in its graph; searches must never return them
+    assert store.get_stats()['stale_vectors'] == 2
+    assert store.index.ntotal == len(books) + 1
+    ids = _top_ids(store, 'dragons wizards', k=len(books))
+    assert len(ids) == len(set(ids)) == len(books) - 1
+    assert 3 not in ids
+    assert _top_ids(store, 'volcano eruption', k=1) == [1]
+
+def test_compaction_after_threshold(make_store, books):
+    store = make_store('hnsw', compaction_threshold=0.2)
+    asyncio.run(store.build_from_books_async(books))
+
+    # 1 of 8 books changed: below the 20% threshold
+    stats = asyncio.run(store.upsert_books_async(books.iloc[[0]].assign(all_tags='volcano eruption')))
+    assert not stats['compacted']
+    assert store.get_stats()['stale_vectors'] == 1
+
+    stats = asyncio.run(store.upsert_books_async(books.iloc[[1, 2]].assign(all_tags='glacier icebergs')))
+    assert stats['compacted']
+    assert store.get_stats()['stale_vectors'] == 0
+    assert store.get_stats()['mutations_since_compaction'] == 0
+    assert store.index.ntotal == len(books)
+    assert _top_ids(store, 'volcano eruption', k=1) == [1]
+
+def test_upsert_skips_unchanged_text(make_store, books):
+    store = make_store()
+    asyncio.run(store.build_from_books_async(books))
+    store.encoder.calls.clear()
+
+    # Metadata outside the embedded text is refreshed without re-encoding
+    stats = asyncio.run(store.upsert_books_async(books.assign(publication_year=2001)))
+    assert stats == {'embedded': 0, 'unchanged': len(books), 'compacted': False}
+    assert store.encoder.calls == []
+    assert store.book_metadata[4]['publication_year'] == 2001
+
+    stats = asyncio.run(store.upsert_books_async(books.iloc[:2], force=True))
+    assert stats['embedded'] == 2
+    assert store.encoder.calls == [asyncio.run(store._prepare_book_texts_async(books.iloc[:2]))]
+
+def test_sync_books_removes_missing(make_store, books):
+    store = make_store('ivf', compaction_threshold=10.0)
+    asyncio.run(store.build_from_books_async(books))
+
+    stats = asyncio.run(store.sync_books_async(books.iloc[:6]))
+    assert stats == {'embedded': 0, 'unchanged': 6, 'compacted': False, 'removed': 2}
+    assert sorted(store.book_metadata.ids()) == [1, 2, 3, 4, 5, 6]
+    assert store.index.ntotal == 6
+
+def test_save_and_load_round_trip(make_store, books):
+    store = make_store('hnsw', compaction_threshold=10.0)
+    asyncio.run(store.build_from_books_async(books))
+    asyncio.run(store.upsert_books_async(books.iloc[[0]].assign(all_tags='volcano eruption')))
+    asyncio.run(store.remove_books_async([8]))
+    asyncio.run(store.save_async())
+
+    loaded = make_store('hnsw')
+    assert asyncio.run(loaded.load_async())
+    assert loaded.get_stats()['stale_vectors'] == 2
+    assert sorted(loaded.book_metadata.ids()) == [1, 2, 3, 4, 5, 6, 7]
+    assert loaded.book_metadata[1]['all_tags'] == 'volcano eruption'
+    for query in ['volcano eruption', 'ocean pirates', 'robots androids']:
+        assert _top_ids(loaded, query) == _top_ids(store, query)
+
+def test_index_training_uses_spec_train_size(make_store, books, monkeypatch):
+    from src.core import vector_store
+    from src.core.faiss_index import IndexSpec
+    store = make_store('ivf')
+    monkeypatch.setattr(store, '_index_spec', lambda: IndexSpec.for_index_type('ivf', train_size=5))
+    train_sizes = []
+    train_index = vector_store.train_index
+
+    def recording_train_index(index, vectors, train_size):
+        train_sizes.append(train_size)
+        train_index(index, vectors, train_size=train_size)
+    monkeypatch.setattr(vector_store, 'train_index', recording_train_index)
+
+    asyncio.run(store.build_from_books_async(books))
+    assert train_sizes == [5]
+    assert _top_ids(store, 'space lasers', k=1) == [2]
+
+def _iterrows_book_texts(books_df):
+    """Row-by-row BookVectorStore text formatting the column-wise version replaced."""
+    texts = []
+    for _, book in books_df.iterrows():
+        text_parts = [f"Title: {book['title']}", f"Authors: {book['authors']}"]
+        if 'description' in book and pd.notna(book['description']):
+            text_parts.append(f"Description: {book['description'][:500]}")
+        if 'all_tags' in book and pd.notna(book['all_tags']):
+            text_parts.append(f"Tags: {book['all_tags']}")
+        if 'genres' in book and pd.notna(book['genres']):
+            text_parts.append(f"Genres: {book['genres']}")
+        if 'average_rating' in book and pd.notna(book['average_rating']):
+            text_parts.append(f"Rating: {book['average_rating']}")
+        texts.append(" | ".join(text_parts))
+    return texts
+
+def _iterrows_distributed_texts(books_df):
+    """Row-by-row DistributedVectorStore text formatting the column-wise version replaced."""
+    texts = []
+    for _, row in books_df.iterrows():
+        parts = [str(row['title'])]
+        if 'authors' in row and pd.notna(row['authors']):
+            parts.append(f"by {row['authors']}")
+        if 'description' in row and pd.notna(row['description']):
+            parts.append(str(row['description'])[:500])
+        if 'tags' in row and pd.notna(row['tags']):
+            parts.append(f"Tags: {row['tags']}")
+        texts.append(" ".join(parts))
+    return texts
+
+@pytest.fixture
+def text_edge_books():
+    # NaN fields, a description past the 500-character cut, and repeated index labels
+    return pd.DataFrame({
+        'book_id': [1, 2, 3, 4],
+        'title': ['Dune', 'Émile', 'Untitled', 'Ω'],
+        'authors': ['Frank Herbert', None, 'Anon', 'Zoë'],
+        'description': ['Spice ' * 120, np.nan, 'Short', 'é' * 600],
+        'all_tags': ['sci-fi', 'classic', None, 'greek'],
+        'tags': ['sci-fi', None, 'misc', 'greek'],
+        'genres': [None, 'Drama', 'Misc', None],
+        'average_rating': [4.25, np.nan, 3.0, 5.0]
+    }, index=[0, 0, 1, 1])
+
+def test_book_texts_match_iterrows_formatting(make_store, text_edge_books):
+    store = make_store()
+    int_ratings = text_edge_books.assign(average_rating=[4, 3, 5, 2])
+    for books_df in (text_edge_books, int_ratings, text_edge_books[['book_id', 'title', 'authors']]):
+        assert asyncio.run(store._prepare_book_texts_async(books_df)) == _iterrows_book_texts(books_df)
+    # Integer ratings print without '.0', as they did row by row
+    assert asyncio.run(store._prepare_book_texts_async(int_ratings))[0].endswith(' | Rating: 4')
+
+def test_distributed_texts_match_iterrows_formatting(text_edge_books):
+    for books_df in (text_edge_books, text_edge_books.drop(columns=['authors', 'description'])):
+        assert DistributedVectorStore._prepare_book_texts(books_df) == _iterrows_distributed_texts(books_df)
+
+@pytest.mark.parametrize('enable_sharding', [True, False])
+def test_distributed_shard_mapping(tmp_path, monkeypatch, books, enable_sharding):
+    def init_encoder(self):
+        self.encoder = StubEncoder(DIMENSION)
+        self.dimension = DIMENSION
+    monkeypatch.setattr(DistributedVectorStore, '_init_encoder', init_encoder)
+    config = VectorStoreConfig(enable_sharding=enable_sharding, shard_size=3, index_type='flat',
+                               enable_compression=False, max_workers=1)
+    store = DistributedVectorStore(config, store_path=str(tmp_path / 'distributed'))
+
+    asyncio.run(store.build_from_books_async(books))
+
+    # Row i lands in shard i // shard_size; a single index holds everything in shard 0
+    expected = {book_id: (row // 3 if enable_sharding else 0)
+                for row, book_id in enumerate(books['book_id'])}
+    assert store.shard_mapping == expected
+    assert sorted(store.shards) == sorted(set(expected.values()))
+    assert sum(shard.ntotal for shard in store.shards.values()) == len(books)